@@ -3,7 +3,7 @@ import signal
 import pyrogram
 from config import API_ID, API_HASH, BOT_TOKEN, ADMIN_IDS, VERSION
 from services.database import db
-from services.drive import drive_service
+from services.drive import drive_service, drive_pool
 from utils.time import format_timestamp
 import time
 import asyncio
@@ -18,12 +18,13 @@ logging.basicConfig(
 LOGGER = logging.getLogger(__name__)
 
 # Constants
-EXPIRY_CHECK_INTERVAL = 300      # 5 minutes
 NOTIFICATION_INTERVAL = 3600     # 1 hour
 DAILY_SUMMARY_INTERVAL = 86400   # 24 hours
 WEEKLY_REPORT_INTERVAL = 604800  # 7 days
 NOTIFICATION_TTL = 90000         # 25 hours
 MAX_NOTIFICATIONS_PER_BATCH = 20
+METRICS_PUBLISH_INTERVAL = 60    # 1 minute
+PERMISSION_BACKFILL_SETTING = "permission_id_backfill_done"
 
 # Security: Helper to hash emails in logs
 import hashlib
@@ -37,6 +38,9 @@ def sanitize_email(email: str) -> str:
 # Plugins reference 'app' via the Client passed into handlers by Pyrogram, not this module's global.
 
 from services.broadcast import broadcast, send_daily_summary, verify_channel_access
+from services.expiry_engine import run_expiry_sweep
+from services.expiry_scheduler import expiry_scheduler
+from services.job_queue import job_queue
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.enums import ButtonStyle
 
@@ -56,36 +60,8 @@ def make_app():
 
 
 async def expiry_checker(app):
-    """Background task: auto-revoke expired grants every 5 minutes."""
-    while True:
-        try:
-            await asyncio.sleep(EXPIRY_CHECK_INTERVAL)
-            expired = await db.get_expired_grants()
-            for grant in expired:
-                try:
-                    success = await drive_service.remove_access(grant["folder_id"], grant["email"], db)
-                    if success:
-                        await db.mark_grant_expired(grant["_id"])
-                        await db.log_action(
-                            admin_id=0, admin_name="Auto-Expire", action="auto_revoke",
-                            details={"email": grant["email"], "folder_name": grant["folder_name"], "folder_id": grant["folder_id"]}
-                        )
-                        await broadcast(app, "revoke", {
-                            "email": grant["email"], "folder_name": grant["folder_name"], "admin_name": "Auto-Expire"
-                        })
-                        LOGGER.info(f"⏰ Auto-revoked: {sanitize_email(grant['email'])} from {grant['folder_name']}")
-                    else:
-                        await db.mark_grant_revocation_failed(grant["_id"])
-                        err_msg = f"Failed to auto-revoke `{grant['email']}` from `{grant['folder_name']}`. Status set to 'revocation_failed'. Check manually."
-                        await broadcast(app, "alert", {"message": err_msg})
-                        LOGGER.error(f"❌ {err_msg}")
-                except Exception as e:
-                    LOGGER.error(f"Error revoking {sanitize_email(grant['email'])}: {e}")
-                    await broadcast(app, "alert", {"message": f"Error revoking `{grant['email']}`: {str(e)}"})
-            if expired:
-                LOGGER.info(f"⏰ Expiry check: {len(expired)} grant(s) processed")
-        except Exception as e:
-            LOGGER.error(f"Expiry checker error: {e}")
+    """Background task: wake exactly at the next grant deadline and drain everything due."""
+    await expiry_scheduler.run(db, lambda: run_expiry_sweep(app))
 
 
 async def expiry_notifier(app):
@@ -169,6 +145,47 @@ async def weekly_report_scheduler(app):
             LOGGER.error(f"Weekly report error: {e}")
 
 
+def collect_runtime_metrics():
+    """In-process counters exposed through server.py /metrics."""
+    from services.drive import get_service_cache_stats, get_rate_limit_stats, permission_index
+    return {
+        "state_cache": db.get_state_cache_stats(),
+        "admin_cache": db.get_admin_cache_stats(),
+        "drive_client_cache": get_service_cache_stats(),
+        "permission_cache": permission_index.get_stats(),
+        "drive_rate_limit": get_rate_limit_stats(),
+        "drive_pool": drive_pool.get_stats(),
+        "drive_transport": drive_service.get_transport_stats(),
+        "expiry_scheduler": expiry_scheduler.get_stats(),
+        "job_queue": job_queue.get_stats(),
+    }
+
+
+async def permission_id_backfill():
+    """
+    One-shot migration for grants created before permission ids were stored.
+    A completed pass is recorded in settings so later startups skip it —
+    grants whose permission can't be found would otherwise be re-scanned forever.
+    """
+    try:
+        if await db.get_setting(PERMISSION_BACKFILL_SETTING):
+            return
+        if await drive_service.backfill_grant_permission_ids(db) is not None:
+            await db.update_setting(PERMISSION_BACKFILL_SETTING, time.time())
+    except Exception as e:
+        LOGGER.error(f"Permission id backfill error: {e}")
+
+
+async def metrics_publisher(app):
+    """Persist runtime metrics so the web process can serve them."""
+    while True:
+        await asyncio.sleep(METRICS_PUBLISH_INTERVAL)
+        try:
+            await db.save_runtime_metrics(collect_runtime_metrics())
+        except Exception as e:
+            LOGGER.error(f"Metrics publisher error: {e}")
+
+
 async def main():
     await db.init()
 
@@ -221,11 +238,16 @@ async def main():
             asyncio.create_task(expiry_notifier(app), name="expiry_notifier"),
             asyncio.create_task(daily_summary_scheduler(app), name="daily_summary_scheduler"),
             asyncio.create_task(weekly_report_scheduler(app), name="weekly_report_scheduler"),
+            asyncio.create_task(metrics_publisher(app), name="metrics_publisher"),
+            asyncio.create_task(db.watch_settings(), name="settings_watcher"),
+            asyncio.create_task(permission_id_backfill(), name="permission_id_backfill"),
+            asyncio.create_task(job_queue.run(app), name="job_workers"),
         ]
-        LOGGER.info("⏰ Expiry checker started (every 5 min)")
+        LOGGER.info("⏰ Expiry scheduler started (wakes at each grant deadline)")
         LOGGER.info("🔔 Expiry notifier started (every 1 hour, with action buttons)")
         LOGGER.info("📊 Daily summary scheduler started")
         LOGGER.info("📈 Weekly report scheduler started")
+        LOGGER.info("🧰 Job workers started (durable queue for bulk Drive operations)")
 
         # Use asyncio Event instead of pyrogram idle() so that
         # SIGTERM is handled by server.py and not intercepted by Pyrogram.
@@ -252,6 +274,9 @@ async def main():
             except Exception as stop_err:
                 LOGGER.warning(f"Bot shutdown warning: {stop_err}")
 
+        await drive_service.close()
+        drive_pool.shutdown()
+
 
 if __name__ == "__main__":
     if not API_ID or not API_HASH:
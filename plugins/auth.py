@@ -9,7 +9,10 @@ import re
 from pyrogram import Client, filters
 from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from services.database import db
-from services.drive import start_auth_flow, finish_auth_with_code, has_pending_flow, drive_service
+from services.drive import (
+    start_auth_flow, finish_auth_with_code, has_pending_flow,
+    invalidate_user_service, drive_service
+)
 from utils.filters import is_admin
 import logging
 
@@ -102,6 +105,7 @@ async def cmd_revoke(client, message):
         await message.reply_text("ℹ️ No Google Drive account connected.")
         return
     await db.delete_gdrive_creds(user_id)
+    invalidate_user_service(user_id)
     if drive_service._admin_user_id == user_id:
         drive_service._admin_user_id = None
     await message.reply_text("🔓 **Disconnected.**\n\nUse /auth to reconnect.")
@@ -132,6 +136,7 @@ async def cmd_authstatus(client, message):
 async def cb_revoke(client, callback_query):
     user_id = callback_query.from_user.id
     await db.delete_gdrive_creds(user_id)
+    invalidate_user_service(user_id)
     if drive_service._admin_user_id == user_id:
         drive_service._admin_user_id = None
     await callback_query.message.edit_text(
@@ -1,6 +1,8 @@
 from pyrogram.enums import ButtonStyle
 import csv
+import gzip
 import io
+import tempfile
 import time
 from datetime import datetime
 from utils.time import IST
@@ -13,95 +15,110 @@ import logging
 
 LOGGER = logging.getLogger(__name__)
 
+EXPORT_BATCH_SIZE = 1000            # log documents per Mongo round trip
+EXPORT_SPOOL_SIZE = 8 * 1024 * 1024  # bytes kept in RAM before the export spills to disk
+EXPORT_FIELDS = {"_id": 0, "timestamp": 1, "admin_name": 1, "admin_id": 1, "action": 1, "target": 1, "details": 1}
+EXPORT_RANGES = {"today": 86400, "week": 86400 * 7, "month": 86400 * 30, "all": None}
+
+
+def export_menu_keyboard(back_callback, back_label="⬅️ Back"):
+    return InlineKeyboardMarkup([
+        [InlineKeyboardButton("Today", callback_data="export_csv_today", style=ButtonStyle.PRIMARY),
+         InlineKeyboardButton("This Week", callback_data="export_csv_week", style=ButtonStyle.PRIMARY)],
+        [InlineKeyboardButton("This Month", callback_data="export_csv_month", style=ButtonStyle.PRIMARY),
+         InlineKeyboardButton("All Time", callback_data="export_csv_all", style=ButtonStyle.PRIMARY)],
+        [InlineKeyboardButton("📦 Month (.csv.gz)", callback_data="export_csvgz_month", style=ButtonStyle.SUCCESS),
+         InlineKeyboardButton("📦 All Time (.csv.gz)", callback_data="export_csvgz_all", style=ButtonStyle.SUCCESS)],
+        [InlineKeyboardButton(back_label, callback_data=back_callback, style=ButtonStyle.PRIMARY)]
+    ])
+
+
 @Client.on_callback_query(filters.regex("^export_logs$" ) & is_admin)
 async def export_logs_menu(client, callback_query):
     await safe_edit(callback_query, 
         "📤 **Export Access Logs**\n\n"
         "Select the range of logs to export:",
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("Today", callback_data="export_csv_today", style=ButtonStyle.PRIMARY),
-             InlineKeyboardButton("This Week", callback_data="export_csv_week", style=ButtonStyle.PRIMARY)],
-            [InlineKeyboardButton("This Month", callback_data="export_csv_month", style=ButtonStyle.PRIMARY),
-             InlineKeyboardButton("All Time", callback_data="export_csv_all", style=ButtonStyle.PRIMARY)],
-            [InlineKeyboardButton("⬅️ Back", callback_data="logs_menu", style=ButtonStyle.PRIMARY)]
-        ])
+        reply_markup=export_menu_keyboard("logs_menu")
     )
 
-@Client.on_callback_query(filters.regex("^export_csv_" ) & is_admin)
+
+async def write_logs_csv(query, compress=False):
+    """
+    Stream matching logs into a spooled temp file (optionally gzip'd),
+    one cursor batch at a time. Returns (file positioned at 0, row count).
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE, mode="w+b")
+    raw = gzip.GzipFile(fileobj=spool, mode="wb") if compress else spool
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    
+    # Header
+    writer.writerow(["Timestamp", "Date", "Time", "Admin", "Action", "Goal", "Details"])
+    
+    rows = 0
+    try:
+        async for log in db.iter_logs(query, EXPORT_FIELDS, batch_size=EXPORT_BATCH_SIZE):
+            ts = log.get('timestamp', 0)
+            dt = datetime.fromtimestamp(ts, IST)
+            writer.writerow([
+                ts,
+                dt.strftime('%d %b %Y'),
+                dt.strftime('%I:%M:%S %p'),
+                f"{log.get('admin_name')} ({log.get('admin_id')})",
+                log.get('action'),
+                log.get('target', ''),
+                str(log.get('details', ''))
+            ])
+            rows += 1
+        text.flush()
+        text.detach()          # keep `raw` open — closing the wrapper would close the spool
+        if compress:
+            raw.close()        # writes the gzip trailer; spool stays open
+    except Exception:
+        spool.close()
+        raise
+    
+    spool.seek(0)
+    return spool, rows
+
+
+@Client.on_callback_query(filters.regex("^export_csv(gz)?_" ) & is_admin)
 async def execute_export(client, callback_query):
-    range_type = callback_query.data.split("_")[2]
+    kind, range_type = callback_query.data.split("_")[1:3]
+    compress = kind == "csvgz"
     
     # Calculate timestamp filter
     now = time.time()
-    query = {}
-    
-    if range_type == "today":
-        start_time = now - 86400
-        query = {"timestamp": {"$gte": start_time}}
-        filename = f"access_logs_today_{int(now)}.csv"
-    elif range_type == "week":
-        start_time = now - (86400 * 7)
-        query = {"timestamp": {"$gte": start_time}}
-        filename = f"access_logs_week_{int(now)}.csv"
-    elif range_type == "month":
-        start_time = now - (86400 * 30)
-        query = {"timestamp": {"$gte": start_time}}
-        filename = f"access_logs_month_{int(now)}.csv"
-    else:
-        filename = f"access_logs_all_{int(now)}.csv"
+    span = EXPORT_RANGES.get(range_type)
+    query = {"timestamp": {"$gte": now - span}} if span else {}
+    range_type = range_type if span else "all"
+    filename = f"access_logs_{range_type}_{int(now)}.csv" + (".gz" if compress else "")
 
     await callback_query.answer("⏳ Generating CSV...", show_alert=False)
     status_msg = await callback_query.message.reply_text("⏳ Fetching logs and generating CSV...")
 
-    # Fetch logs
-    # Note: get_logs only returns limited logs, we need a new method or use raw db call
-    # db.get_logs returns (logs, total_count). 
-    # Let's use db.logs.find(query) directly for full export
-    
-    cursor = db.logs.find(query).sort("timestamp", -1)
-    logs = await cursor.to_list(length=None)
-    
-    if not logs:
-        await safe_edit(status_msg, "❌ No logs found for the selected range.")
+    try:
+        document, rows = await write_logs_csv(query, compress=compress)
+    except Exception as e:
+        LOGGER.error(f"CSV export error: {e}", exc_info=True)
+        await safe_edit(status_msg, f"❌ Export failed: `{str(e)[:100]}`")
         return
 
-    # Create CSV in memory
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow(["Timestamp", "Date", "Time", "Admin", "Action", "Goal", "Details"])
-    
-    for log in logs:
-        ts = log.get('timestamp', 0)
-        dt = datetime.fromtimestamp(ts, IST)
-        date_str = dt.strftime('%d %b %Y')
-        time_str = dt.strftime('%I:%M:%S %p')
-        
-        details = str(log.get('details', ''))
-        
-        writer.writerow([
-            ts,
-            date_str,
-            time_str,
-            f"{log.get('admin_name')} ({log.get('admin_id')})",
-            log.get('action'),
-            log.get('target', ''),
-            details
-        ])
-    
-    output.seek(0)
-    
-    # Send file
-    await client.send_document(
-        chat_id=callback_query.from_user.id,
-        document=io.BytesIO(output.getvalue().encode('utf-8')),
-        file_name=filename,
-        caption=f"📊 **Access Logs Export**\n"
-                f"Range: {range_type.title()}\n"
-                f"Entries: {len(logs)}\n"
-                f"Generated at: {datetime.now(IST).strftime('%d %b %Y, %I:%M:%S %p')} IST"
-    )
+    with document:
+        if not rows:
+            await safe_edit(status_msg, "❌ No logs found for the selected range.")
+            return
+
+        # Send file (Pyrogram uploads it in chunks straight from the spool)
+        await client.send_document(
+            chat_id=callback_query.from_user.id,
+            document=document,
+            file_name=filename,
+            caption=f"📊 **Access Logs Export**\n"
+                    f"Range: {range_type.title()}\n"
+                    f"Entries: {rows}\n"
+                    f"Generated at: {datetime.now(IST).strftime('%d %b %Y, %I:%M:%S %p')} IST"
+        )
     
     await status_msg.delete()
     # Go back to menu
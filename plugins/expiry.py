@@ -10,6 +10,8 @@ from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from services.database import db
 from services.drive import drive_service
 from services.broadcast import broadcast
+from services.bulk_import import start_import, format_job_status
+from services.job_queue import job_queue
 from utils.filters import is_admin
 from utils.time import safe_edit, format_time_remaining, format_duration, format_date
 from utils.pagination import sort_grants
@@ -198,8 +200,8 @@ async def execute_extend(client, callback_query):
         await callback_query.answer("Grant not found.", show_alert=True)
         return
 
-    new_expiry = grant["expires_at"] + (hours * 3600)
-    await db.grants.update_one({"_id": ObjectId(grant_id)}, {"$set": {"expires_at": new_expiry}})
+    grant      = await db.extend_grant(grant_id, hours) or grant
+    new_expiry = grant["expires_at"]
     await db.log_action(user_id, callback_query.from_user.first_name, "extend", {
         "email": grant["email"], "folder_name": grant["folder_name"],
         "extended_hours": hours
@@ -259,7 +261,9 @@ async def execute_revoke(client, callback_query):
     drive_service.set_admin_user(user_id)
 
     # FIX (v2.2.2): pass db so drive_service can fetch OAuth credentials
-    success = await drive_service.remove_access(grant["folder_id"], grant["email"], db)
+    success = await drive_service.remove_access(
+        grant["folder_id"], grant["email"], db, permission_id=grant.get("permission_id")
+    )
 
     if success:
         await db.revoke_grant(ObjectId(grant_id))
@@ -299,97 +303,46 @@ async def bulk_import_confirm(client, callback_query):
         "• Skips owners, editors, and duplicates\n"
         "• Sets 40-day expiry for new viewers\n"
         "• Shows before/after statistics\n\n"
-        "⚠️ This may take several minutes for large drives.",
+        "⚠️ This may take several minutes for large drives.\n"
+        "It runs in the background and resumes after a restart.",
         reply_markup=InlineKeyboardMarkup([
             [InlineKeyboardButton("✅ Start Import", callback_data="bulk_import_run", style=ButtonStyle.SUCCESS),
-             InlineKeyboardButton("❌ Cancel",       callback_data="expiry_menu",    style=ButtonStyle.DANGER)]
+             InlineKeyboardButton("❌ Cancel",       callback_data="expiry_menu",    style=ButtonStyle.DANGER)],
+            [InlineKeyboardButton("📊 Last Import Status", callback_data="bulk_import_status", style=ButtonStyle.PRIMARY)]
         ])
     )
 
 
 @Client.on_callback_query(filters.regex("^bulk_import_run$") & is_admin)
 async def bulk_import_run(client, callback_query):
+    """Hand the scan to a background job — it edits this message as it goes."""
     user_id = callback_query.from_user.id
-    await safe_edit(callback_query, "📥 **Full Drive Scan Started...**\n⏳ Scanning all folders and permissions...")
-
-    drive_service.set_admin_user(user_id)
-
-    try:
-        folders = await drive_service.list_folders(db)
-        if not folders:
-            await safe_edit(callback_query, "❌ No folders found in Drive.",
-                reply_markup=InlineKeyboardMarkup([[
-                    InlineKeyboardButton("🏠 Back", callback_data="main_menu", style=ButtonStyle.PRIMARY)
-                ]]))
-            return
-
-        total_folders = len(folders)
-        imported = 0
-        skipped  = 0
-        errors   = 0
-
-        for i, folder in enumerate(folders):
-            if i % 10 == 0:
-                try:
-                    await safe_edit(callback_query,
-                        f"📥 **Scanning Drive folders...**\n"
-                        f"⏳ Progress: {i}/{total_folders} folders\n"
-                        f"✅ Imported: {imported} | ⏭ Skipped: {skipped}"
-                    )
-                except Exception:
-                    pass
-
-            try:
-                perms = await drive_service.get_permissions(folder["id"], db)
-                for p in perms:
-                    role  = p.get("role", "")
-                    email = p.get("emailAddress", "")
-                    if role in ("owner", "writer") or not email:
-                        skipped += 1
-                        continue
-
-                    exists = await db.grants.find_one({
-                        "email": email.lower(), "folder_id": folder["id"], "status": "active"
-                    })
-                    if exists:
-                        skipped += 1
-                        continue
-
-                    await db.add_timed_grant(
-                        admin_id=user_id, email=email.lower(),
-                        folder_id=folder["id"], folder_name=folder["name"],
-                        role="viewer", duration_hours=960  # 40 days
-                    )
-                    imported += 1
-            except Exception as e:
-                LOGGER.error(f"Bulk import error for folder {folder.get('name')}: {e}")
-                errors += 1
-
-        await db.log_action(user_id, callback_query.from_user.first_name, "bulk_import", {
-            "folders_scanned": total_folders, "imported": imported,
-            "skipped": skipped, "errors": errors
-        })
+    job, started = await start_import(
+        user_id, callback_query.from_user.first_name,
+        callback_query.message.chat.id, callback_query.message.id
+    )
+    if not started:
+        await callback_query.answer("⏳ An import is already running.", show_alert=True)
+    await safe_edit(callback_query,
+        "📥 **Full Drive Scan Started...**\n⏳ Running in the background — this message will update.\n\n"
+        + format_job_status(job),
+        reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔄 Status", callback_data="bulk_import_status", style=ButtonStyle.PRIMARY)],
+            [InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu", style=ButtonStyle.PRIMARY)]
+        ])
+    )
 
-        await safe_edit(callback_query,
-            f"✅ **Drive Import Complete!**\n\n"
-            f"📂 Folders scanned: **{total_folders}**\n"
-            f"✅ Imported: **{imported}**\n"
-            f"⏭ Skipped: **{skipped}**\n"
-            f"❌ Errors: **{errors}**\n\n"
-            f"All imported viewers set to 40-day expiry.",
-            reply_markup=InlineKeyboardMarkup([
-                [InlineKeyboardButton("⏰ View Expiry", callback_data="expiry_menu", style=ButtonStyle.PRIMARY)],
-                [InlineKeyboardButton("🏠 Main Menu",   callback_data="main_menu",   style=ButtonStyle.PRIMARY)]
-            ])
-        )
 
-    except Exception as e:
-        LOGGER.error(f"Bulk import failed: {e}")
-        await safe_edit(callback_query, f"❌ **Import failed.**\n\n`{e}`",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 Main Menu", callback_data="main_menu", style=ButtonStyle.PRIMARY)
-            ]])
-        )
+@Client.on_callback_query(filters.regex("^bulk_import_status$") & is_admin)
+async def bulk_import_status(client, callback_query):
+    job = await db.get_latest_import_job()
+    text = format_job_status(job) if job else "📥 **Drive Import**\n\nNo import has been run yet."
+    await safe_edit(callback_query, text,
+        reply_markup=InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔄 Refresh", callback_data="bulk_import_status", style=ButtonStyle.PRIMARY)],
+            [InlineKeyboardButton("⬅️ Back", callback_data="expiry_menu", style=ButtonStyle.PRIMARY)]
+        ])
+    )
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -418,8 +371,27 @@ async def bulk_revoke_menu(client, callback_query):
 @Client.on_callback_query(filters.regex(r"^bulk_revoke_(all|expiring)$") & is_admin)
 async def bulk_revoke_execute(client, callback_query):
     mode    = callback_query.matches[0].group(1)
-    user_id = callback_query.from_user.id
+    message = callback_query.message
+    _, created = await job_queue.enqueue(
+        "bulk_revoke",
+        {"user_id": callback_query.from_user.id,
+         "admin_name": callback_query.from_user.first_name, "mode": mode},
+        chat_id=message.chat.id, message_id=message.id,
+        idempotency_key=f"bulk_revoke:{message.chat.id}:{message.id}"
+    )
+    if not created:
+        await callback_query.answer("⏳ Already queued — this message will update.", show_alert=True)
+        return
+    await safe_edit(callback_query, "⏳ **Bulk revoke queued...**\n📬 This message will update.")
+
 
+@job_queue.handler("bulk_revoke")
+async def run_bulk_revoke_job(client, job, target):
+    mode       = job["payload"]["mode"]
+    user_id    = job["payload"]["user_id"]
+    admin_name = job["payload"]["admin_name"]
+
+    # Targets are read when the job runs, so a retry only sees what is still active
     grants = await db.get_active_grants()
     now    = time.time()
 
@@ -430,34 +402,37 @@ async def bulk_revoke_execute(client, callback_query):
         targets = grants
         label   = "all timed"
 
-    await safe_edit(callback_query, f"⏳ Revoking {len(targets)} {label} grant(s)...")
+    await safe_edit(target, f"⏳ Revoking {len(targets)} {label} grant(s)...")
 
     drive_service.set_admin_user(user_id)
     success_count = 0
     fail_count    = 0
 
-    for grant in targets:
+    removed = await drive_service.batch_remove(
+        [{"folder_id": g["folder_id"], "email": g["email"], "grant_id": g["_id"],
+          "permission_id": g.get("permission_id")} for g in targets], db
+    )
+    for res in removed:
+        if not res["ok"]:
+            LOGGER.error(f"Bulk revoke error ({res['email']}): {res['error']}")
+            fail_count += 1
+            continue
         try:
-            # FIX (v2.2.2): pass db
-            ok = await drive_service.remove_access(grant["folder_id"], grant["email"], db)
-            if ok:
-                await db.revoke_grant(grant["_id"])
-                success_count += 1
-            else:
-                fail_count += 1
+            await db.revoke_grant(res["grant_id"])
+            success_count += 1
         except Exception as e:
             LOGGER.error(f"Bulk revoke error: {e}")
             fail_count += 1
 
-    await db.log_action(user_id, callback_query.from_user.first_name, "bulk_revoke", {
+    await db.log_action(user_id, admin_name, "bulk_revoke", {
         "mode": mode, "success": success_count, "failed": fail_count
     })
     await broadcast(client, "bulk_revoke", {
         "type": f"bulk_{mode}", "success": success_count, "failed": fail_count,
-        "admin_name": callback_query.from_user.first_name
+        "admin_name": admin_name
     })
 
-    await safe_edit(callback_query,
+    await safe_edit(target,
         f"✅ **Bulk Revoke Complete!**\n\n"
         f"Mode: **{label}**\n"
         f"✅ Revoked: **{success_count}**\n"
@@ -483,7 +458,9 @@ async def notif_revoke_grant(client, callback_query):
         return
 
     drive_service.set_admin_user(user_id)
-    success = await drive_service.remove_access(grant["folder_id"], grant["email"], db)
+    success = await drive_service.remove_access(
+        grant["folder_id"], grant["email"], db, permission_id=grant.get("permission_id")
+    )
 
     if success:
         await db.revoke_grant(ObjectId(grant_id))
@@ -509,8 +486,8 @@ async def notif_extend_grant(client, callback_query):
         await callback_query.answer("Grant not found.", show_alert=True)
         return
 
-    new_expiry = grant["expires_at"] + (hours * 3600)
-    await db.grants.update_one({"_id": ObjectId(grant_id)}, {"$set": {"expires_at": new_expiry}})
+    grant      = await db.extend_grant(grant_id, hours) or grant
+    new_expiry = grant["expires_at"]
     await db.log_action(user_id, callback_query.from_user.first_name, "extend", {
         "email": grant["email"], "folder_name": grant["folder_name"], "extended_hours": hours
     })
@@ -1,5 +1,6 @@
 import re
 import time
+import asyncio
 import logging
 
 from pyrogram import Client, filters
@@ -7,7 +8,9 @@ from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from pyrogram.enums import ButtonStyle
 
 from services.database import db
-from services.drive import drive_service
+from services.drive import drive_service, permission_index
+from services.folder_index import folder_index
+from services.job_queue import job_queue
 from utils.states import (
     WAITING_EMAIL_GRANT, WAITING_FOLDER_GRANT, WAITING_MULTISELECT_GRANT,
     WAITING_ROLE_GRANT, WAITING_DURATION_GRANT, WAITING_CUSTOM_DURATION_GRANT, WAITING_CONFIRM_GRANT,
@@ -15,10 +18,10 @@ from utils.states import (
     WAITING_MULTI_EMAIL_ROLE, WAITING_MULTI_EMAIL_DURATION, WAITING_BULK_CUSTOM_DURATION,
     WAITING_MULTI_EMAIL_CONFIRM
 )
-from utils.time import safe_edit, format_duration, format_timestamp, format_date
+from utils.time import safe_edit, format_duration, format_timestamp, format_date, ProgressTicker
 from utils.filters import check_state, is_admin
 from utils.validators import validate_email
-from utils.pagination import create_pagination_keyboard, create_checkbox_keyboard, sort_folders
+from utils.pagination import create_pagination_keyboard, create_checkbox_keyboard
 from services.broadcast import broadcast
 
 LOGGER = logging.getLogger(__name__)
@@ -158,14 +161,12 @@ async def receive_email(client, message):
 
     msg = await message.reply_text("📂 Loading folders...")
 
-    folders = await drive_service.get_folders_cached(db)
+    snapshot, folders = await folder_index.load(db)
     if not folders:
         await safe_edit(msg, "❌ No folders found or Drive API error.")
         await db.delete_state(user_id)
         return
 
-    folders = sort_folders(folders)
-
     # from_favorites: email already entered from favorites pick flow → skip folder step
     if prev_data and prev_data.get("from_favorites"):
         folder_id   = prev_data.get("folder_id")
@@ -189,7 +190,7 @@ async def receive_email(client, message):
     if mode == "multi":
         # Multi-folder: checkbox keyboard
         await db.set_state(user_id, WAITING_MULTISELECT_GRANT, {
-            "email": email, "folders": folders, "selected": [], "mode": mode
+            "email": email, "snapshot": snapshot, "selected": [], "mode": mode
         })
         keyboard = create_checkbox_keyboard(folders, set(), page=1)
         await safe_edit(msg,
@@ -202,7 +203,7 @@ async def receive_email(client, message):
     else:
         # Single: A-Z group picker
         await db.set_state(user_id, WAITING_FOLDER_GRANT, {
-            "email": email, "folders": folders, "mode": mode
+            "email": email, "snapshot": snapshot, "mode": mode
         })
         keyboard = build_az_group_keyboard(folders, back_cb="grant_menu", context="grant")
         await safe_edit(msg,
@@ -223,11 +224,12 @@ async def grant_az_folder_list(client, callback_query):
     user_id = callback_query.from_user.id
     state, data = await db.get_state(user_id)
 
-    if state != WAITING_FOLDER_GRANT or "folders" not in data:
+    if state != WAITING_FOLDER_GRANT or "snapshot" not in data:
         await callback_query.answer("Session expired. Please /grant again.", show_alert=True)
         return
 
-    filtered = filter_folders_by_group(data["folders"], group)
+    _, folders = await folder_index.resolve(data["snapshot"], db)
+    filtered = filter_folders_by_group(folders, group)
     keyboard = create_pagination_keyboard(
         items=filtered, page=page, per_page=15,
         callback_prefix=f"grant_az_{group}",
@@ -246,10 +248,11 @@ async def grant_az_folder_list(client, callback_query):
 async def grant_back_to_az(client, callback_query):
     user_id = callback_query.from_user.id
     state, data = await db.get_state(user_id)
-    if state != WAITING_FOLDER_GRANT or "folders" not in data:
+    if state != WAITING_FOLDER_GRANT or "snapshot" not in data:
         await callback_query.answer("Session expired.", show_alert=True)
         return
-    keyboard = build_az_group_keyboard(data["folders"], back_cb="grant_menu", context="grant")
+    _, folders = await folder_index.resolve(data["snapshot"], db)
+    keyboard = build_az_group_keyboard(folders, back_cb="grant_menu", context="grant")
     await safe_edit(callback_query,
         f"📧 User: `{data.get('email', '')}`\n\n"
         "📂 **Select a Folder:**\n"
@@ -270,18 +273,15 @@ async def grant_refresh(client, callback_query):
         return
 
     await callback_query.answer("🔄 Refreshing...")
-    await db.clear_folder_cache()
-    drive_service._mem_folders = []  # clear RAM cache too
 
-    folders = await drive_service.get_folders_cached(db, force_refresh=True)
+    snapshot, folders = await folder_index.load(db, force_refresh=True)
     if not folders:
         await safe_edit(callback_query, "❌ No folders found.")
         return
 
-    folders = sort_folders(folders)
     email = data.get("email", "")
     await db.set_state(user_id, WAITING_FOLDER_GRANT, {
-        "email": email, "folders": folders, "mode": data.get("mode", "single")
+        "email": email, "snapshot": snapshot, "mode": data.get("mode", "single")
     })
 
     keyboard = build_az_group_keyboard(folders, back_cb="grant_menu", context="grant")
@@ -305,11 +305,12 @@ async def select_folder(client, callback_query):
         await callback_query.answer("Session expired.", show_alert=True)
         return
 
-    folder_name = next((f['name'] for f in data.get("folders", []) if f['id'] == folder_id), "Unknown")
+    snapshot, _ = await folder_index.resolve(data.get("snapshot"), db)
+    folder_name = folder_index.folder_name(snapshot, folder_id)
     await db.set_state(user_id, WAITING_ROLE_GRANT, {
         "email": data["email"], "mode": "single",
         "folder_id": folder_id, "folder_name": folder_name,
-        "folders": data.get("folders", [])   # kept for back navigation
+        "snapshot": snapshot   # kept for back navigation
     })
 
     await safe_edit(callback_query,
@@ -350,12 +351,13 @@ async def toggle_folder(client, callback_query):
         is_now_selected = True
 
     data["selected"] = list(selected)
+    snapshot, folders = await folder_index.resolve(data.get("snapshot"), db)
+    data["snapshot"] = snapshot
     await db.set_state(user_id, WAITING_MULTISELECT_GRANT, data)
 
-    folders = data["folders"]
     per_page = 15
-    folder_index = next((i for i, f in enumerate(folders) if f["id"] == folder_id), 0)
-    current_page = (folder_index // per_page) + 1
+    idx = next((i for i, f in enumerate(folders) if f["id"] == folder_id), 0)
+    current_page = (idx // per_page) + 1
 
     keyboard = create_checkbox_keyboard(folders, selected, page=current_page, per_page=per_page)
     try:
@@ -380,8 +382,9 @@ async def multi_folder_page(client, callback_query):
         await callback_query.answer("Session expired.", show_alert=True)
         return
 
+    _, folders = await folder_index.resolve(data.get("snapshot"), db)
     keyboard = create_checkbox_keyboard(
-        data["folders"], set(data.get("selected", [])), page=page
+        folders, set(data.get("selected", [])), page=page
     )
     try:
         await callback_query.edit_message_reply_markup(reply_markup=keyboard)
@@ -400,20 +403,17 @@ async def multi_folder_refresh(client, callback_query):
         return
 
     await callback_query.answer("🔄 Refreshing...")
-    await db.clear_folder_cache()
-    drive_service._mem_folders = []
 
-    folders = await drive_service.get_folders_cached(db, force_refresh=True)
+    snapshot, folders = await folder_index.load(db, force_refresh=True)
     if not folders:
         await callback_query.answer("❌ No folders found.", show_alert=True)
         return
 
-    folders = sort_folders(folders)
     selected = set(data.get("selected", []))
     valid_ids = {f["id"] for f in folders}
     selected = selected & valid_ids
 
-    data["folders"]  = folders
+    data["snapshot"] = snapshot
     data["selected"] = list(selected)
     await db.set_state(user_id, WAITING_MULTISELECT_GRANT, data)
 
@@ -436,12 +436,12 @@ async def multi_back_to_checkbox(client, callback_query):
         await callback_query.answer("Session expired.", show_alert=True)
         return
 
-    folders  = data.get("all_folders", [])
+    snapshot, folders = await folder_index.resolve(data.get("snapshot"), db)
     selected = set(data.get("selected", []))
 
     await db.set_state(user_id, WAITING_MULTISELECT_GRANT, {
         "email":    data["email"],
-        "folders":  folders,
+        "snapshot": snapshot,
         "selected": list(selected),
         "mode":     "multi"
     })
@@ -469,11 +469,14 @@ async def confirm_multi_folders(client, callback_query):
         await callback_query.answer("⚠️ Select at least one folder!", show_alert=True)
         return
 
-    selected_folders = sort_folders([f for f in data["folders"] if f["id"] in selected_ids])
+    snapshot, folders = await folder_index.resolve(data.get("snapshot"), db)
+    selected_folders = [
+        {"id": f["id"], "name": f["name"]} for f in folders if f["id"] in selected_ids
+    ]
     await db.set_state(user_id, WAITING_ROLE_GRANT, {
         "email": data["email"], "mode": "multi",
         "folders_selected": selected_folders,
-        "all_folders": data["folders"],       # kept for back navigation
+        "snapshot": snapshot,                 # kept for back navigation
         "selected": list(selected_ids),       # kept for back navigation
     })
 
@@ -767,13 +770,50 @@ async def execute_grant(client, callback_query):
 
     mode = data.get("mode", "single")
     if mode == "multi":
-        await _execute_multi_grant(client, callback_query, user_id, data)
+        await _enqueue_grant_job(callback_query, "multi_grant", data,
+                                 f"Granting access to {len(data.get('folders_selected', []))} folders")
     else:
         await _execute_single_grant(client, callback_query, user_id, data)
 
     await db.delete_state(user_id)
 
 
+async def _enqueue_grant_job(callback_query, job_type, data, label):
+    """Hand a multi-item grant to the job queue; the worker edits this message."""
+    message = callback_query.message
+    _, created = await job_queue.enqueue(
+        job_type,
+        {"user_id": callback_query.from_user.id,
+         "admin_name": callback_query.from_user.first_name,
+         "data": data},
+        chat_id=message.chat.id, message_id=message.id,
+        idempotency_key=f"{job_type}:{message.chat.id}:{message.id}"
+    )
+    if not created:
+        await callback_query.answer("⏳ Already queued — this message will update.", show_alert=True)
+        return
+    await safe_edit(callback_query, f"⏳ **{label}...**\n📬 Queued — this message will update.")
+
+
+@job_queue.handler("multi_grant")
+async def run_multi_grant_job(app, job, message):
+    p = job["payload"]
+    await _execute_multi_grant(app, message, p["user_id"], p["admin_name"], p["data"])
+
+
+@job_queue.handler("bulk_grant")
+async def run_bulk_grant_job(app, job, message):
+    p = job["payload"]
+    data = p["data"]
+    # A retried or restart-interrupted job may have granted part of the list
+    # already — check Drive every time so nobody is re-granted (and re-notified)
+    drive_service.set_admin_user(p["user_id"])
+    permission_index.invalidate(data["folder_id"])
+    access = await drive_service.get_access_map(data["folder_id"], db)
+    data["new_emails"] = [e for e in data.get("new_emails", []) if e.lower() not in access]
+    await _execute_bulk_grant(app, message, p["user_id"], p["admin_name"], data)
+
+
 # ─── Single Grant Executor ────────────────────────────────────
 
 async def _execute_single_grant(client, callback_query, user_id, data):
@@ -804,17 +844,14 @@ async def _execute_single_grant(client, callback_query, user_id, data):
 
     # 2. Drive API double-check (avoids Drive-level duplicates)
     try:
-        existing_perms = await drive_service.get_permissions(folder_id, db)
-        existing = next(
-            (p for p in existing_perms if p.get('emailAddress', '').lower() == email.lower()),
-            None
-        )
+        access   = await drive_service.get_access_map(folder_id, db)
+        existing = access.get(email.lower())
         if existing:
             await safe_edit(callback_query,
                 f"⚠️ **User Already Has Access on Drive**\n\n"
                 f"📧 `{email}`\n"
                 f"📂 `{folder_name}`\n"
-                f"🔑 Current Role: **{existing.get('role', 'unknown')}**\n\n"
+                f"🔑 Current Role: **{existing[1] or 'unknown'}**\n\n"
                 f"No changes made.",
                 reply_markup=InlineKeyboardMarkup([
                     [InlineKeyboardButton("➕ Grant Another", callback_data="grant_menu", style=ButtonStyle.SUCCESS),
@@ -833,7 +870,8 @@ async def _execute_single_grant(client, callback_query, user_id, data):
         await db.add_timed_grant(
             admin_id=user_id, email=email,
             folder_id=folder_id, folder_name=folder_name,
-            role=role, duration_hours=duration_hours
+            role=role, duration_hours=duration_hours,
+            permission_id=success.get("id")
         )
         await db.log_action(
             admin_id=user_id,
@@ -877,7 +915,7 @@ async def _execute_single_grant(client, callback_query, user_id, data):
 
 # ─── Multi-Folder Grant Executor ─────────────────────────────
 
-async def _execute_multi_grant(client, callback_query, user_id, data):
+async def _execute_multi_grant(client, target, user_id, admin_name, data):
     folders        = data.get("folders_selected", [])
     email          = data["email"]
     role           = data["role"]
@@ -885,50 +923,70 @@ async def _execute_multi_grant(client, callback_query, user_id, data):
     dur_text       = format_duration(duration_hours)
 
     drive_service.set_admin_user(user_id)
-    await safe_edit(callback_query,
+    await safe_edit(target,
         f"⏳ **Granting access to {len(folders)} folders...**"
     )
 
-    results = []
-    for folder in folders:
-        try:
-            existing_perms = await drive_service.get_permissions(folder["id"], db)
-            existing = next(
-                (p for p in existing_perms if p.get('emailAddress', '').lower() == email.lower()),
-                None
-            )
-            if existing:
-                results.append(f"⚠️ {folder['name']} — already has access")
-                continue
-
-            success = await drive_service.grant_access(folder["id"], email, role, db)
-            if success:
-                await db.add_timed_grant(
-                    admin_id=user_id, email=email,
-                    folder_id=folder["id"], folder_name=folder["name"],
-                    role=role, duration_hours=duration_hours
-                )
-                await db.log_action(
-                    admin_id=user_id,
-                    admin_name=callback_query.from_user.first_name,
-                    action="grant",
-                    details={
-                        "email": email, "folder_id": folder["id"],
-                        "folder_name": folder["name"], "role": role,
-                        "duration_hours": duration_hours, "mode": "multi_folder"
-                    }
-                )
-                await broadcast(client, "grant", {
-                    "email": email, "folder_name": folder["name"],
-                    "role": role, "duration": dur_text,
-                    "admin_name": callback_query.from_user.first_name
-                })
-                results.append(f"✅ {folder['name']}")
+    results    = [None] * len(folders)
+    to_grant   = []
+
+    async with ProgressTicker(target, "Checking existing access", len(folders)) as progress:
+        # Permission checks fan out concurrently, bounded by DriveService's concurrency limit
+        async def _has_access(folder):
+            try:
+                return await drive_service.has_access(folder["id"], email, db)
+            finally:
+                progress.advance()
+
+        checks = await asyncio.gather(*(_has_access(f) for f in folders), return_exceptions=True)
+
+        for i, (folder, check) in enumerate(zip(folders, checks)):
+            if isinstance(check, Exception):
+                LOGGER.error(f"Multi-grant error for {email} → {folder['name']}: {check}")
+                results[i] = f"❌ {folder['name']} — error"
+            elif check:
+                results[i] = f"⚠️ {folder['name']} — already has access"
             else:
-                results.append(f"❌ {folder['name']} — failed")
-        except Exception as e:
-            LOGGER.error(f"Multi-grant error for {email} → {folder['name']}: {e}")
-            results.append(f"❌ {folder['name']} — error")
+                to_grant.append({"folder_id": folder["id"], "folder_name": folder["name"],
+                                 "email": email, "index": i})
+
+        progress.label, progress.done, progress.total = "Granting", 0, len(to_grant)
+        granted_rows = await drive_service.batch_grant(to_grant, role, db, on_progress=progress.advance)
+
+    new_grants, log_entries = [], []
+    for res in granted_rows:
+        if not res["ok"]:
+            LOGGER.error(f"Multi-grant failed for {email} → {res['folder_name']}: {res['error']}")
+            results[res["index"]] = f"❌ {res['folder_name']} — failed"
+            continue
+        results[res["index"]] = f"✅ {res['folder_name']}"
+        new_grants.append({
+            "admin_id": user_id, "email": email,
+            "folder_id": res["folder_id"], "folder_name": res["folder_name"],
+            "role": role, "duration_hours": duration_hours,
+            "permission_id": res["permission_id"]
+        })
+        log_entries.append({
+            "admin_id": user_id, "admin_name": admin_name, "action": "grant",
+            "details": {
+                "email": email, "folder_id": res["folder_id"],
+                "folder_name": res["folder_name"], "role": role,
+                "duration_hours": duration_hours, "mode": "multi_folder"
+            }
+        })
+
+    # DB writes go out in one round trip each once Drive work is done
+    try:
+        await db.add_timed_grants(new_grants)
+        await db.log_actions(log_entries)
+    except Exception as e:
+        LOGGER.error(f"Multi-grant bookkeeping error for {email}: {e}")
+    for g in new_grants:
+        await broadcast(client, "grant", {
+            "email": email, "folder_name": g["folder_name"],
+            "role": role, "duration": dur_text,
+            "admin_name": admin_name
+        })
 
     granted = sum(1 for r in results if r.startswith("✅"))
     now = time.time()
@@ -936,7 +994,7 @@ async def _execute_multi_grant(client, callback_query, user_id, data):
     if duration_hours > 0:
         expiry_line = f"📅 Expires: {format_date(now + duration_hours * 3600)}\n"
 
-    await safe_edit(callback_query,
+    await safe_edit(target,
         f"{'✅' if granted > 0 else '❌'} **Multi-Folder Grant Complete!**\n\n"
         f"📧 `{email}` | 🔑 {role.capitalize()} | ⏳ {dur_text}\n"
         f"{expiry_line}\n"
@@ -1009,15 +1067,14 @@ async def receive_multi_emails(client, message):
 
     msg = await message.reply_text("📂 Loading folders...")
 
-    folders = await drive_service.get_folders_cached(db)
+    snapshot, folders = await folder_index.load(db)
     if not folders:
         await safe_edit(msg, "❌ No folders found.")
         await db.delete_state(user_id)
         return
 
-    folders = sort_folders(folders)
     await db.set_state(user_id, WAITING_MULTI_EMAIL_FOLDER, {
-        "emails": valid, "folders": folders, "mode": "bulk"
+        "emails": valid, "snapshot": snapshot, "mode": "bulk"
     })
 
     invalid_text = f"\n\n⚠️ Skipped invalid: `{', '.join(invalid)}`" if invalid else ""
@@ -1046,8 +1103,9 @@ async def bulk_folder_pagination(client, callback_query):
     if state != WAITING_MULTI_EMAIL_FOLDER:
         return
 
+    _, folders = await folder_index.resolve(data.get("snapshot"), db)
     keyboard = create_pagination_keyboard(
-        items=data["folders"], page=page, per_page=20,
+        items=folders, page=page, per_page=20,
         callback_prefix="bulk_folder_page",
         item_callback_func=lambda f: (f['name'], f"bulk_sel_{f['id']}"),
         back_callback_data="grant_menu"
@@ -1067,7 +1125,8 @@ async def bulk_select_folder(client, callback_query):
     if state != WAITING_MULTI_EMAIL_FOLDER:
         return
 
-    folder_name = next((f['name'] for f in data.get("folders", []) if f['id'] == folder_id), "Unknown")
+    snapshot, _ = await folder_index.resolve(data.get("snapshot"), db)
+    folder_name = folder_index.folder_name(snapshot, folder_id)
     data["folder_id"]   = folder_id
     data["folder_name"] = folder_name
     await db.set_state(user_id, WAITING_MULTI_EMAIL_ROLE, data)
@@ -1226,8 +1285,7 @@ async def _bulk_duplicate_check(update, user_id, data):
     emails    = data["emails"]
     folder_id = data["folder_id"]
 
-    existing_perms  = await drive_service.get_permissions(folder_id, db)
-    existing_emails = {p.get('emailAddress', '').lower() for p in existing_perms if p.get('emailAddress')}
+    existing_emails = set(await drive_service.get_access_map(folder_id, db))
 
     duplicates = [e for e in emails if e in existing_emails]
     new_emails = [e for e in emails if e not in existing_emails]
@@ -1288,6 +1346,12 @@ async def execute_bulk_grant(client, callback_query):
     if state != WAITING_MULTI_EMAIL_CONFIRM:
         return
 
+    await _enqueue_grant_job(callback_query, "bulk_grant", data,
+                             f"Granting access to {len(data.get('new_emails', []))} user(s)")
+    await db.delete_state(user_id)
+
+
+async def _execute_bulk_grant(client, target, user_id, admin_name, data):
     new_emails     = data.get("new_emails", [])
     folder_id      = data["folder_id"]
     folder_name    = data["folder_name"]
@@ -1295,43 +1359,53 @@ async def execute_bulk_grant(client, callback_query):
     duration_hours = data.get("duration_hours", 0)
     dur_text       = format_duration(duration_hours)
 
-    await safe_edit(callback_query,
+    await safe_edit(target,
         f"⏳ **Granting access to {len(new_emails)} user(s)...**"
     )
 
     drive_service.set_admin_user(user_id)
-    results = []
-
-    for email in new_emails:
-        try:
-            success = await drive_service.grant_access(folder_id, email, role, db)
-            if success:
-                await db.add_timed_grant(
-                    admin_id=user_id, email=email,
-                    folder_id=folder_id, folder_name=folder_name,
-                    role=role, duration_hours=duration_hours
-                )
-                await db.log_action(
-                    admin_id=user_id,
-                    admin_name=callback_query.from_user.first_name,
-                    action="grant",
-                    details={
-                        "email": email, "folder_id": folder_id,
-                        "folder_name": folder_name, "role": role,
-                        "duration_hours": duration_hours, "mode": "multi_email"
-                    }
-                )
-                await broadcast(client, "grant", {
-                    "email": email, "folder_name": folder_name,
-                    "role": role, "duration": dur_text,
-                    "admin_name": callback_query.from_user.first_name
-                })
-                results.append(f"✅ {email}")
-            else:
-                results.append(f"❌ {email} — failed")
-        except Exception as e:
-            LOGGER.error(f"Batch grant error for {email}: {e}")
-            results.append(f"❌ {email} — error")
+    results    = []
+
+    async with ProgressTicker(target, "Granting", len(new_emails)) as progress:
+        granted_rows = await drive_service.batch_grant(
+            [{"folder_id": folder_id, "email": email} for email in new_emails],
+            role, db, on_progress=progress.advance
+        )
+
+    new_grants, log_entries = [], []
+    for res in granted_rows:
+        email = res["email"]
+        if not res["ok"]:
+            LOGGER.error(f"Batch grant error for {email}: {res['error']}")
+            results.append(f"❌ {email} — failed")
+            continue
+        results.append(f"✅ {email}")
+        new_grants.append({
+            "admin_id": user_id, "email": email,
+            "folder_id": folder_id, "folder_name": folder_name,
+            "role": role, "duration_hours": duration_hours,
+            "permission_id": res["permission_id"]
+        })
+        log_entries.append({
+            "admin_id": user_id, "admin_name": admin_name, "action": "grant",
+            "details": {
+                "email": email, "folder_id": folder_id,
+                "folder_name": folder_name, "role": role,
+                "duration_hours": duration_hours, "mode": "multi_email"
+            }
+        })
+
+    try:
+        await db.add_timed_grants(new_grants)
+        await db.log_actions(log_entries)
+    except Exception as e:
+        LOGGER.error(f"Batch grant bookkeeping error for {folder_name}: {e}")
+    for g in new_grants:
+        await broadcast(client, "grant", {
+            "email": g["email"], "folder_name": folder_name,
+            "role": role, "duration": dur_text,
+            "admin_name": admin_name
+        })
 
     granted  = sum(1 for r in results if r.startswith("✅"))
     skipped  = len(data.get("duplicates", []))
@@ -1340,7 +1414,7 @@ async def execute_bulk_grant(client, callback_query):
     if duration_hours > 0:
         expiry_line = f"📅 Expires: {format_date(now + duration_hours * 3600)}\n"
 
-    await safe_edit(callback_query,
+    await safe_edit(target,
         f"{'✅' if granted > 0 else '❌'} **Batch Grant Complete!**\n\n"
         f"📂 `{folder_name}` | 🔑 {role.capitalize()} | ⏳ {dur_text}\n"
         f"{expiry_line}\n"
@@ -1353,7 +1427,6 @@ async def execute_bulk_grant(client, callback_query):
              InlineKeyboardButton("🏠 Main Menu",    callback_data="main_menu",   style=ButtonStyle.PRIMARY)]
         ])
     )
-    await db.delete_state(user_id)
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -76,10 +76,11 @@ async def show_info_dashboard(client, update):
     
     # Database stats
     try:
-        # Count documents
-        total_grants = await db.grants.count_documents({})
-        active_grants = await db.grants.count_documents({'status': 'active'})
-        total_logs = await db.logs.count_documents({})
+        # Materialised counters (shared dashboard snapshot)
+        snapshot = await db.get_dashboard_stats()
+        total_grants = snapshot["grants"]["total"]
+        active_grants = snapshot["grants"]["active"]
+        total_logs = snapshot["activity"]["total"]
         cached_folders = await db.cache.count_documents({})
         
         # Check database connection
@@ -107,6 +108,13 @@ async def show_info_dashboard(client, update):
                 drive_status = "⚠️ Use /auth to connect"
     except Exception as e:
         drive_status = f"❌ Error: {str(e)[:30]}"
+
+    from services.drive import get_service_cache_stats
+    svc_stats = get_service_cache_stats()
+    drive_cache = (
+        f"{svc_stats['hits']} hits / {svc_stats['misses']} misses "
+        f"({svc_stats['hit_rate'] * 100:.0f}%)"
+    )
     
     # Telegram connection status
     telegram_status = "✅ Connected" if me else "❌ Disconnected"
@@ -141,6 +149,7 @@ async def show_info_dashboard(client, update):
 
 🗄️ **Database:** {db_status}
 📂 **Google Drive:** {drive_status}
+🧩 **Drive Client Cache:** {drive_cache}
 📢 **Telegram:** {telegram_status}
 
 
@@ -243,7 +252,8 @@ async def info_logs_callback(client: Client, callback_query):
         # So we can't read from a file unless we know where it is.
         # But we can read from DB logs!
         
-        recent_logs, total = await db.get_logs(limit=10)
+        recent_logs, _ = await db.get_logs(limit=10)
+        total = (await db.get_dashboard_stats())["activity"]["total"]
         
         log_lines = []
         for log in recent_logs:
@@ -8,6 +8,7 @@ from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from services.database import db
 from utils.filters import is_admin
 from utils.time import safe_edit, IST
+from utils.pagination import page_cursor, record_next_cursor
 
 LOGGER = logging.getLogger(__name__)
 
@@ -22,51 +23,52 @@ TYPE_ICONS = {
     "extend":      "🔄",
 }
 
+LOGS_PER_PAGE = 5
+
+EMPTY_LOGS_TEXT = "📊 **Access Logs**\n\nNo activity recorded yet."
+EMPTY_LOGS_MARKUP = InlineKeyboardMarkup([[
+    InlineKeyboardButton("🏠 Back", callback_data="main_menu", style=ButtonStyle.PRIMARY)
+]])
+
 # /logs COMMAND  +  logs_menu CALLBACK
+# State keeps only the keyset cursor trail and the total (counted once
+# per session), never the log documents themselves.
 
 @Client.on_message(filters.command("logs") & filters.private & is_admin)
 async def logs_command(client, message):
     """Entry point via /logs command."""
-    logs, total = await db.get_logs(limit=50)
-
-    if not logs:
-        await message.reply_text(
-            "📊 **Access Logs**\n\nNo activity recorded yet.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 Back", callback_data="main_menu", style=ButtonStyle.PRIMARY)
-            ]])
-        )
+    total = await db.count_logs()
+
+    if not total:
+        await message.reply_text(EMPTY_LOGS_TEXT, reply_markup=EMPTY_LOGS_MARKUP)
         return
 
-    await db.set_state(message.from_user.id, "VIEWING_LOGS", {"logs": logs})
+    data = {"cursors": [None], "total": total}
     msg = await message.reply_text("📊 Loading logs...")
-    await _show_logs_page(msg, logs, 1, is_message=True)
+    await _show_logs_page(msg, message.from_user.id, data, 1, is_message=True)
 
 
 @Client.on_callback_query(filters.regex("^logs_menu$") & is_admin)
 async def view_logs(client, callback_query):
     """Entry point via inline button."""
-    logs, total = await db.get_logs(limit=50)
-
-    if not logs:
-        await safe_edit(callback_query,
-            "📊 **Access Logs**\n\nNo activity recorded yet.",
-            reply_markup=InlineKeyboardMarkup([[
-                InlineKeyboardButton("🏠 Back", callback_data="main_menu", style=ButtonStyle.PRIMARY)
-            ]])
-        )
+    total = await db.count_logs()
+
+    if not total:
+        await safe_edit(callback_query, EMPTY_LOGS_TEXT, reply_markup=EMPTY_LOGS_MARKUP)
         return
 
-    await db.set_state(callback_query.from_user.id, "VIEWING_LOGS", {"logs": logs})
-    await _show_logs_page(callback_query, logs, 1)
+    data = {"cursors": [None], "total": total}
+    await _show_logs_page(callback_query, callback_query.from_user.id, data, 1)
 
 # Shared Page Renderer
 
-async def _show_logs_page(target, logs, page, is_message=False):
-    per_page    = 5
-    start       = (page - 1) * per_page
-    total_pages = (len(logs) + per_page - 1) // per_page
-    current     = logs[start:start + per_page]
+async def _show_logs_page(target, user_id, data, page, is_message=False):
+    cursors     = data["cursors"]
+    current, next_cursor = await db.get_logs(limit=LOGS_PER_PAGE, after=page_cursor(cursors, page))
+    record_next_cursor(cursors, page, next_cursor)
+    await db.set_state(user_id, "VIEWING_LOGS", data)
+
+    total_pages = max(page, (data["total"] + LOGS_PER_PAGE - 1) // LOGS_PER_PAGE)
 
     text = f"📊 **Activity Logs (Page {page}/{total_pages})**\n\n"
 
@@ -85,7 +87,7 @@ async def _show_logs_page(target, logs, page, is_message=False):
     nav = []
     if page > 1:
         nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"log_page_{page - 1}", style=ButtonStyle.PRIMARY))
-    if page < total_pages:
+    if next_cursor is not None:
         nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"log_page_{page + 1}", style=ButtonStyle.PRIMARY))
 
     keyboard = [nav] if nav else []
@@ -110,10 +112,10 @@ async def logs_pagination(client, callback_query):
     user_id = callback_query.from_user.id
     state, data = await db.get_state(user_id)
 
-    if state != "VIEWING_LOGS":
+    if state != "VIEWING_LOGS" or page > len(data.get("cursors", [])):
         return
 
-    await _show_logs_page(callback_query, data["logs"], page)
+    await _show_logs_page(callback_query, user_id, data, page)
 
 
 @Client.on_callback_query(filters.regex("^clear_logs$") & is_admin)
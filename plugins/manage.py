@@ -7,10 +7,12 @@ from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from services.database import db
 from services.drive import drive_service
+from services.folder_index import folder_index
+from services.job_queue import job_queue
 from services.broadcast import broadcast
 from utils.states import WAITING_FOLDER_MANAGE, WAITING_USER_MANAGE, WAITING_ACTION_MANAGE
 from utils.time import safe_edit, format_timestamp, format_time_remaining
-from utils.pagination import create_pagination_keyboard, sort_folders, natural_sort_key
+from utils.pagination import create_pagination_keyboard, natural_sort_key
 from plugins.grant import build_az_group_keyboard, filter_folders_by_group
 from utils.filters import is_admin
 
@@ -29,7 +31,7 @@ async def manage_command(client, message):
 
     msg = await message.reply_text("📂 Loading folders...")
 
-    folders = await drive_service.get_folders_cached(db)
+    snapshot, folders = await folder_index.load(db)
     if not folders:
         await safe_edit(msg, "❌ No folders found.",
             reply_markup=InlineKeyboardMarkup([[
@@ -37,8 +39,7 @@ async def manage_command(client, message):
             ]]))
         return
 
-    folders = sort_folders(folders)
-    await db.set_state(user_id, WAITING_FOLDER_MANAGE, {"folders": folders})
+    await db.set_state(user_id, WAITING_FOLDER_MANAGE, {"snapshot": snapshot})
 
     keyboard = build_az_group_keyboard(folders, back_cb="main_menu", context="manage")
     await safe_edit(msg,
@@ -56,7 +57,7 @@ async def list_manage_folders(client, callback_query):
     # FIX: safe_edit(callback_query, ...) — not callback_query.message
     await safe_edit(callback_query, "📂 Loading folders...")
 
-    folders = await drive_service.get_folders_cached(db)
+    snapshot, folders = await folder_index.load(db)
     if not folders:
         await safe_edit(callback_query, "❌ No folders found.",
             reply_markup=InlineKeyboardMarkup([[
@@ -64,8 +65,7 @@ async def list_manage_folders(client, callback_query):
             ]]))
         return
 
-    folders = sort_folders(folders)
-    await db.set_state(user_id, WAITING_FOLDER_MANAGE, {"folders": folders})
+    await db.set_state(user_id, WAITING_FOLDER_MANAGE, {"snapshot": snapshot})
 
     keyboard = build_az_group_keyboard(folders, back_cb="main_menu", context="manage")
     await safe_edit(callback_query,
@@ -86,11 +86,12 @@ async def manage_az_folder_list(client, callback_query):
     user_id = callback_query.from_user.id
     state, data = await db.get_state(user_id)
 
-    if state != WAITING_FOLDER_MANAGE or "folders" not in data:
+    if state != WAITING_FOLDER_MANAGE or "snapshot" not in data:
         await callback_query.answer("Session expired. Please /manage again.", show_alert=True)
         return
 
-    filtered = filter_folders_by_group(data["folders"], group)
+    _, folders = await folder_index.resolve(data["snapshot"], db)
+    filtered = filter_folders_by_group(folders, group)
     keyboard = create_pagination_keyboard(
         items=filtered, page=page, per_page=15,
         callback_prefix=f"manage_az_{group}",
@@ -108,10 +109,11 @@ async def manage_az_folder_list(client, callback_query):
 async def manage_back_to_az(client, callback_query):
     user_id = callback_query.from_user.id
     state, data = await db.get_state(user_id)
-    if state != WAITING_FOLDER_MANAGE or "folders" not in data:
+    if state != WAITING_FOLDER_MANAGE or "snapshot" not in data:
         await callback_query.answer("Session expired.", show_alert=True)
         return
-    keyboard = build_az_group_keyboard(data["folders"], back_cb="main_menu", context="manage")
+    _, folders = await folder_index.resolve(data["snapshot"], db)
+    keyboard = build_az_group_keyboard(folders, back_cb="main_menu", context="manage")
     await safe_edit(callback_query,
         "📂 **Select a Folder to Manage:**\nChoose a letter/number group:",
         reply_markup=keyboard
@@ -122,16 +124,13 @@ async def manage_back_to_az(client, callback_query):
 async def manage_refresh(client, callback_query):
     user_id = callback_query.from_user.id
     await callback_query.answer("🔄 Refreshing...")
-    await db.clear_folder_cache()
-    drive_service._mem_folders = []  # clear RAM cache too
 
-    folders = await drive_service.get_folders_cached(db, force_refresh=True)
+    snapshot, folders = await folder_index.load(db, force_refresh=True)
     if not folders:
         await safe_edit(callback_query, "❌ No folders found.")
         return
 
-    folders = sort_folders(folders)
-    await db.set_state(user_id, WAITING_FOLDER_MANAGE, {"folders": folders})
+    await db.set_state(user_id, WAITING_FOLDER_MANAGE, {"snapshot": snapshot})
 
     keyboard = build_az_group_keyboard(folders, back_cb="main_menu", context="manage")
     await safe_edit(callback_query,
@@ -150,9 +149,8 @@ async def list_folder_users(client, callback_query):
     user_id = callback_query.from_user.id
     state, data = await db.get_state(user_id)
 
-    folder_name = next(
-        (f["name"] for f in data.get("folders", []) if f["id"] == folder_id), "Unknown"
-    )
+    snapshot, _ = await folder_index.resolve((data or {}).get("snapshot"), db)
+    folder_name = folder_index.folder_name(snapshot, folder_id)
 
     # FIX: safe_edit(callback_query, ...) — not callback_query.message
     await safe_edit(callback_query, f"👥 Fetching users for **{folder_name}**...")
@@ -333,10 +331,7 @@ async def execute_role_change(client, callback_query):
 
     if success:
         # Sync role in DB timed grants
-        active = await db.get_active_grants()
-        for g in active:
-            if g["email"].lower() == email.lower() and g["folder_id"] == folder_id:
-                await db.grants.update_one({"_id": g["_id"]}, {"$set": {"role": new_role}})
+        await db.update_grant_role(email, folder_id, new_role)
 
         await db.log_action(user_id, callback_query.from_user.first_name, "role_change",
                             {"email": email, "folder_name": data["folder_name"], "new_role": new_role})
@@ -388,7 +383,9 @@ async def execute_remove(client, callback_query):
     # FIX: safe_edit(callback_query, ...) — not callback_query.message
     await safe_edit(callback_query, "⏳ Removing access...")
     drive_service.set_admin_user(user_id)
-    success = await drive_service.remove_access(folder_id, email, db)
+    success = await drive_service.remove_access(
+        folder_id, email, db, permission_id=data["selected_user"].get("id")
+    )
 
     if success:
         active = await db.get_active_grants()
@@ -458,37 +455,65 @@ async def man_revoke_all_execute(client, callback_query):
         await callback_query.answer("Session expired.", show_alert=True)
         return
 
-    folder_id   = data["folder_id"]
-    folder_name = data["folder_name"]
-    targets     = data.get("revoke_targets", [])
+    targets = data.get("revoke_targets", [])
+    message = callback_query.message
+    _, created = await job_queue.enqueue(
+        "folder_revoke_all",
+        {"user_id": user_id, "admin_name": callback_query.from_user.first_name,
+         "folder_id": data["folder_id"], "folder_name": data["folder_name"], "targets": targets},
+        chat_id=message.chat.id, message_id=message.id,
+        idempotency_key=f"folder_revoke_all:{message.chat.id}:{message.id}"
+    )
+    if not created:
+        await callback_query.answer("⏳ Already queued — this message will update.", show_alert=True)
+        return
+    await safe_edit(callback_query,
+        f"⏳ Revoking access for {len(targets)} user(s)...\n📬 Queued — this message will update."
+    )
+    await db.delete_state(user_id)
+
+
+@job_queue.handler("folder_revoke_all")
+async def run_folder_revoke_all_job(client, job, target):
+    p           = job["payload"]
+    user_id     = p["user_id"]
+    admin_name  = p["admin_name"]
+    folder_id   = p["folder_id"]
+    folder_name = p["folder_name"]
+    targets     = p["targets"]
 
-    await safe_edit(callback_query, f"⏳ Revoking access for {len(targets)} user(s)...")
+    await safe_edit(target, f"⏳ Revoking access for {len(targets)} user(s)...")
 
     drive_service.set_admin_user(user_id)
     success_count = 0
     fail_count    = 0
 
-    for u in targets:
-        email = u.get("emailAddress", "")
-        if not email:
+    items = [
+        {"folder_id": folder_id, "email": u["emailAddress"], "permission_id": u.get("id")}
+        for u in targets if u.get("emailAddress")
+    ]
+    removed = await drive_service.batch_remove(items, db)
+
+    grants_by_email = {}
+    for g in await db.get_grants_by_folder(folder_id):
+        grants_by_email.setdefault(g["email"].lower(), []).append(g)
+
+    for res in removed:
+        email = res["email"]
+        if not res["ok"]:
+            LOGGER.error(f"Revoke all error ({email}): {res['error']}")
+            fail_count += 1
             continue
+        success_count += 1
         try:
-            ok = await drive_service.remove_access(folder_id, email, db)
-            if ok:
-                success_count += 1
-                active = await db.get_active_grants()
-                for g in active:
-                    if g["email"].lower() == email.lower() and g["folder_id"] == folder_id:
-                        await db.revoke_grant(g["_id"])
-            else:
-                fail_count += 1
+            for g in grants_by_email.get(email.lower(), []):
+                await db.revoke_grant(g["_id"])
         except Exception as e:
-            LOGGER.error(f"Revoke all error ({email}): {e}")
-            fail_count += 1
+            LOGGER.error(f"Revoke all DB error ({email}): {e}")
 
     await db.log_action(
         admin_id=user_id,
-        admin_name=callback_query.from_user.first_name,
+        admin_name=admin_name,
         action="bulk_revoke",
         details={"type": "folder_revoke_all", "folder_name": folder_name,
                  "success": success_count, "failed": fail_count}
@@ -496,11 +521,11 @@ async def man_revoke_all_execute(client, callback_query):
     await broadcast(client, "bulk_revoke", {
         "type": f"folder_revoke_all ({folder_name})",
         "success": success_count, "failed": fail_count,
-        "admin_name": callback_query.from_user.first_name
+        "admin_name": admin_name
     })
 
     revoked_at = format_timestamp(time.time())
-    await safe_edit(callback_query,
+    await safe_edit(target,
         f"✅ **Folder Revoke Complete**\n\n"
         f"📂 {folder_name}\n"
         f"✅ Revoked: **{success_count}**\n"
@@ -511,4 +536,3 @@ async def man_revoke_all_execute(client, callback_query):
             [InlineKeyboardButton("🏠 Main Menu",       callback_data="main_menu",   style=ButtonStyle.PRIMARY)]
         ])
     )
-    await db.delete_state(user_id)
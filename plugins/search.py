@@ -4,9 +4,10 @@ from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from services.database import db
 from services.drive import drive_service
 from services.broadcast import broadcast
+from services.job_queue import job_queue
 from utils.filters import is_admin, check_state
 from utils.validators import validate_email
-from utils.pagination import sort_grants
+from utils.pagination import sort_grants, page_cursor, record_next_cursor
 from utils.time import safe_edit, format_duration, format_time_remaining, format_date
 from utils.states import WAITING_SEARCH_QUERY, WAITING_CONFIRM_REVOKE_ALL, WAITING_SELECT_REVOKE
 import logging
@@ -73,7 +74,8 @@ async def handle_search_input(client, message):
 async def _execute_search(message_or_callback, user_id, query_text=None, page=1):
     # Get state to retrieve filters
     state, data = await db.get_state(user_id)
-    filters_dict = data.get("filters", {}) if data else {}
+    data = data or {}
+    filters_dict = data.get("filters", {})
     
     # Build MongoDB Query
     db_query = {}
@@ -136,8 +138,15 @@ async def _execute_search(message_or_callback, user_id, query_text=None, page=1)
         async def reply_func(text, reply_markup=None):
             await message_or_callback.reply_text(text, reply_markup=reply_markup)
         
-    # Execute DB Search
-    results, total = await db.search_grants(db_query, limit=10, skip=(page-1)*10)
+    # Execute DB Search — keyset paged; total counted once per search
+    cursors = data.get("cursors") or []
+    if page == 1 or page > len(cursors):
+        page = 1
+        cursors = [None]
+        data["total"] = await db.count_grants(db_query)
+    total = data["total"]
+    results, next_cursor = await db.search_grants(db_query, limit=10, after=page_cursor(cursors, page))
+    data["cursors"] = record_next_cursor(cursors, page, next_cursor)
     results = sort_grants(results, key="folder_name")
     
     if not results:
@@ -191,7 +200,7 @@ async def _execute_search(message_or_callback, user_id, query_text=None, page=1)
     nav = []
     if page > 1:
         nav.append(InlineKeyboardButton("⬅️ Prev", callback_data=f"search_page_{page-1}", style=ButtonStyle.PRIMARY))
-    if (page * 10) < total:
+    if next_cursor is not None:
         nav.append(InlineKeyboardButton("Next ➡️", callback_data=f"search_page_{page+1}", style=ButtonStyle.PRIMARY))
     if nav:
         buttons.append(nav)
@@ -203,7 +212,7 @@ async def _execute_search(message_or_callback, user_id, query_text=None, page=1)
             InlineKeyboardButton("🗑 Revoke All", callback_data="revoke_all_confirm", style=ButtonStyle.DANGER)
         ])
         data["grants"] = results
-        await db.set_state(user_id, WAITING_SEARCH_QUERY, data)
+    await db.set_state(user_id, WAITING_SEARCH_QUERY, data)
 
     buttons.append([InlineKeyboardButton("⚙️ Filters", callback_data="adv_filters", style=ButtonStyle.PRIMARY)])
     buttons.append([InlineKeyboardButton("🔍 New Search", callback_data="search_user", style=ButtonStyle.PRIMARY)])
@@ -335,26 +344,53 @@ async def revoke_all_execute(client, callback_query):
         await callback_query.answer("Session expired.", show_alert=True)
         return
     
-    email = data['email']
     targets = data['targets']
+    message = callback_query.message
+    _, created = await job_queue.enqueue(
+        "user_revoke_all",
+        {"user_id": user_id, "admin_name": callback_query.from_user.first_name,
+         "email": data['email'], "targets": targets},
+        chat_id=message.chat.id, message_id=message.id,
+        idempotency_key=f"user_revoke_all:{message.chat.id}:{message.id}"
+    )
+    if not created:
+        await callback_query.answer("⏳ Already queued — this message will update.", show_alert=True)
+        return
+    await safe_edit(callback_query,
+        f"⏳ Revoking access from {len(targets)} folders...\n📬 Queued — this message will update."
+    )
+
+
+@job_queue.handler("user_revoke_all")
+async def run_user_revoke_all_job(client, job, target):
+    p = job["payload"]
+    user_id = p["user_id"]
+    admin_name = p["admin_name"]
+    email = p['email']
+    targets = p['targets']
     
-    await safe_edit(callback_query, f"⏳ Revoking access from {len(targets)} folders...")
+    await safe_edit(target, f"⏳ Revoking access from {len(targets)} folders...")
     
     success_count = 0
     results = []
     
     drive_service.set_admin_user(user_id)
-    for grant in targets:
+    # Revoke from Drive in one batched round trip
+    removed = await drive_service.batch_remove(
+        [{"folder_id": g["folder_id"], "email": email, "grant": g,
+          "permission_id": g.get("permission_id")} for g in targets], db
+    )
+    for res in removed:
+        grant = res["grant"]
+        if not res["ok"]:
+            LOGGER.error(f"Revoke all error: {res['error']}")
+            results.append(f"❌ {grant['folder_name']} (failed)")
+            continue
         try:
-            # Revoke from Drive
-            ok = await drive_service.remove_access(grant['folder_id'], email, db)
-            if ok:
-                success_count += 1
-                # Mark DB as revoked
-                await db.revoke_grant(grant["_id"])
-                results.append(f"✅ {grant['folder_name']}")
-            else:
-                results.append(f"❌ {grant['folder_name']} (failed)")
+            success_count += 1
+            # Mark DB as revoked
+            await db.revoke_grant(grant["_id"])
+            results.append(f"✅ {grant['folder_name']}")
         except Exception as e:
             LOGGER.error(f"Revoke all error: {e}")
             results.append(f"❌ {grant['folder_name']} (error)")
@@ -362,7 +398,7 @@ async def revoke_all_execute(client, callback_query):
     # Log & Broadcast
     await db.log_action(
         admin_id=user_id, 
-        admin_name=callback_query.from_user.first_name,
+        admin_name=admin_name,
         action="revoke_all",
         details={"email": email, "folders_removed": success_count, "total_attempted": len(targets)}
     )
@@ -372,14 +408,14 @@ async def revoke_all_execute(client, callback_query):
         "email": email,
         "success": success_count,
         "failed": len(targets) - success_count,
-        "admin_name": callback_query.from_user.first_name
+        "admin_name": admin_name
     })
     
     result_text = "\n".join(results[:10])
     if len(results) > 10:
         result_text += f"\n... +{len(results)-10} more"
         
-    await safe_edit(callback_query, 
+    await safe_edit(target, 
         "✅ **All Access Revoked**\n\n"
         f"`{email}` has been removed from:\n"
         f"{result_text}\n\n"
@@ -590,16 +626,21 @@ async def sr_execute(client, callback_query):
     success, failed = 0, 0
     result_lines = []
 
-    for g in targets:
+    removed = await drive_service.batch_remove(
+        [{"folder_id": g["folder_id"], "email": email, "grant": g,
+          "permission_id": g.get("permission_id")} for g in targets], db
+    )
+    for res in removed:
+        g = res["grant"]
+        if not res["ok"]:
+            LOGGER.error(f"sr_execute error: {res['error']}")
+            result_lines.append(f"❌ {g.get('folder_name', 'Unknown')} (failed)")
+            failed += 1
+            continue
         try:
-            ok = await drive_service.remove_access(g["folder_id"], email, db)
-            if ok:
-                await db.revoke_grant(g["_id"])
-                result_lines.append(f"✅ {g.get('folder_name', 'Unknown')}")
-                success += 1
-            else:
-                result_lines.append(f"❌ {g.get('folder_name', 'Unknown')} (failed)")
-                failed += 1
+            await db.revoke_grant(g["_id"])
+            result_lines.append(f"✅ {g.get('folder_name', 'Unknown')}")
+            success += 1
         except Exception as e:
             LOGGER.error(f"sr_execute error: {e}")
             result_lines.append(f"❌ {g.get('folder_name', 'Unknown')} (error)")
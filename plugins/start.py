@@ -5,7 +5,7 @@ from utils.filters import is_admin
 from utils.time import safe_edit
 from services.database import db
 from config import START_TIME, VERSION
-import time
+import asyncio
 from utils.time import get_uptime
 
 # 🎨 PROFESSIONAL MAIN MENU - Clean & Modern
@@ -130,15 +130,10 @@ async def main_menu_callback(client, callback_query):
 
     # Fetch comprehensive live stats
     try:
-        logs, total_logs = await db.get_logs(limit=1)
-        active_grants = await db.get_active_grants()
-        stats = await db.get_stats()
-
-        # Calculate expiring soon (within 24h)
-        now = time.time()
-        expiring_soon = sum(1 for g in active_grants if g.get('expires_at', 0) - now < 86400)
-
-        active_count = len(active_grants)
+        expiry, stats = await asyncio.gather(db.get_expiry_counts(), db.get_stats())
+        total_logs = stats.get('total', 0)
+        expiring_soon = expiry["within_24h"]
+        active_count = expiry["active"]
 
     except Exception as e:
         import logging
@@ -211,7 +206,8 @@ HELP_TEXT = (
     "`/search` — Quick user search\n"
     "`/cancel` — Cancel current operation\n"
     "`/id` — Show your Telegram ID\n"
-    "`/quickstats` — Quick overview\n\n\n\n"
+    "`/quickstats` — Quick overview\n"
+    "`/rebuildstats` — Recompute stats counters\n\n\n\n"
     "**💎 PRO TIPS**\n\n"
     "• Set expiry times for temporary access\n"
     "• Enable broadcasts for team visibility\n"
@@ -270,11 +266,8 @@ async def noop_callback(client, callback_query):
 async def quick_stats_command(client, message):
     """Show quick stats in a compact, professional format"""
     try:
-        stats = await db.get_stats()
-        active_grants = await db.get_active_grants()
-
-        now = time.time()
-        expiring_today = sum(1 for g in active_grants if 0 < g.get('expires_at', 0) - now < 86400)
+        stats, expiry = await asyncio.gather(db.get_stats(), db.get_expiry_counts())
+        expiring_today = expiry["within_24h"]
 
         text = (
             "**⚡ QUICK STATISTICS**\n\n\n"
@@ -284,8 +277,9 @@ async def quick_stats_command(client, message):
             f"• **This Month:** {stats.get('month', 0)} actions\n"
             f"• **All Time:** {stats.get('total', 0)} actions\n\n"
             "**⏰ Grant Status**\n"
-            f"• **Active Grants:** {stats.get('active_grants', 0)}\n"
-            f"• **Expiring Today:** {expiring_today}\n\n"
+            f"• **Active Grants:** {expiry['active']}\n"
+            f"• **Expiring Today:** {expiring_today}\n"
+            f"• **Expiring This Week:** {expiry['within_7d']}\n\n"
             "**🏆 Top Performers**\n"
             f"• **Top Folder:** {stats.get('top_folder', 'N/A')}\n"
             f"• **Top Admin:** {stats.get('top_admin', 'N/A')}\n\n"
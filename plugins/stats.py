@@ -26,6 +26,18 @@ async def stats_command(client: Client, message):
     await show_stats_dashboard(client, message)
 
 
+@Client.on_message(filters.command("rebuildstats") & filters.private & is_admin)
+async def rebuild_stats_command(client: Client, message):
+    """Recompute the materialised dashboard counters from grants/logs history"""
+    status = await message.reply_text("⏳ Rebuilding stats counters from history...")
+    try:
+        await db.rebuild_counters()
+        await status.edit_text("✅ **Stats counters rebuilt.**\n\nUse /stats to view the dashboard.")
+    except Exception as e:
+        LOGGER.error(f"Stats rebuild error: {e}", exc_info=True)
+        await status.edit_text(f"❌ **Rebuild failed:**\n`{str(e)[:200]}`")
+
+
 @Client.on_callback_query(filters.regex("^stats_menu$" ) & is_admin)
 async def stats_menu_callback(client: Client, callback_query: CallbackQuery):
     """Handle stats_menu callback from main menu"""
@@ -44,91 +56,40 @@ async def show_stats_dashboard(client, update):
     - Expiring grants
     """
     
-    # db is already initialized in main, so we use the instance
-    
-    # Get current time periods
     now = datetime.now(IST)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_start = now - timedelta(days=7)
-    month_start = now - timedelta(days=30)
     
     try:
+        # One cached snapshot (grants + logs $facet pipelines) feeds every counter
+        
+        snapshot = await db.get_dashboard_stats()
+        grants = snapshot["grants"]
+        activity = snapshot["activity"]
+        
         # BASIC STATISTICS
         
         total_admins = len(config.ADMIN_IDS)
-        total_grants = await db.grants.count_documents({})
-        active_grants = await db.grants.count_documents({'status': 'active'})
-        expired_grants = await db.grants.count_documents({'status': 'revoked'})
-        
-        # Expiring soon (within 24 hours)
-        tomorrow = now + timedelta(hours=24)
-        expiring_soon = await db.grants.count_documents({
-            'status': 'active',
-            'expires_at': {
-                '$gte': now.timestamp(),
-                '$lte': tomorrow.timestamp()
-            }
-        })
+        total_grants = grants["total"]
+        active_grants = grants["active"]
+        expired_grants = grants["revoked"]
+        expiring_soon = grants["expiring_soon"]
         
         # ACTIVITY STATISTICS
-        # Note: timestamp in logs is stored as float (time.time())
-        today_ts = today_start.timestamp()
-        week_ts = week_start.timestamp()
-        month_ts = month_start.timestamp()
-
-        # Today's activity
-        today_grants = await db.logs.count_documents({
-            'action': 'grant',
-            'timestamp': {'$gte': today_ts}
-        })
-        
-        today_revokes = await db.logs.count_documents({
-            'action': {'$in': ['revoke', 'auto_revoke']},
-            'timestamp': {'$gte': today_ts}
-        })
-        
-        # Weekly activity
-        week_grants = await db.logs.count_documents({
-            'action': 'grant',
-            'timestamp': {'$gte': week_ts}
-        })
-        
-        week_revokes = await db.logs.count_documents({
-            'action': {'$in': ['revoke', 'auto_revoke']},
-            'timestamp': {'$gte': week_ts}
-        })
-        
-        # Monthly activity
-        month_grants = await db.logs.count_documents({
-            'action': 'grant',
-            'timestamp': {'$gte': month_ts}
-        })
         
-        month_revokes = await db.logs.count_documents({
-            'action': {'$in': ['revoke', 'auto_revoke']},
-            'timestamp': {'$gte': month_ts}
-        })
+        today_grants = activity["today_grants"]
+        today_revokes = activity["today_revokes"]
+        week_grants = activity["week_grants"]
+        week_revokes = activity["week_revokes"]
+        month_grants = activity["month_grants"]
+        month_revokes = activity["month_revokes"]
         
         # TOP FOLDERS (Most accessed)
         
-        pipeline = [
-            {'$match': {'action': 'grant'}},
-            {'$group': {
-                '_id': '$details.folder_id', # Using details.folder_id based on log structure
-                'folder_name': {'$first': '$details.folder_name'},
-                'count': {'$sum': 1}
-            }},
-            {'$sort': {'count': -1}},
-            {'$limit': 5}
-        ]
-        
-        top_folders_cursor = db.logs.aggregate(pipeline)
-        top_folders = await top_folders_cursor.to_list(length=5)
+        top_folders = snapshot["top_folders"]
         
         # Format top folders
         if top_folders:
             top_folders_text = "\n".join([
-                f"📁 **{folder.get('folder_name', 'Unknown')[:25]}** - {folder['count']} grants"
+                f"📁 **{(folder.get('folder_name') or 'Unknown')[:25]}** - {folder['count']} grants"
                 for folder in top_folders
             ])
         else:
@@ -136,27 +97,13 @@ async def show_stats_dashboard(client, update):
         
         # GRANT DISTRIBUTION
         
-        viewer_grants = await db.grants.count_documents({
-            'status': 'active',
-            'role': 'reader'
-        })
-        
-        editor_grants = await db.grants.count_documents({
-            'status': 'active',
-            'role': 'writer'
-        })
+        viewer_grants = grants["viewers"]
+        editor_grants = grants["editors"]
         
         # AUTO-EXPIRE STATISTICS
         
-        auto_revokes_today = await db.logs.count_documents({
-            'action': 'auto_revoke',
-            'timestamp': {'$gte': today_ts}
-        })
-        
-        auto_revokes_week = await db.logs.count_documents({
-            'action': 'auto_revoke',
-            'timestamp': {'$gte': week_ts}
-        })
+        auto_revokes_today = activity["today_auto_revokes"]
+        auto_revokes_week = activity["week_auto_revokes"]
         
         # BUILD STATS MESSAGE 
         
@@ -249,6 +196,7 @@ Please try again or contact support.
 async def stats_refresh_callback(client: Client, callback_query: CallbackQuery):
     """Refresh stats dashboard"""
     await callback_query.answer("🔄 Refreshing stats...", show_alert=False)
+    db.invalidate_dashboard_stats()
     await show_stats_dashboard(client, callback_query)
 
 
@@ -475,17 +423,10 @@ async def stats_daily_callback(client: Client, callback_query: CallbackQuery):
 @Client.on_callback_query(filters.regex("^stats_export$" ) & is_admin)
 async def stats_export_callback(client: Client, callback_query: CallbackQuery):
     """Redirect to CSV export menu."""
-    from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-    from pyrogram.enums import ButtonStyle
+    from plugins.csv_export import export_menu_keyboard
     await safe_edit(callback_query,
         "📤 **Export Access Logs**\n\nSelect the range of logs to export:",
-        reply_markup=InlineKeyboardMarkup([
-            [InlineKeyboardButton("Today", callback_data="export_csv_today", style=ButtonStyle.PRIMARY),
-             InlineKeyboardButton("This Week", callback_data="export_csv_week", style=ButtonStyle.PRIMARY)],
-            [InlineKeyboardButton("This Month", callback_data="export_csv_month", style=ButtonStyle.PRIMARY),
-             InlineKeyboardButton("All Time", callback_data="export_csv_all", style=ButtonStyle.PRIMARY)],
-            [InlineKeyboardButton("⬅️ Back to Stats", callback_data="stats_menu", style=ButtonStyle.PRIMARY)]
-        ])
+        reply_markup=export_menu_keyboard("stats_menu", "⬅️ Back to Stats")
     )
 
 
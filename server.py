@@ -51,6 +51,7 @@ _state = {
 }
 
 bot_process: subprocess.Popen | None = None
+_mongo_client = None   # lazy sync client for /metrics reads
 
 
 # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -106,6 +107,34 @@ def health():
     return "Bot not running", 503
 
 
+def _mongo():
+    """Lazily created sync handle on the bot's database (None if MONGO_URI is unset)."""
+    global _mongo_client
+    from config import MONGO_URI
+    if not MONGO_URI:
+        return None
+    if _mongo_client is None:
+        from pymongo import MongoClient
+        _mongo_client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=3000)
+    return _mongo_client.drive_bot
+
+
+def _read_runtime_metrics() -> dict:
+    """
+    Counters the bot subprocess publishes to MongoDB (cache hit rates etc.).
+    The bot runs in another process, so its in-memory stats are not visible here.
+    """
+    try:
+        mongo = _mongo()
+        if mongo is None:
+            return {}
+        doc = mongo.cache.find_one({"key": "runtime_metrics"}) or {}
+        return {**doc.get("metrics", {}), "published_at": doc.get("updated_at")}
+    except Exception as e:
+        LOGGER.warning(f"Runtime metrics unavailable: {e}")
+        return {}
+
+
 @flask_app.route("/metrics")
 def metrics():
     """
@@ -113,27 +142,39 @@ def metrics():
     Queries MongoDB for active grant count — useful for monitoring dashboards.
     Fails gracefully if DB is unreachable.
     """
+    runtime = _read_runtime_metrics()
     try:
-        import asyncio
-        from services.database import db
-
-        loop = asyncio.new_event_loop()
-        grants = loop.run_until_complete(db.get_active_grants())
-        loop.close()
-
-        now = time.time()
-        expiring_soon = sum(
-            1 for g in grants
-            if 0 < g.get("expires_at", 0) - now < 86400
+        from services.database import Database, EXPIRY_INDEX
+
+        mongo = _mongo()
+        if mongo is None:
+            raise RuntimeError("MONGO_URI is not set")
+        expiry = {
+            name: mongo.grants.count_documents(query, hint=EXPIRY_INDEX)
+            for name, query in Database.expiry_count_filters(time.time()).items()
+        }
+
+        last_import = mongo.import_jobs.find_one(
+            {}, {"_id": 0, "status": 1, "totals": 1, "page": 1, "pages_done": 1,
+                 "resumed": 1, "error": 1, "started_at": 1, "updated_at": 1, "finished_at": 1},
+            sort=[("started_at", -1)]
         )
+
         return jsonify({
-            "active_grants":   len(grants),
-            "expiring_soon":   expiring_soon,
+            "active_grants":   expiry["active"],
+            "expiring_soon":   expiry["within_24h"],
+            "expiring_week":   expiry["within_7d"],
+            "bulk_import":     last_import,
+            "jobs":            {
+                row["_id"]: row["count"]
+                for row in mongo.jobs.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+            },
             "bot_running":     _bot_running.is_set(),
             "restart_count":   _state["restart_count"],
+            "runtime":         runtime,
         })
     except Exception as e:
-        return jsonify({"error": str(e), "bot_running": _bot_running.is_set()}), 500
+        return jsonify({"error": str(e), "bot_running": _bot_running.is_set(), "runtime": runtime}), 500
 
 
 @flask_app.route("/oauth/callback")
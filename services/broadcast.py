@@ -180,6 +180,20 @@ async def broadcast(client: Client, event_type: str, details: Dict[str, Any]):
             f"🕒 {timestamp}"
         )
 
+    elif event_type == "revoke" and "count" in details:
+        # Expiry sweep summary: many grants in one message
+        count = details['count']
+        grants = details.get('grants', [])
+        lines = "".join(f">• {g['email']} → {g['folder_name']}\n" for g in grants)
+        if count > len(grants):
+            lines += f">… +{count - len(grants)} more\n"
+        text = (
+            f"🗑️ **ACCESS REVOKED** ({count})\n\n"
+            f"{lines}"
+            f">**By:** {admin_name}\n\n"
+            f"🕒 {timestamp}"
+        )
+
     elif event_type == "revoke":
         text = (
             f"🗑️ **ACCESS REVOKED**\n\n"
@@ -0,0 +1,205 @@
+"""
+Full-drive bulk import as a resumable background job.
+
+Walks every Drive folder page by page. Each chunk of folders has its
+permission lists fetched concurrently, existing grants checked with one
+$in query, and new grants written with one insert_many (duplicates are
+rejected by the unique_active_grant index). Progress is checkpointed to
+the import_jobs collection at every page boundary. The scan itself runs
+as a "bulk_import" job on the durable job queue, so a run interrupted by a restart is re-claimed and resumes at the page it
+was on.
+"""
+
+import asyncio
+import logging
+import time
+
+from pyrogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from pyrogram.enums import ButtonStyle
+
+from services.database import db
+from services.drive import drive_service
+from services.job_queue import job_queue
+from utils.time import PROGRESS_INTERVAL
+
+LOGGER = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 50        # folders whose permissions are fetched together
+IMPORT_DURATION_HOURS = 960   # 40-day expiry for imported viewers
+IMPORT_STALE_AFTER = 3600     # a "running" import with no checkpoint for this long is considered dead
+COUNTER_KEYS = ("folders", "imported", "skipped", "errors")
+
+
+def _zero_counts():
+    return {k: 0 for k in COUNTER_KEYS}
+
+
+def job_counts(job):
+    """Committed totals plus progress on the page in flight."""
+    totals, page = job.get("totals", {}), job.get("page", {})
+    return {k: totals.get(k, 0) + page.get(k, 0) for k in COUNTER_KEYS}
+
+
+def format_job_status(job):
+    counts = job_counts(job)
+    status = job.get("status", "unknown")
+    icon = {"running": "⏳", "done": "✅", "failed": "❌"}.get(status, "▪️")
+    text = (
+        f"{icon} **Drive Import — {status.title()}**\n\n"
+        f"📂 Folders scanned: **{counts['folders']}**\n"
+        f"✅ Imported: **{counts['imported']}**\n"
+        f"⏭ Skipped: **{counts['skipped']}**\n"
+        f"❌ Errors: **{counts['errors']}**\n"
+        f"📄 Pages done: **{job.get('pages_done', 0)}**"
+    )
+    if job.get("resumed"):
+        text += f"\n🔁 Resumed {job['resumed']} time(s)"
+    if job.get("error"):
+        text += f"\n\n`{job['error'][:200]}`"
+    return text
+
+
+async def start_import(admin_id, admin_name, chat_id, message_id):
+    """
+    Queue a new import, or return the one already running.
+    Returns (import_job, started_now).
+    """
+    running = [
+        j for j in await db.get_running_import_jobs()
+        if time.time() - j.get("updated_at", 0) < IMPORT_STALE_AFTER
+    ]
+    if running:
+        return running[0], False
+
+    now = time.time()
+    job = await db.create_import_job({
+        "admin_id": admin_id,
+        "admin_name": admin_name,
+        "chat_id": chat_id,
+        "message_id": message_id,
+        "status": "running",
+        "page_token": None,    # Drive page being processed (None = first page)
+        "pages_done": 0,
+        "totals": _zero_counts(),
+        "page": _zero_counts(),
+        "resumed": 0,
+        "started_at": now,
+        "updated_at": now,
+    })
+    await job_queue.enqueue(
+        "bulk_import", {"import_job_id": job["_id"]},
+        chat_id=chat_id, message_id=message_id,
+        idempotency_key=f"bulk_import:{job['_id']}"
+    )
+    return job, True
+
+
+async def _import_chunk(job, folders):
+    counts = _zero_counts()
+    counts["folders"] = len(folders)
+
+    perms_per_folder, existing = await asyncio.gather(
+        asyncio.gather(
+            *(drive_service.get_permissions(f["id"], db) for f in folders),
+            return_exceptions=True
+        ),
+        db.get_active_grant_keys(f["id"] for f in folders),
+    )
+
+    rows = []
+    for folder, perms in zip(folders, perms_per_folder):
+        if isinstance(perms, Exception):
+            LOGGER.error(f"Bulk import error for folder {folder.get('name')}: {perms}")
+            counts["errors"] += 1
+            continue
+        for p in perms:
+            role = p.get("role", "")
+            email = p.get("emailAddress", "").lower()
+            if role in ("owner", "writer") or not email or (folder["id"], email) in existing:
+                counts["skipped"] += 1
+                continue
+            existing.add((folder["id"], email))
+            rows.append({
+                "admin_id": job["admin_id"], "email": email,
+                "folder_id": folder["id"], "folder_name": folder["name"],
+                "role": "viewer", "duration_hours": IMPORT_DURATION_HOURS,
+                "permission_id": p.get("id"),
+            })
+
+    inserted = await db.add_timed_grants(rows)
+    counts["imported"] = inserted
+    counts["skipped"] += len(rows) - inserted  # raced with another writer
+    return counts
+
+
+@job_queue.handler("bulk_import")
+async def run_import_job(app, queued, message):
+    job = await db.import_jobs.find_one({"_id": queued["payload"]["import_job_id"]})
+    if job is None or job["status"] != "running":
+        return
+    if any(job["page"].values()) or queued["attempts"] > 1:
+        # Re-claimed after a restart or error — replay the unfinished page from its token.
+        # Checked on the page counts too: a job requeued at shutdown keeps attempts at 1.
+        job["resumed"] = job.get("resumed", 0) + 1
+        job["page"] = _zero_counts()
+        await db.save_import_job(job["_id"], {"resumed": job["resumed"], "page": job["page"]})
+        LOGGER.info(f"📥 Resuming bulk import {job['_id']} at page {job['pages_done'] + 1}")
+
+    drive_service.set_admin_user(job["admin_id"])
+    last_report = 0.0
+
+    async def report(final=False, reply_markup=None):
+        nonlocal last_report
+        if not message or (not final and time.time() - last_report < PROGRESS_INTERVAL):
+            return
+        last_report = time.time()
+        try:
+            await message.edit_message_text(format_job_status(job), reply_markup=reply_markup)
+        except Exception:
+            pass  # progress is best-effort
+
+    try:
+        async for page_token, folders, next_token in drive_service.iter_folder_pages(db, job["page_token"]):
+            for i in range(0, len(folders), IMPORT_CHUNK_SIZE):
+                counts = await _import_chunk(job, folders[i:i + IMPORT_CHUNK_SIZE])
+                for k, v in counts.items():
+                    job["page"][k] += v
+                await db.save_import_job(job["_id"], {"page": job["page"]})
+                await report()
+
+            # Page boundary: fold the page into the totals and move the resume point on
+            for k in COUNTER_KEYS:
+                job["totals"][k] += job["page"][k]
+            job["page"] = _zero_counts()
+            job["page_token"] = next_token
+            job["pages_done"] += 1
+            await db.save_import_job(job["_id"], {
+                "totals": job["totals"], "page": job["page"],
+                "page_token": next_token, "pages_done": job["pages_done"],
+            })
+
+        if not job["totals"]["folders"]:
+            raise RuntimeError("No folders found in Drive (is /auth connected?)")
+    except Exception as e:
+        LOGGER.error(f"Bulk import {job['_id']} failed: {e}")
+        job["error"] = str(e)
+        if queued["attempts"] >= queued["max_attempts"]:
+            job["status"] = "failed"
+            await db.save_import_job(job["_id"], {"status": "failed", "error": str(e), "finished_at": time.time()})
+        else:
+            await db.save_import_job(job["_id"], {"error": str(e)})
+        raise  # the queue retries from the last checkpoint
+
+    job["status"] = "done"
+    await db.save_import_job(job["_id"], {"status": "done", "finished_at": time.time()})
+    await db.log_action(job["admin_id"], job["admin_name"], "bulk_import", {
+        "folders_scanned": job["totals"]["folders"], "imported": job["totals"]["imported"],
+        "skipped": job["totals"]["skipped"], "errors": job["totals"]["errors"]
+    })
+    LOGGER.info(f"📥 Bulk import {job['_id']} finished: {job['totals']}")
+
+    await report(final=True, reply_markup=InlineKeyboardMarkup([
+        [InlineKeyboardButton("⏰ View Expiry", callback_data="expiry_menu", style=ButtonStyle.PRIMARY)],
+        [InlineKeyboardButton("🏠 Main Menu",   callback_data="main_menu",   style=ButtonStyle.PRIMARY)]
+    ]))
+    return {"import_job_id": str(job["_id"]), **job["totals"]}
@@ -1,12 +1,29 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from bson import ObjectId
+from pymongo import UpdateOne, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from config import MONGO_URI, ADMIN_IDS
+from services.state_store import StateStore
+from services.expiry_scheduler import expiry_scheduler
 import time
 import re
+import copy
+import asyncio
 import logging
+from datetime import datetime, timedelta
+from utils.time import IST
 
 LOGGER = logging.getLogger(__name__)
 
+ADMIN_CACHE_TTL = 60            # seconds a positive admin lookup is trusted
+ADMIN_NEGATIVE_CACHE_TTL = 600  # seconds a "not an admin" answer is trusted
+ADMIN_CACHE_SIZE = 5000         # cap so spam from many unknown users can't grow it unbounded
+SETTINGS_POLL_INTERVAL = 30     # seconds between reloads when change streams are unavailable
+STATS_CACHE_TTL = 30            # seconds a dashboard stats snapshot is reused
+GRANT_TOTALS_ID = "grant_totals"  # counters doc: grant status / active role totals
+LOG_TOTALS_ID = "log_totals"      # counters doc: non-deleted log total
+EXPIRY_INDEX = [("status", 1), ("expires_at", 1)]
+
 class Database:
     def __init__(self):
         self._client = None
@@ -18,6 +35,17 @@ class Database:
         self.cache = None
         self.grants = None
         self.gdrive_creds = None
+        self.counters = None
+        self.stats_daily = None
+        self.folder_stats = None
+        self.import_jobs = None
+        self.jobs = None
+        self._state_store = StateStore(self._load_state, self._save_state, self._remove_state)
+        self._admin_cache = {}  # user_id -> (is_admin, cached_at)
+        self._admin_cache_stats = {"hits": 0, "misses": 0}
+        self._settings_cache = None  # key -> value, loaded in one query
+        self._stats_snapshot = None  # cached get_dashboard_stats() result
+        self._stats_lock = None
 
     async def init(self):
         """Initialize database connection and verify indices."""
@@ -35,6 +63,11 @@ class Database:
         self.cache = self.db.cache
         self.grants = self.db.grants
         self.gdrive_creds = self.db.gdrive_creds
+        self.counters = self.db.counters
+        self.stats_daily = self.db.stats_daily
+        self.folder_stats = self.db.folder_stats
+        self.import_jobs = self.db.import_jobs
+        self.jobs = self.db.jobs
 
         # Bootstrap initial admins from config
         if ADMIN_IDS:
@@ -47,12 +80,33 @@ class Database:
         await self.grants.create_index("role")
         await self.grants.create_index("status")
         await self.grants.create_index("granted_at")
+        await self.grants.create_index([("granted_at", -1), ("_id", -1)])  # keyset paging
         # Compound index for the most common active-grant expiry queries
-        await self.grants.create_index([("status", 1), ("expires_at", 1)])
+        await self.grants.create_index(EXPIRY_INDEX)
         
         # Index for log filtering
         await self.logs.create_index("action")
         await self.logs.create_index("timestamp")
+        await self.logs.create_index([("timestamp", -1), ("_id", -1)])  # keyset paging
+
+        # Materialised dashboard counters
+        await self.stats_daily.create_index([("date", 1), ("action", 1)], unique=True)
+        await self.folder_stats.create_index("folder_id", unique=True)
+        await self.folder_stats.create_index([("grants", -1)])
+        await self.import_jobs.create_index([("status", 1), ("started_at", -1)])
+
+        # Job queue: claim scans, lease expiry and idempotent enqueue
+        await self.jobs.create_index([("status", 1), ("run_after", 1)])
+        await self.jobs.create_index([("status", 1), ("lease_until", 1)])
+        await self.jobs.create_index(
+            "idempotency_key", unique=True,
+            partialFilterExpression={"idempotency_key": {"$type": "string"}}
+        )
+        # Keys only guard queued/running jobs; release any left on settled ones
+        await self.jobs.update_many(
+            {"idempotency_key": {"$type": "string"}, "status": {"$in": ["done", "failed"]}},
+            {"$set": {"idempotency_key": None}}
+        )
         
         # Duplicate Prevention - Unique Index
         try:
@@ -69,6 +123,12 @@ class Database:
             else:
                 LOGGER.warning(f"Index verification: {e}")
         
+        await self.load_settings()
+
+        if await self.counters.find_one({"_id": GRANT_TOTALS_ID}) is None:
+            # First start with materialised counters — seed them from history
+            await self.rebuild_counters()
+
         LOGGER.info("Database initialized successfully.")
 
         # Pinned folders unique index
@@ -87,20 +147,50 @@ class Database:
 
     # --- Admin Management ---
     async def is_admin(self, user_id):
-        return await self.admins.find_one({"user_id": int(user_id)}) is not None
+        user_id = int(user_id)
+        cached = self._admin_cache.get(user_id)
+        if cached:
+            is_admin, cached_at = cached
+            ttl = ADMIN_CACHE_TTL if is_admin else ADMIN_NEGATIVE_CACHE_TTL
+            if time.time() - cached_at < ttl:
+                self._admin_cache_stats["hits"] += 1
+                return is_admin
+
+        self._admin_cache_stats["misses"] += 1
+        is_admin = await self.admins.find_one({"user_id": user_id}) is not None
+        if len(self._admin_cache) >= ADMIN_CACHE_SIZE:
+            self._admin_cache.pop(next(iter(self._admin_cache)))
+        self._admin_cache[user_id] = (is_admin, time.time())
+        return is_admin
+
+    def invalidate_admin_cache(self, user_id=None):
+        if user_id is None:
+            self._admin_cache.clear()
+        else:
+            self._admin_cache.pop(int(user_id), None)
+
+    def get_admin_cache_stats(self):
+        lookups = self._admin_cache_stats["hits"] + self._admin_cache_stats["misses"]
+        return {
+            **self._admin_cache_stats,
+            "cached": len(self._admin_cache),
+            "hit_rate": round(self._admin_cache_stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
 
     async def add_admin(self, user_id, name):
-        if not await self.is_admin(user_id):
+        if await self.admins.find_one({"user_id": int(user_id)}) is None:
             await self.admins.insert_one({
                 "user_id": int(user_id),
                 "name": name,
                 "added_at": time.time()
             })
+            self.invalidate_admin_cache(user_id)
             return True
         return False
 
     async def remove_admin(self, user_id):
         result = await self.admins.delete_one({"user_id": int(user_id)})
+        self.invalidate_admin_cache(user_id)
         return result.deleted_count > 0
 
     async def get_all_admins(self):
@@ -108,8 +198,9 @@ class Database:
         return [admin async for admin in cursor]
 
     # --- Logging ---
-    async def log_action(self, admin_id, admin_name, action, details):
-        log_entry = {
+    @staticmethod
+    def _log_doc(admin_id, admin_name, action, details):
+        return {
             "admin_id": admin_id,
             "admin_name": admin_name,
             "action": action,
@@ -117,17 +208,60 @@ class Database:
             "timestamp": time.time(),
             "is_deleted": False
         }
-        await self.logs.insert_one(log_entry)
 
-    async def get_logs(self, limit=50, skip=0, log_type=None):
-        """Get logs, excluding soft-deleted. Optionally filter by action type."""
+    async def log_action(self, admin_id, admin_name, action, details):
+        doc = self._log_doc(admin_id, admin_name, action, details)
+        await self.logs.insert_one(doc)
+        await self._count_logs([doc])
+
+    async def log_actions(self, entries):
+        """Insert many log entries in one round trip.
+        entries: list of dicts with admin_id, admin_name, action, details."""
+        if not entries:
+            return
+        docs = [self._log_doc(e["admin_id"], e["admin_name"], e["action"], e["details"]) for e in entries]
+        await self.logs.insert_many(docs, ordered=False)
+        await self._count_logs(docs)
+
+    @staticmethod
+    def _log_query(log_type=None):
         query = {"is_deleted": {"$ne": True}}
         if log_type:
             query["action"] = log_type
-        cursor = self.logs.find(query).sort("timestamp", -1).skip(skip).limit(limit)
-        total = await self.logs.count_documents(query)
-        logs = [log async for log in cursor]
-        return logs, total
+        return query
+
+    async def _keyset_page(self, collection, query, sort_field, after=None, limit=20):
+        """
+        Newest-first page of `query` on (sort_field, _id), starting strictly
+        after the `after` cursor. Any page costs one indexed range read, no
+        matter how deep it is. Returns (docs, next_cursor); next_cursor is a
+        [sort_value, _id] pair, or None on the last page.
+        """
+        if after is not None:
+            value, last_id = after
+            query = {"$and": [query, {"$or": [
+                {sort_field: {"$lt": value}},
+                {sort_field: value, "_id": {"$lt": last_id}}
+            ]}]}
+        docs = await collection.find(query).sort(
+            [(sort_field, -1), ("_id", -1)]
+        ).limit(limit + 1).to_list(length=limit + 1)
+        if len(docs) <= limit:
+            return docs, None
+        docs = docs[:limit]
+        return docs, [docs[-1].get(sort_field), docs[-1]["_id"]]
+
+    async def get_logs(self, limit=50, after=None, log_type=None):
+        """Get a page of logs, excluding soft-deleted. Optionally filter by action type.
+        Returns (logs, next_cursor) — pass next_cursor back as `after` for the next page."""
+        return await self._keyset_page(self.logs, self._log_query(log_type), "timestamp", after, limit)
+
+    async def count_logs(self, log_type=None):
+        return await self.logs.count_documents(self._log_query(log_type))
+
+    def iter_logs(self, query, projection=None, batch_size=500):
+        """Newest-first cursor over logs, fetched from Mongo batch_size at a time."""
+        return self.logs.find(query, projection).sort("timestamp", -1).batch_size(batch_size)
 
     async def clear_logs(self):
         """Soft delete all logs."""
@@ -135,11 +269,29 @@ class Database:
             {"is_deleted": {"$ne": True}},
             {"$set": {"is_deleted": True, "deleted_at": time.time()}}
         )
+        # Log-derived counters only cover live logs — none are left
+        await asyncio.gather(
+            self.counters.update_one({"_id": LOG_TOTALS_ID}, {"$set": {"live": 0}}, upsert=True),
+            self.stats_daily.delete_many({}),
+            self.folder_stats.delete_many({}),
+        )
+        self.invalidate_dashboard_stats()
 
     # --- Settings ---
+    # Served from an in-memory copy of the whole collection (it is tiny).
+    async def load_settings(self):
+        """(Re)load every setting in one query."""
+        self._settings_cache = {
+            doc["key"]: doc.get("value") async for doc in self.settings.find({})
+        }
+
     async def get_setting(self, key, default=None):
-        doc = await self.settings.find_one({"key": key})
-        return doc["value"] if doc else default
+        if self._settings_cache is None:
+            await self.load_settings()
+        if key not in self._settings_cache:
+            return default
+        # Callers mutate dict settings (e.g. channel_config) before saving
+        return copy.deepcopy(self._settings_cache[key])
 
     async def update_setting(self, key, value):
         await self.settings.update_one(
@@ -147,25 +299,67 @@ class Database:
             {"$set": {"value": value}},
             upsert=True
         )
+        if self._settings_cache is not None:
+            self._settings_cache[key] = copy.deepcopy(value)
+
+    async def watch_settings(self):
+        """
+        Keep the settings cache coherent with writes from other processes.
+        Uses a change stream when the deployment supports one (replica set /
+        Atlas) and falls back to periodic reloads on a standalone mongod.
+        """
+        try:
+            async with self.settings.watch(full_document="updateLookup") as stream:
+                LOGGER.info("👀 Watching settings via change stream")
+                async for change in stream:
+                    doc = change.get("fullDocument")
+                    if change["operationType"] in ("insert", "update", "replace") and doc:
+                        self._settings_cache[doc["key"]] = doc.get("value")
+                    else:
+                        await self.load_settings()
+        except OperationFailure as e:
+            LOGGER.info(f"ℹ️ Change streams unavailable ({e.code}) — polling settings every {SETTINGS_POLL_INTERVAL}s")
+        except Exception as e:
+            LOGGER.warning(f"⚠️ Settings change stream stopped: {e} — polling every {SETTINGS_POLL_INTERVAL}s")
+
+        while True:
+            await asyncio.sleep(SETTINGS_POLL_INTERVAL)
+            try:
+                await self.load_settings()
+            except Exception as e:
+                LOGGER.error(f"Settings reload error: {e}")
 
     # --- State Management (For Conversation Flow) ---
+    # Reads/writes go through an in-process write-through cache (StateStore).
     async def set_state(self, user_id, state, data=None):
         if data is None:
             data = {}
+        await self._state_store.set(user_id, state, data)
+
+    async def get_state(self, user_id):
+        return await self._state_store.get(user_id)
+
+    async def delete_state(self, user_id):
+        await self._state_store.delete(user_id)
+
+    def get_state_cache_stats(self):
+        return self._state_store.get_stats()
+
+    async def _save_state(self, user_id, state, data):
         await self.states.update_one(
-            {"user_id": int(user_id)},
+            {"user_id": user_id},
             {"$set": {"state": state, "data": data, "updated_at": time.time()}},
             upsert=True
         )
 
-    async def get_state(self, user_id):
-        doc = await self.states.find_one({"user_id": int(user_id)})
+    async def _load_state(self, user_id):
+        doc = await self.states.find_one({"user_id": user_id})
         if doc:
-            return doc.get("state"), doc.get("data", {})
+            return doc.get("state"), doc.get("data") or {}
         return None, {}
 
-    async def delete_state(self, user_id):
-        await self.states.delete_one({"user_id": int(user_id)})
+    async def _remove_state(self, user_id):
+        await self.states.delete_one({"user_id": user_id})
 
     # --- Folder Cache ---
     async def get_cached_folders(self, ttl_minutes=10):
@@ -176,20 +370,34 @@ class Database:
                 return doc.get("folders", [])
         return None
 
-    async def set_cached_folders(self, folders):
+    async def get_folder_cache_doc(self):
+        """Raw folder cache doc (folders, cached_at, changes_token), ignoring TTL."""
+        return await self.cache.find_one({"key": "folders"})
+
+    async def set_cached_folders(self, folders, changes_token=None):
         await self.cache.update_one(
             {"key": "folders"},
-            {"$set": {"folders": folders, "cached_at": time.time()}},
+            {"$set": {"folders": folders, "cached_at": time.time(), "changes_token": changes_token}},
             upsert=True
         )
 
     async def clear_folder_cache(self):
+        """Drop the folder cache and its changes token — forces a full rescan."""
         await self.cache.delete_one({"key": "folders"})
 
+    # --- Runtime Metrics (published by bot.py, read by server.py /metrics) ---
+    async def save_runtime_metrics(self, metrics):
+        await self.cache.update_one(
+            {"key": "runtime_metrics"},
+            {"$set": {"metrics": metrics, "updated_at": time.time()}},
+            upsert=True
+        )
+
     # --- Timed Grants ---
-    async def add_timed_grant(self, admin_id, email, folder_id, folder_name, role, duration_hours):
+    @staticmethod
+    def _grant_doc(admin_id, email, folder_id, folder_name, role, duration_hours, permission_id=None):
         now = time.time()
-        grant = {
+        return {
             "admin_id": admin_id,
             "email": email.lower().strip(),  # Normalize email
             "folder_id": folder_id,
@@ -198,15 +406,104 @@ class Database:
             "granted_at": now,
             "expires_at": now + (duration_hours * 3600),
             "duration_hours": duration_hours,
+            "permission_id": permission_id,  # Drive permission id → one-call revoke
             "status": "active"
         }
-        await self.grants.insert_one(grant)
 
-    async def get_expired_grants(self):
+    async def add_timed_grant(self, admin_id, email, folder_id, folder_name, role, duration_hours,
+                              permission_id=None):
+        doc = self._grant_doc(admin_id, email, folder_id, folder_name, role, duration_hours, permission_id)
+        result = await self.grants.insert_one(doc)
+        expiry_scheduler.schedule(result.inserted_id, doc["expires_at"])
+        await self._count_new_grants([doc])
+
+    async def add_timed_grants(self, grants):
+        """Insert many timed grants in one round trip.
+        grants: list of dicts with the add_timed_grant keyword arguments.
+        Rows rejected by the unique active-grant index are skipped.
+        Returns the number of grants inserted."""
+        if not grants:
+            return 0
+        docs = [self._grant_doc(**g) for g in grants]
+        rejected = set()
+        try:
+            await self.grants.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            errors = (e.details or {}).get("writeErrors", [])
+            rejected = {err["index"] for err in errors}
+            LOGGER.warning(f"⚠️ {len(errors)} grant row(s) skipped (duplicates)")
+        inserted = [doc for i, doc in enumerate(docs) if i not in rejected]
+        for doc in inserted:
+            expiry_scheduler.schedule(doc["_id"], doc["expires_at"])
+        await self._count_new_grants(inserted)
+        return len(inserted)
+
+    async def get_grants_missing_permission_id(self, after_id=None, limit=500):
+        """Active grants created before permission ids were stored (keyset-paged by _id)."""
+        query = {"status": "active", "permission_id": None}
+        if after_id is not None:
+            query["_id"] = {"$gt": after_id}
+        return await self.grants.find(
+            query, {"email": 1, "folder_id": 1}
+        ).sort("_id", 1).to_list(length=limit)
+
+    async def set_grant_permission_ids(self, updates):
+        """updates: {grant_id: permission_id}"""
+        if not updates:
+            return 0
+        result = await self.grants.bulk_write([
+            UpdateOne({"_id": gid}, {"$set": {"permission_id": pid}})
+            for gid, pid in updates.items()
+        ], ordered=False)
+        return result.modified_count
+
+    async def get_upcoming_expiries(self, until):
+        """(_id, expires_at) of active grants due before `until` — served by the (status, expires_at) index."""
+        return await self.grants.find(
+            {"status": "active", "expires_at": {"$lte": until}},
+            {"expires_at": 1}
+        ).to_list(length=None)
+
+    async def get_expired_grants(self, limit=100):
         return await self.grants.find({
             "status": "active",
             "expires_at": {"$lte": time.time()}
-        }).to_list(length=100)
+        }).sort("expires_at", 1).to_list(length=limit)
+
+    async def mark_grants_expired_bulk(self, expired_ids, failed_ids=()):
+        """
+        Settle a whole expiry sweep batch: one update_many per outcome, run
+        concurrently. The roles of the still-active grants are read first so
+        the status counters move by what was settled.
+        """
+        now = time.time()
+        targets = [
+            (list(ids), status, ts_field)
+            for ids, status, ts_field in ((expired_ids, "expired", "expired_at"),
+                                          (failed_ids, "revocation_failed", "failed_at"))
+            if ids
+        ]
+        if not targets:
+            return
+
+        all_ids = [gid for ids, _, _ in targets for gid in ids]
+        roles = {
+            doc["_id"]: doc.get("role")
+            async for doc in self.grants.find({"_id": {"$in": all_ids}, "status": "active"}, {"role": 1})
+        }
+        await asyncio.gather(*(
+            self.grants.update_many(
+                {"_id": {"$in": ids}, "status": "active"},
+                {"$set": {"status": status, ts_field: now}}
+            ) for ids, status, ts_field in targets
+        ))
+
+        inc = {}
+        for ids, status, _ in targets:
+            for gid in ids:
+                if gid in roles:
+                    self._add_status_move(inc, "active", status, roles[gid], 1)
+        await self._inc_grant_totals(inc)
 
     async def get_active_grants(self):
         return await self.grants.find({
@@ -214,93 +511,344 @@ class Database:
             "expires_at": {"$gt": time.time()}
         }).sort("expires_at", 1).to_list(length=None)
 
-    async def mark_grant_expired(self, grant_id):
-        await self.grants.update_one(
-            {"_id": ObjectId(grant_id) if isinstance(grant_id, str) else grant_id},
-            {"$set": {"status": "expired", "expired_at": time.time()}}
+    async def _set_grant_status(self, grant_id, status, ts_field):
+        """Move one grant to `status`, keeping the status counters in step."""
+        before = await self.grants.find_one_and_update(
+            {"_id": ObjectId(grant_id) if isinstance(grant_id, str) else grant_id,
+             "status": {"$ne": status}},
+            {"$set": {"status": status, ts_field: time.time()}},
+            projection={"status": 1, "role": 1}
         )
+        if before:
+            inc = {}
+            self._add_status_move(inc, before.get("status"), status, before.get("role"), 1)
+            await self._inc_grant_totals(inc)
+        return before
+
+    @staticmethod
+    def expiry_count_filters(now):
+        """
+        Range filters for get_expiry_counts, keyed by result name. Shared
+        with server.py, which runs them on its own sync client.
+        """
+        windows = {"active": None, "within_24h": 86400, "within_7d": 604800}
+        filters = {}
+        for name, span in windows.items():
+            expires = {"$gt": now}
+            if span is not None:
+                expires["$lte"] = now + span
+            filters[name] = {"status": "active", "expires_at": expires}
+        return filters
+
+    async def get_expiry_counts(self):
+        """
+        Active-grant counts by time to expiry, without loading any grant:
+        {"active": n, "within_24h": n, "within_7d": n}.
+        Each count is a range scan on the (status, expires_at) index.
+        """
+        filters = self.expiry_count_filters(time.time())
+        counts = await asyncio.gather(*(
+            self.grants.count_documents(query, hint=EXPIRY_INDEX) for query in filters.values()
+        ))
+        return dict(zip(filters, counts))
+
+    async def mark_grant_expired(self, grant_id):
+        await self._set_grant_status(grant_id, "expired", "expired_at")
 
     async def mark_grant_revocation_failed(self, grant_id):
-        await self.grants.update_one(
-            {"_id": ObjectId(grant_id) if isinstance(grant_id, str) else grant_id},
-            {"$set": {"status": "revocation_failed", "failed_at": time.time()}}
-        )
+        await self._set_grant_status(grant_id, "revocation_failed", "failed_at")
 
     async def extend_grant(self, grant_id, extra_hours):
-        await self.grants.update_one(
+        """Push expires_at out by extra_hours. Returns the updated grant (or None)."""
+        grant = await self.grants.find_one_and_update(
             {"_id": ObjectId(grant_id) if isinstance(grant_id, str) else grant_id},
-            {"$inc": {"expires_at": extra_hours * 3600}}
+            {"$inc": {"expires_at": extra_hours * 3600}},
+            return_document=ReturnDocument.AFTER
         )
+        if grant and grant.get("status") == "active":
+            expiry_scheduler.schedule(grant["_id"], grant["expires_at"])
+        return grant
 
     async def revoke_grant(self, grant_id):
-        await self.grants.update_one(
-            {"_id": ObjectId(grant_id) if isinstance(grant_id, str) else grant_id},
-            {"$set": {"status": "revoked", "revoked_at": time.time()}}
+        await self._set_grant_status(grant_id, "revoked", "revoked_at")
+        expiry_scheduler.cancel(grant_id)
+
+    async def update_grant_role(self, email, folder_id, new_role):
+        """Sync the role of the active grant for (email, folder) after a Drive role change."""
+        before = await self.grants.find_one_and_update(
+            {"email": email.lower().strip(), "folder_id": folder_id, "status": "active"},
+            {"$set": {"role": new_role}},
+            projection={"role": 1}
         )
+        if before and before.get("role") != new_role:
+            await self._inc_grant_totals({
+                f"active_roles.{before.get('role')}": -1,
+                f"active_roles.{new_role}": 1,
+            })
+        return before is not None
+
+    # --- Materialised Counters ---
+    # Maintained on write so dashboard reads never scan logs or grants:
+    #   counters      {_id: "grant_totals", total, status.<status>, active_roles.<role>}
+    #                 {_id: "log_totals", live}
+    #   stats_daily   {date: "YYYY-MM-DD" (IST), action, count}
+    #   folder_stats  {folder_id, folder_name, grants}
+    # rebuild_counters() recomputes all of them from history.
+    @staticmethod
+    def _ist_date(ts):
+        return datetime.fromtimestamp(ts, IST).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def _add_status_move(inc, from_status, to_status, role, n):
+        if not n:
+            return
+        if from_status:
+            inc[f"status.{from_status}"] = inc.get(f"status.{from_status}", 0) - n
+            if from_status == "active":
+                inc[f"active_roles.{role}"] = inc.get(f"active_roles.{role}", 0) - n
+        inc[f"status.{to_status}"] = inc.get(f"status.{to_status}", 0) + n
+        if to_status == "active":
+            inc[f"active_roles.{role}"] = inc.get(f"active_roles.{role}", 0) + n
+
+    async def _inc_grant_totals(self, inc):
+        inc = {k: v for k, v in inc.items() if v}
+        if inc:
+            await self.counters.update_one({"_id": GRANT_TOTALS_ID}, {"$inc": inc}, upsert=True)
+
+    async def _count_new_grants(self, docs):
+        if not docs:
+            return
+        inc = {"total": len(docs)}
+        for doc in docs:
+            self._add_status_move(inc, None, "active", doc["role"], 1)
+        await self._inc_grant_totals(inc)
+
+    async def _count_logs(self, docs):
+        daily, folders = {}, {}
+        for doc in docs:
+            key = (self._ist_date(doc["timestamp"]), doc["action"])
+            daily[key] = daily.get(key, 0) + 1
+            folder_id = (doc.get("details") or {}).get("folder_id")
+            if doc["action"] == "grant" and folder_id:
+                name = doc["details"].get("folder_name")
+                folders[folder_id] = (name, folders.get(folder_id, (None, 0))[1] + 1)
+
+        ops = [self.counters.update_one({"_id": LOG_TOTALS_ID}, {"$inc": {"live": len(docs)}}, upsert=True)]
+        ops.append(self.stats_daily.bulk_write([
+            UpdateOne({"date": date, "action": action}, {"$inc": {"count": n}}, upsert=True)
+            for (date, action), n in daily.items()
+        ], ordered=False))
+        if folders:
+            ops.append(self.folder_stats.bulk_write([
+                UpdateOne({"folder_id": fid}, {"$inc": {"grants": n}, "$set": {"folder_name": name}}, upsert=True)
+                for fid, (name, n) in folders.items()
+            ], ordered=False))
+        try:
+            await asyncio.gather(*ops)
+        except Exception as e:
+            # Counters are derived data — never fail the action that was logged
+            LOGGER.warning(f"⚠️ Stats counter update failed (run /rebuildstats): {e}")
+
+    async def rebuild_counters(self):
+        """
+        Recompute every materialised counter from the grants and logs
+        collections. Writes that land while this runs may be lost from the
+        counters; run it again if that matters.
+        """
+        started = time.time()
+        day = {"$dateToString": {
+            "format": "%Y-%m-%d",
+            "date": {"$toDate": {"$multiply": ["$timestamp", 1000]}},
+            "timezone": "+05:30"
+        }}
+
+        by_status_role, daily, folders, live_logs = await asyncio.gather(
+            self.grants.aggregate([
+                {"$group": {"_id": {"status": "$status", "role": "$role"}, "count": {"$sum": 1}}}
+            ]).to_list(length=None),
+            self.logs.aggregate([
+                {"$match": {"is_deleted": {"$ne": True}}},
+                {"$group": {"_id": {"date": day, "action": "$action"}, "count": {"$sum": 1}}}
+            ]).to_list(length=None),
+            self.logs.aggregate([
+                {"$match": {"is_deleted": {"$ne": True}, "action": "grant", "details.folder_id": {"$exists": True}}},
+                {"$group": {
+                    "_id": "$details.folder_id",
+                    "folder_name": {"$last": "$details.folder_name"},
+                    "grants": {"$sum": 1}
+                }}
+            ]).to_list(length=None),
+            self.logs.count_documents({"is_deleted": {"$ne": True}}),
+        )
+
+        totals = {"total": 0}
+        for row in by_status_role:
+            status, role, n = row["_id"].get("status"), row["_id"].get("role"), row["count"]
+            totals["total"] += n
+            self._add_status_move(totals, None, status, role, n)
+        await self.counters.replace_one({"_id": GRANT_TOTALS_ID}, self._nest(totals), upsert=True)
+        await self.counters.replace_one({"_id": LOG_TOTALS_ID}, {"live": live_logs}, upsert=True)
+
+        await self.stats_daily.delete_many({})
+        if daily:
+            await self.stats_daily.insert_many([
+                {"date": row["_id"]["date"], "action": row["_id"]["action"], "count": row["count"]}
+                for row in daily
+            ])
+        await self.folder_stats.delete_many({})
+        if folders:
+            await self.folder_stats.insert_many([
+                {"folder_id": row["_id"], "folder_name": row["folder_name"], "grants": row["grants"]}
+                for row in folders
+            ])
+
+        self.invalidate_dashboard_stats()
+        LOGGER.info(
+            f"📊 Stats counters rebuilt: {totals['total']} grants, {len(daily)} daily rows, "
+            f"{len(folders)} folders in {time.time() - started:.1f}s"
+        )
+
+    @staticmethod
+    def _nest(flat):
+        """{"status.active": 3} -> {"status": {"active": 3}}"""
+        nested = {}
+        for key, value in flat.items():
+            parent, _, child = key.partition(".")
+            if child:
+                nested.setdefault(parent, {})[child] = value
+            else:
+                nested[parent] = value
+        return nested
 
     # --- Stats / Analytics ---
-    async def get_stats(self):
-        """Get analytics data for /stats command."""
+    # Dashboard counters are O(1) reads of the materialised counters above,
+    # plus index-bounded queries for the time-sensitive bits. The snapshot
+    # is cached for STATS_CACHE_TTL so /stats, /start, the main menu and
+    # /about share it.
+    async def _compute_dashboard_stats(self):
         now = time.time()
-        day_ago = now - 86400
-        week_ago = now - 604800
+        today = datetime.now(IST)
+        week_start = self._ist_date((today - timedelta(days=6)).timestamp())
+        month_start = self._ist_date((today - timedelta(days=29)).timestamp())
+        today = today.strftime("%Y-%m-%d")
         month_ago = now - 2592000
-        
-        query_base = {"is_deleted": {"$ne": True}}
-        
-        # Counts by time period
-        today_count = await self.logs.count_documents({**query_base, "timestamp": {"$gte": day_ago}})
-        week_count = await self.logs.count_documents({**query_base, "timestamp": {"$gte": week_ago}})
-        month_count = await self.logs.count_documents({**query_base, "timestamp": {"$gte": month_ago}})
-        total_count = await self.logs.count_documents(query_base)
-        
-        # Active grants
-        active_grants = await self.grants.count_documents({"status": "active", "expires_at": {"$gt": now}})
-        
-        # Most accessed folder (from logs)
-        top_folder_pipeline = [
-            {"$match": {**query_base, "timestamp": {"$gte": month_ago}}},
-            {"$group": {"_id": "$details.folder_name", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 1}
-        ]
-        top_folder_result = await self.logs.aggregate(top_folder_pipeline).to_list(1)
-        top_folder = top_folder_result[0]["_id"] if top_folder_result and top_folder_result[0].get("_id") else "N/A"
-        top_folder_count = top_folder_result[0]["count"] if top_folder_result else 0
-        
-        # Top admin this month
-        top_admin_pipeline = [
-            {"$match": {**query_base, "timestamp": {"$gte": month_ago}, "admin_id": {"$ne": 0}}},
-            {"$group": {"_id": "$admin_name", "count": {"$sum": 1}}},
-            {"$sort": {"count": -1}},
-            {"$limit": 1}
-        ]
-        top_admin_result = await self.logs.aggregate(top_admin_pipeline).to_list(1)
-        top_admin = top_admin_result[0]["_id"] if top_admin_result and top_admin_result[0].get("_id") else "N/A"
-        top_admin_count = top_admin_result[0]["count"] if top_admin_result else 0
-        
+        live_month = {"is_deleted": {"$ne": True}, "timestamp": {"$gte": month_ago}}
+
+        (grant_totals, log_totals, daily, top_folders, month_tops,
+         expiry) = await asyncio.gather(
+            self.counters.find_one({"_id": GRANT_TOTALS_ID}),
+            self.counters.find_one({"_id": LOG_TOTALS_ID}),
+            self.stats_daily.find({"date": {"$gte": month_start}}).to_list(length=None),
+            self.folder_stats.find({}, {"_id": 0}).sort("grants", -1).to_list(length=5),
+            self.logs.aggregate([
+                {"$match": live_month},
+                {"$facet": {
+                    "top_folder": [
+                        {"$group": {"_id": "$details.folder_name", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 1}
+                    ],
+                    "top_admin": [
+                        {"$match": {"admin_id": {"$ne": 0}}},
+                        {"$group": {"_id": "$admin_name", "count": {"$sum": 1}}},
+                        {"$sort": {"count": -1}},
+                        {"$limit": 1}
+                    ],
+                }}
+            ]).to_list(length=1),
+            self.get_expiry_counts(),
+        )
+
+        grant_totals = grant_totals or {}
+        status = grant_totals.get("status", {})
+        roles = grant_totals.get("active_roles", {})
+
+        def window(since, actions=None):
+            return sum(
+                row["count"] for row in daily
+                if row["date"] >= since and (actions is None or row["action"] in actions)
+            )
+
+        revokes = ("revoke", "auto_revoke")
+        month_tops = month_tops[0] if month_tops else {}
+        top_folder = (month_tops.get("top_folder") or [{}])[0]
+        top_admin = (month_tops.get("top_admin") or [{}])[0]
+
         return {
-            "today": today_count,
-            "week": week_count,
-            "month": month_count,
-            "total": total_count,
-            "active_grants": active_grants,
-            "top_folder": top_folder,
-            "top_folder_count": top_folder_count,
-            "top_admin": top_admin,
-            "top_admin_count": top_admin_count
+            "generated_at": now,
+            "grants": {
+                "total": grant_totals.get("total", 0),
+                "active": status.get("active", 0),
+                "revoked": status.get("revoked", 0),
+                "active_live": expiry["active"],
+                "expiring_soon": expiry["within_24h"],
+                "viewers": roles.get("reader", 0),
+                "editors": roles.get("writer", 0),
+            },
+            "activity": {
+                "today_grants": window(today, ("grant",)),
+                "today_revokes": window(today, revokes),
+                "today_auto_revokes": window(today, ("auto_revoke",)),
+                "week_grants": window(week_start, ("grant",)),
+                "week_revokes": window(week_start, revokes),
+                "week_auto_revokes": window(week_start, ("auto_revoke",)),
+                "month_grants": window(month_start, ("grant",)),
+                "month_revokes": window(month_start, revokes),
+                "today": window(today),
+                "week": window(week_start),
+                "month": window(month_start),
+                "total": (log_totals or {}).get("live", 0),
+            },
+            "top_folders": top_folders,
+            "top_folder": top_folder.get("_id") or "N/A",
+            "top_folder_count": top_folder.get("count", 0),
+            "top_admin": top_admin.get("_id") or "N/A",
+            "top_admin_count": top_admin.get("count", 0),
+        }
+
+    async def get_dashboard_stats(self, force_refresh=False):
+        """
+        Cached snapshot of every dashboard counter.
+        Concurrent callers on a cold cache share one computation.
+        """
+        if self._stats_lock is None:
+            self._stats_lock = asyncio.Lock()
+
+        async with self._stats_lock:
+            snapshot = self._stats_snapshot
+            if force_refresh or not snapshot or time.time() - snapshot["generated_at"] >= STATS_CACHE_TTL:
+                self._stats_snapshot = snapshot = await self._compute_dashboard_stats()
+        return copy.deepcopy(snapshot)
+
+    def invalidate_dashboard_stats(self):
+        self._stats_snapshot = None
+
+    async def get_stats(self):
+        """Get analytics data for /stats command."""
+        snapshot = await self.get_dashboard_stats()
+        activity = snapshot["activity"]
+        return {
+            "today": activity["today"],
+            "week": activity["week"],
+            "month": activity["month"],
+            "total": activity["total"],
+            "active_grants": snapshot["grants"]["active_live"],
+            "top_folder": snapshot["top_folder"],
+            "top_folder_count": snapshot["top_folder_count"],
+            "top_admin": snapshot["top_admin"],
+            "top_admin_count": snapshot["top_admin_count"]
         }
 
     # --- Advanced Search ---
-    async def search_grants(self, query=None, limit=20, skip=0):
-        """Search grants with complex filters."""
+    async def search_grants(self, query=None, limit=20, after=None):
+        """Search grants with complex filters, newest first.
+        Returns (results, next_cursor) — pass next_cursor back as `after` for the next page."""
         if query is None:
             query = {"status": "active"}
-            
-        cursor = self.grants.find(query).sort("granted_at", -1).skip(skip).limit(limit)
-        total = await self.grants.count_documents(query)
-        results = [grant async for grant in cursor]
-        return results, total
+        return await self._keyset_page(self.grants, query, "granted_at", after, limit)
+
+    async def count_grants(self, query=None):
+        return await self.grants.count_documents(query if query is not None else {"status": "active"})
 
     async def get_grants_by_email(self, email):
         """Get all active grants for a specific email address (Secured)."""
@@ -341,85 +889,134 @@ class Database:
         - timeline breakdown (urgent, week, month, later)
         - top expiring folders
         - top expiring users
+
+        Computed server-side in one $facet aggregation, so only the
+        summary leaves Mongo regardless of how many grants are active.
         """
-        import time
-        
         now = time.time()
-        
-        # Get all active grants
-        active_grants = await self.get_active_grants()
-        
-        if not active_grants:
-            return {
-                "total_active": 0,
-                "timeline": {"urgent": 0, "week": 0, "month": 0, "later": 0},
-                "top_folders": [],
-                "top_users": []
-            }
-        
-        # Timeline breakdown
-        timeline = {
-            "urgent": 0,      # < 24 hours
-            "week": 0,        # 1-7 days
-            "month": 0,       # 8-30 days
-            "later": 0        # 30+ days
-        }
-        
-        for grant in active_grants:
-            expires_at = grant.get('expires_at', 0)
-            seconds_remaining = expires_at - now
-            hours_remaining = seconds_remaining / 3600
-            
-            if hours_remaining < 24:
-                timeline["urgent"] += 1
-            elif hours_remaining < 168:  # 7 days
-                timeline["week"] += 1
-            elif hours_remaining < 720:  # 30 days
-                timeline["month"] += 1
-            else:
-                timeline["later"] += 1
-        
-        # Top expiring folders (count grants per folder)
-        folder_counts = {}
-        for grant in active_grants:
-            folder_name = grant.get('folder_name', 'Unknown')
-            folder_id = grant.get('folder_id', '')
-            key = f"{folder_name}|{folder_id}"  # Use both for uniqueness
-            
-            if key not in folder_counts:
-                folder_counts[key] = {
-                    "name": folder_name,
-                    "id": folder_id,
-                    "count": 0
-                }
-            folder_counts[key]["count"] += 1
-        
-        # Sort by count and get top 15
-        top_folders = sorted(
-            folder_counts.values(),
-            key=lambda x: x["count"],
-            reverse=True
-        )[:15]
-        
-        # Top expiring users (users with most grants)
-        user_counts = {}
-        for grant in active_grants:
-            email = grant.get('email', 'unknown')
-            user_counts[email] = user_counts.get(email, 0) + 1
-        
-        top_users = sorted(
-            user_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:15]
-        
+        remaining = {"$subtract": ["$expires_at", now]}
+
+        pipeline = [
+            {"$match": {"status": "active", "expires_at": {"$gt": now}}},
+            {"$facet": {
+                "timeline": [
+                    {"$group": {
+                        "_id": {"$switch": {
+                            "branches": [
+                                {"case": {"$lt": [remaining, 24 * 3600]}, "then": "urgent"},   # < 24 hours
+                                {"case": {"$lt": [remaining, 168 * 3600]}, "then": "week"},    # 1-7 days
+                                {"case": {"$lt": [remaining, 720 * 3600]}, "then": "month"},   # 8-30 days
+                            ],
+                            "default": "later"                                                  # 30+ days
+                        }},
+                        "count": {"$sum": 1}
+                    }}
+                ],
+                "top_folders": [
+                    {"$group": {
+                        "_id": {
+                            "name": {"$ifNull": ["$folder_name", "Unknown"]},
+                            "id": {"$ifNull": ["$folder_id", ""]}
+                        },
+                        "count": {"$sum": 1}
+                    }},
+                    {"$sort": {"count": -1}},
+                    {"$limit": 15}
+                ],
+                "top_users": [
+                    {"$group": {"_id": {"$ifNull": ["$email", "unknown"]}, "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}},
+                    {"$limit": 15}
+                ],
+            }}
+        ]
+
+        result = await self.grants.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+
+        timeline = {"urgent": 0, "week": 0, "month": 0, "later": 0}
+        for bucket in facets.get("timeline", []):
+            timeline[bucket["_id"]] = bucket["count"]
+
         return {
-            "total_active": len(active_grants),
+            "total_active": sum(timeline.values()),
             "timeline": timeline,
-            "top_folders": top_folders,
-            "top_users": top_users
+            "top_folders": [
+                {"name": f["_id"]["name"], "id": f["_id"]["id"], "count": f["count"]}
+                for f in facets.get("top_folders", [])
+            ],
+            "top_users": [(u["_id"], u["count"]) for u in facets.get("top_users", [])]
         }
 
+    # --- Job Queue ---
+    # Documents in `jobs` are claimed with a lease (lease_owner/lease_until);
+    # every state change after the claim is conditional on still holding it.
+    async def enqueue_job(self, doc):
+        """Insert a job. Returns (job, created); the queued or running job
+        is returned when its idempotency_key is already taken."""
+        for _ in range(2):
+            try:
+                result = await self.jobs.insert_one(doc)
+                doc["_id"] = result.inserted_id
+                return doc, True
+            except DuplicateKeyError:
+                existing = await self.jobs.find_one({"idempotency_key": doc["idempotency_key"]})
+                if existing:
+                    return existing, False
+                # The holder settled (and released the key) in between — try again
+        return None, False
+
+    async def claim_job(self, worker_id, lease_seconds):
+        """Lease the oldest runnable job: queued and due, or running with a lapsed lease."""
+        now = time.time()
+        return await self.jobs.find_one_and_update(
+            {"$or": [
+                {"status": "queued", "run_after": {"$lte": now}},
+                {"status": "running", "lease_until": {"$lt": now}},
+            ]},
+            {"$set": {"status": "running", "lease_owner": worker_id,
+                      "lease_until": now + lease_seconds, "started_at": now, "updated_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def update_leased_job(self, job_id, worker_id, fields, inc=None):
+        """Apply an update only while `worker_id` holds the lease. Returns False if it was lost."""
+        update = {"$set": {**fields, "updated_at": time.time()}}
+        if inc:
+            update["$inc"] = inc
+        result = await self.jobs.update_one(
+            {"_id": job_id, "status": "running", "lease_owner": worker_id}, update
+        )
+        return result.matched_count > 0
+
+    # --- Bulk Import Jobs ---
+    # One document per Drive import run; the runner checkpoints into it
+    # after every chunk so a restarted bot can pick the job back up.
+    async def get_active_grant_keys(self, folder_ids):
+        """{(folder_id, email)} of active grants across many folders — one $in query."""
+        cursor = self.grants.find(
+            {"status": "active", "folder_id": {"$in": list(folder_ids)}},
+            {"_id": 0, "folder_id": 1, "email": 1}
+        )
+        return {(g["folder_id"], g["email"]) async for g in cursor}
+
+    async def create_import_job(self, doc):
+        result = await self.import_jobs.insert_one(doc)
+        doc["_id"] = result.inserted_id
+        return doc
+
+    async def save_import_job(self, job_id, fields):
+        fields = {**fields, "updated_at": time.time()}
+        await self.import_jobs.update_one({"_id": job_id}, {"$set": fields})
+
+    async def get_running_import_jobs(self):
+        return await self.import_jobs.find({"status": "running"}).to_list(length=None)
+
+    async def get_latest_import_job(self):
+        return await self.import_jobs.find_one({}, sort=[("started_at", -1)])
+
     # --- Google Drive OAuth Credentials ---
     async def save_gdrive_creds(self, user_id: int, creds_json: str):
         """Save OAuth2 credentials for a user."""
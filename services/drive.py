@@ -7,13 +7,20 @@ Uses a Render-compatible redirect URI approach:
 
 import os
 import asyncio
+import datetime
 import json
 import logging
-from httplib2 import Http
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from httplib2 import Http, HttpLib2Error
 from oauth2client.client import OAuth2WebServerFlow, FlowExchangeError, OAuth2Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from services.rate_limiter import TokenBucket, AdaptiveConcurrency, backoff_delay
+from services.drive_pool import DrivePool
+
 LOGGER = logging.getLogger(__name__)
 
 OAUTH_SCOPE = [
@@ -25,6 +32,39 @@ OAUTH_SCOPE = [
 # Pending OAuth flows: {user_id: flow}
 _pending_flows: dict = {}
 
+# Built Drive clients: {("user", user_id) | ("service_account",): {"service": ..., "creds": ...}}
+_service_cache: dict = {}
+_service_cache_stats = {"hits": 0, "misses": 0, "refreshes": 0, "invalidations": 0}
+
+TOKEN_REFRESH_MARGIN = 300  # refresh OAuth tokens 5 min before they expire
+
+BATCH_MAX_SIZE = 100       # Drive batch endpoint limit per HTTP request
+BATCH_MAX_RETRIES = 5      # retry rounds for failed sub-requests
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Drive allows 12,000 queries/min per user; stay at half that so sharing
+# writes (which Google limits separately) have headroom
+DRIVE_QPS = float(os.getenv("DRIVE_QPS", "100"))
+DRIVE_BURST = int(os.getenv("DRIVE_BURST", "200"))
+DRIVE_CONCURRENCY = 10      # starting number of Drive calls in flight
+DRIVE_MIN_CONCURRENCY = 2
+DRIVE_MAX_CONCURRENCY = 32
+DRIVE_MAX_RETRIES = 5       # retries per single call on 429 / 5xx / rateLimitExceeded
+# Threads for blocking Drive calls: one per concurrency slot, plus a few so
+# token refreshes and client builds never queue behind a full set of calls
+DRIVE_POOL_EXTRA_THREADS = 4
+# "googleapiclient" (threads) or "aiohttp" (native asyncio, needs aiohttp installed)
+DRIVE_TRANSPORT = os.getenv("DRIVE_TRANSPORT", "googleapiclient").lower()
+NO_CREDENTIALS_ERROR = "no Drive credentials"
+
+FOLDER_MIME = "application/vnd.google-apps.folder"
+# Pickers only ever use id + name; permissions are fetched per folder on demand (get_permissions)
+FOLDER_FIELDS = "id, name"
+FOLDER_PAGE_SIZE = 1000  # files.list maximum
+
+PERMISSION_CACHE_TTL = 300  # seconds a folder's permission map is trusted
+PERMISSION_CACHE_SIZE = 5000  # folders kept in the permission index
+
 
 def _get_redirect_uri():
     """
@@ -62,8 +102,9 @@ async def finish_auth_with_code(user_id: int, code: str, db) -> bool:
     if not flow:
         return False
     try:
-        creds = flow.step2_exchange(code)
+        creds = await drive_pool.run(flow.step2_exchange, code)
         await db.save_gdrive_creds(user_id, creds.to_json())
+        invalidate_user_service(user_id)
         LOGGER.info(f"✅ OAuth success for user {user_id}")
         return True
     except FlowExchangeError as e:
@@ -75,26 +116,261 @@ def has_pending_flow(user_id: int) -> bool:
     return user_id in _pending_flows
 
 
+class _ThreadLocalHttp:
+    """
+    Shareable stand-in for an authorized httplib2.Http.
+    httplib2.Http is not thread-safe, so every executor thread gets its own
+    authorized instance while the cached service object is shared.
+    """
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self._local = threading.local()
+
+    def _http(self):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            if isinstance(self.credentials, OAuth2Credentials):
+                http = self.credentials.authorize(Http())
+            else:
+                from google_auth_httplib2 import AuthorizedHttp
+                http = AuthorizedHttp(self.credentials, http=Http())
+            self._local.http = http
+        return http
+
+    def request(self, *args, **kwargs):
+        return self._http().request(*args, **kwargs)
+
+
+def _build_service(creds):
+    return build("drive", "v3", http=_ThreadLocalHttp(creds), cache_discovery=False)
+
+
+def _token_expiring(creds) -> bool:
+    """True if the access token is expired or expires within TOKEN_REFRESH_MARGIN."""
+    if creds.access_token_expired:
+        return True
+    expiry = getattr(creds, "token_expiry", None)
+    if expiry is None:
+        return False
+    return expiry - datetime.datetime.utcnow() < datetime.timedelta(seconds=TOKEN_REFRESH_MARGIN)
+
+
+def invalidate_user_service(user_id: int = None):
+    """Drop cached Drive clients — one user's, or all of them when user_id is None."""
+    if user_id is None:
+        dropped = len(_service_cache)
+        _service_cache.clear()
+        _building.clear()
+    else:
+        dropped = 1 if _service_cache.pop(("user", user_id), None) else 0
+        _building.pop(("user", user_id), None)  # an in-flight build must not re-cache old creds
+    _service_cache_stats["invalidations"] += dropped
+
+
+def get_service_cache_stats() -> dict:
+    """Hit/miss counters for the Drive client cache."""
+    lookups = _service_cache_stats["hits"] + _service_cache_stats["misses"]
+    return {
+        **_service_cache_stats,
+        "cached": len(_service_cache),
+        "hit_rate": round(_service_cache_stats["hits"] / lookups, 3) if lookups else 0.0,
+    }
+
+
+class PermissionIndex:
+    """
+    folder_id -> {email -> (permission_id, role)} built from permissions.list
+    responses and kept current by every grant / remove / role change we make.
+    Entries expire after PERMISSION_CACHE_TTL to pick up changes made in Drive,
+    and at most PERMISSION_CACHE_SIZE folders are held.
+    """
+
+    def __init__(self, ttl=PERMISSION_CACHE_TTL, max_folders=PERMISSION_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_folders = max_folders
+        # folder_id -> {"at": ts, "perms": {email: (id, role)}}, oldest load first
+        self._folders: dict = {}
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def load(self, folder_id, permissions):
+        now = time.time()
+        self._folders.pop(folder_id, None)
+        # Loads append in time order, so expired and over-cap entries sit at the front
+        while self._folders:
+            oldest = next(iter(self._folders))
+            if now - self._folders[oldest]["at"] < self.ttl and len(self._folders) < self.max_folders:
+                break
+            del self._folders[oldest]
+            self._stats["evictions"] += 1
+        self._folders[folder_id] = {
+            "at": now,
+            "perms": {
+                p["emailAddress"].lower(): (p["id"], p.get("role"))
+                for p in permissions if p.get("emailAddress")
+            },
+        }
+
+    def get(self, folder_id):
+        """Fresh {email: (permission_id, role)} map, or None on miss/expiry."""
+        entry = self._folders.get(folder_id)
+        if entry and time.time() - entry["at"] < self.ttl:
+            self._stats["hits"] += 1
+            return entry["perms"]
+        self._stats["misses"] += 1
+        self._folders.pop(folder_id, None)
+        return None
+
+    def set(self, folder_id, email, permission_id, role):
+        # Only patch folders we hold a full listing for — a partial map would hide other users
+        entry = self._folders.get(folder_id)
+        if entry:
+            entry["perms"][email.lower()] = (permission_id, role)
+
+    def discard(self, folder_id, email):
+        entry = self._folders.get(folder_id)
+        if entry:
+            entry["perms"].pop(email.lower(), None)
+
+    def invalidate(self, folder_id=None):
+        if folder_id is None:
+            self._folders.clear()
+        else:
+            self._folders.pop(folder_id, None)
+
+    def get_stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "folders": len(self._folders),
+            "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
+
+
+permission_index = PermissionIndex()
+
+drive_rate_limiter = TokenBucket(DRIVE_QPS, DRIVE_BURST)
+drive_concurrency = AdaptiveConcurrency(DRIVE_CONCURRENCY, DRIVE_MIN_CONCURRENCY, DRIVE_MAX_CONCURRENCY)
+
+
+drive_pool = DrivePool(DRIVE_MAX_CONCURRENCY + DRIVE_POOL_EXTRA_THREADS)
+
+# user_id -> in-flight refresh, so concurrent callers share one token request
+_refreshing: dict = {}
+# cache key -> in-flight client build, so concurrent cache misses share one load/refresh/build
+_building: dict = {}
+
+
+def get_rate_limit_stats() -> dict:
+    """Token bucket and AIMD concurrency counters for /metrics."""
+    return {"bucket": drive_rate_limiter.get_stats(), "concurrency": drive_concurrency.get_stats()}
+
+
+async def _do_refresh(user_id: int, creds, db):
+    # The token request is blocking HTTP — keep it off the event loop
+    await drive_pool.run(creds.refresh, Http())
+    await db.save_gdrive_creds(user_id, creds.to_json())
+    _service_cache_stats["refreshes"] += 1
+    LOGGER.info(f"🔄 Refreshed token for user {user_id}")
+
+
+async def _refresh_user_creds(user_id: int, creds, db):
+    pending = _refreshing.get(user_id)
+    if pending:
+        return await asyncio.shield(pending)
+    fut = asyncio.ensure_future(_do_refresh(user_id, creds, db))
+    _refreshing[user_id] = fut
+    try:
+        return await fut
+    finally:
+        _refreshing.pop(user_id, None)
+
+
+def _make_token_getter(creds, user_id, db):
+    """Bearer-token source for the async transport, refreshing like the threaded path does."""
+    async def get_token(force=False):
+        if isinstance(creds, OAuth2Credentials):
+            if force or _token_expiring(creds):
+                await _refresh_user_creds(user_id, creds, db)
+            return creds.access_token
+        if force or not creds.valid:
+            from google_auth_httplib2 import Request
+            await drive_pool.run(creds.refresh, Request(Http()))
+        return creds.token
+    return get_token
+
+
+async def _new_service(creds, db, user_id=None):
+    """
+    Build a Drive client off the loop. The async transport's token getter
+    travels on the service object itself, so a caller holding a service
+    can still authenticate after its cache entry is replaced or dropped.
+    """
+    service = await drive_pool.run(_build_service, creds)
+    service.drive_token_getter = _make_token_getter(creds, user_id, db)
+    return service
+
+
 async def get_user_service(user_id: int, db):
-    """Build Drive service for a specific user from stored credentials."""
+    """
+    Drive service for a specific user from stored credentials.
+    Built once per user and cached; the token is refreshed in place shortly
+    before it expires, so cached clients never go stale.
+    """
+    key = ("user", user_id)
+    entry = _service_cache.get(key)
+    if entry:
+        _service_cache_stats["hits"] += 1
+        if _token_expiring(entry["creds"]):
+            try:
+                await _refresh_user_creds(user_id, entry["creds"], db)
+            except Exception as e:
+                LOGGER.error(f"Token refresh failed for {user_id}: {e}")
+                invalidate_user_service(user_id)
+                return None
+        return entry["service"]
+
+    _service_cache_stats["misses"] += 1
+    pending = _building.get(key)
+    if pending:
+        built = await asyncio.shield(pending)
+        return built[0] if built else None
+    fut = asyncio.ensure_future(_build_user_service(user_id, db))
+    _building[key] = fut
+    try:
+        built = await asyncio.shield(fut)
+        if built and _building.get(key) is fut:
+            _service_cache[key] = {"service": built[0], "creds": built[1]}
+        return built[0] if built else None
+    finally:
+        if _building.get(key) is fut:
+            del _building[key]
+
+
+async def _build_user_service(user_id: int, db):
+    """Load, refresh and build a user's client. Returns (service, creds) or None."""
     creds_json = await db.get_gdrive_creds(user_id)
     if not creds_json:
         return None
     try:
         creds = OAuth2Credentials.from_json(creds_json)
-        if creds.access_token_expired:
-            creds.refresh(Http())
-            await db.save_gdrive_creds(user_id, creds.to_json())
-            LOGGER.info(f"🔄 Refreshed token for user {user_id}")
-        return build("drive", "v3", credentials=creds, cache_discovery=False)
+        if _token_expiring(creds):
+            await _refresh_user_creds(user_id, creds, db)
+        service = await _new_service(creds, db, user_id)
     except Exception as e:
         LOGGER.error(f"Failed to build Drive service for {user_id}: {e}")
         return None
+    return service, creds
 
 
 class DriveService:
     def __init__(self):
         self._admin_user_id = None
+        self._transport = None
+        if DRIVE_TRANSPORT == "aiohttp":
+            from services.drive_async import AsyncDriveTransport
+            self._transport = AsyncDriveTransport(max_connections=DRIVE_MAX_CONCURRENCY)
+            LOGGER.info(f"🌐 Drive transport: aiohttp ({self._transport.base_url})")
 
     def set_admin_user(self, user_id: int):
         self._admin_user_id = user_id
@@ -107,67 +383,242 @@ class DriveService:
 
         google_creds_env = os.getenv("GOOGLE_CREDENTIALS")
         if google_creds_env:
+            key = ("service_account",)
+            entry = _service_cache.get(key)
+            if entry:
+                # google-auth credentials refresh themselves before each request
+                _service_cache_stats["hits"] += 1
+                return entry["service"]
+            _service_cache_stats["misses"] += 1
             try:
                 from google.oauth2 import service_account
                 info = json.loads(google_creds_env)
                 creds = service_account.Credentials.from_service_account_info(
                     info, scopes=["https://www.googleapis.com/auth/drive"]
                 )
-                return build("drive", "v3", credentials=creds, cache_discovery=False)
+                service = await _new_service(creds, db)
+                _service_cache[key] = {"service": service, "creds": creds}
+                return service
             except Exception as e:
                 LOGGER.error(f"Service account auth failed: {e}")
 
         LOGGER.error("No valid Drive credentials available.")
         return None
 
-    _semaphore = None
     _mem_folders: list = []       # in-process RAM cache
     _mem_cache_at: float = 0.0    # when it was cached
     _mem_cache_ttl: int = 300     # 5 min RAM TTL
 
-    def _get_semaphore(self):
-        if DriveService._semaphore is None:
-            DriveService._semaphore = asyncio.Semaphore(10)
-        return DriveService._semaphore
-
     async def _run_async(self, func, *args, **kwargs):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, lambda: func(*args, **kwargs))
-
-    async def _throttled_call(self, func, *args, **kwargs):
-        async with self._get_semaphore():
-            return await self._run_async(func, *args, **kwargs)
-
-    def _list_folders_sync(self, service, page_token=None):
-        query = "mimeType = 'application/vnd.google-apps.folder' and trashed = false"
-        results = service.files().list(
-            q=query, pageSize=100,
-            fields="nextPageToken, files(id, name, owners, permissions)",
-            pageToken=page_token
-        ).execute()
+        return await drive_pool.run(func, *args, **kwargs)
+
+    async def _throttled_call(self, func, *args, cost=1, retry=True, **kwargs):
+        """Run a blocking Drive call on the pool through _limited()."""
+        return await self._limited(lambda: self._run_async(func, *args, **kwargs), cost, retry)
+
+    async def _async_call(self, service, op, *args, **kwargs):
+        """Run an AsyncDriveTransport operation as `service`'s credentials, through _limited()."""
+        return await self._limited(lambda: op(service.drive_token_getter, *args, **kwargs))
+
+    def get_transport_stats(self) -> dict:
+        if self._transport is None:
+            return {"transport": "googleapiclient"}
+        return {"transport": "aiohttp", **self._transport.get_stats()}
+
+    async def close(self):
+        if self._transport is not None:
+            await self._transport.close()
+
+    async def _limited(self, call, cost=1, retry=True):
+        """
+        Await `call()` under the rate limiter and the adaptive concurrency
+        limit. Throttling and transient errors are retried with jittered
+        exponential backoff (honouring Retry-After); anything else, or the
+        last failure, is raised to the caller.
+        cost: quota units the call uses (sub-requests in a batch).
+        retry: False for batches, which retry their own failed sub-requests —
+        replaying a whole batch could re-send applied creates and their emails.
+        """
+        for attempt in range(DRIVE_MAX_RETRIES + 1):
+            await drive_concurrency.acquire()
+            try:
+                await drive_rate_limiter.acquire(cost)
+                result = await call()
+            except Exception as error:
+                if not retry or attempt == DRIVE_MAX_RETRIES or not self._is_transient(error):
+                    raise
+                delay = self._backoff_after(error, attempt)
+                LOGGER.warning(
+                    f"🔁 Drive call throttled/failed ({self._http_status(error) or type(error).__name__}), "
+                    f"retry {attempt + 1}/{DRIVE_MAX_RETRIES} in {delay:.1f}s"
+                )
+            else:
+                drive_concurrency.on_success()
+                return result
+            finally:
+                await drive_concurrency.release()
+            await asyncio.sleep(delay)
+
+    _FOLDER_LIST_PARAMS = {
+        "q": f"mimeType = '{FOLDER_MIME}' and trashed = false",
+        "pageSize": FOLDER_PAGE_SIZE,
+        "fields": f"nextPageToken, files({FOLDER_FIELDS})",
+    }
+    _CHANGES_PARAMS = {
+        "pageSize": 1000, "spaces": "drive", "includeRemoved": True,
+        "fields": f"nextPageToken, newStartPageToken, "
+                  f"changes(fileId, removed, file(mimeType, trashed, {FOLDER_FIELDS}))",
+    }
+
+    async def _files_list(self, service, **params):
+        """files.list on whichever transport is configured."""
+        if self._transport is None:
+            return await self._throttled_call(lambda: service.files().list(**params).execute())
+        return await self._async_call(service, self._transport.list_files, **params)
+
+    async def _list_folders(self, service, page_token=None):
+        results = await self._files_list(service, pageToken=page_token, **self._FOLDER_LIST_PARAMS)
         return results.get("files", []), results.get("nextPageToken")
 
-    async def list_folders(self, db):
+    def _get_start_page_token_sync(self, service):
+        return service.changes().getStartPageToken().execute()["startPageToken"]
+
+    async def _get_start_page_token(self, service):
+        if self._transport is None:
+            return await self._throttled_call(self._get_start_page_token_sync, service)
+        return await self._async_call(service, self._transport.get_start_page_token)
+
+    def _list_changes_sync(self, service, page_token):
+        results = service.changes().list(pageToken=page_token, **self._CHANGES_PARAMS).execute()
+        return self._unpack_changes(results)
+
+    async def _list_changes(self, service, page_token):
+        if self._transport is None:
+            return await self._throttled_call(self._list_changes_sync, service, page_token)
+        results = await self._async_call(service, self._transport.list_changes, page_token, **self._CHANGES_PARAMS)
+        return self._unpack_changes(results)
+
+    @staticmethod
+    def _unpack_changes(results):
+        return (
+            results.get("changes", []),
+            results.get("nextPageToken"),
+            results.get("newStartPageToken"),
+        )
+
+    async def iter_folder_pages(self, db, page_token=None):
+        """
+        Async generator yielding (page_token, folders, next_token) per page,
+        starting at `page_token` (None = first page) so a caller can resume.
+        The next page is requested as soon as its token is known, so it
+        downloads and decodes while the caller is still processing this one.
+        """
         service = await self._get_service(db)
         if not service:
-            return []
+            return
+        fetch = asyncio.ensure_future(self._list_folders(service, page_token))
+        total = 0
         try:
-            all_folders = []
-            page_token = None
-            while True:
-                folders, next_token = await self._throttled_call(
-                    self._list_folders_sync, service, page_token
+            while fetch is not None:
+                folders, next_token = await fetch
+                fetch = (
+                    asyncio.ensure_future(self._list_folders(service, next_token))
+                    if next_token else None
                 )
-                all_folders.extend(folders)
-                LOGGER.info(f"📂 Fetched {len(folders)} folders (total so far: {len(all_folders)})")
-                if not next_token:
-                    break
+                total += len(folders)
+                LOGGER.info(f"📂 Fetched {len(folders)} folders (total so far: {total})")
+                yield page_token, folders, next_token
                 page_token = next_token
-            return all_folders
+        finally:
+            if fetch is not None and not fetch.done():
+                fetch.cancel()
+
+    async def iter_folders(self, db):
+        """Async generator yielding folders page by page."""
+        async for _, folders, _ in self.iter_folder_pages(db):
+            yield folders
+
+    async def list_folders(self, db):
+        try:
+            return [f async for page in self.iter_folders(db) for f in page]
         except HttpError as error:
             LOGGER.error(f"list_folders error: {error}")
             return []
 
+    async def _full_folder_scan(self, db):
+        """List every folder. The changes token is taken first so nothing slips between."""
+        service = await self._get_service(db)
+        if not service:
+            return [], None
+        try:
+            token = await self._get_start_page_token(service)
+        except HttpError as error:
+            LOGGER.error(f"getStartPageToken error: {error}")
+            token = None
+        return await self.list_folders(db), token
+
+    async def _apply_folder_changes(self, db, folders, token):
+        """
+        Replay Drive changes since `token` onto a cached folder list.
+        Returns (folders, new_token), or None if the token is no longer valid.
+        """
+        service = await self._get_service(db)
+        if not service:
+            return None
+        by_id = {f["id"]: f for f in folders}
+        applied = 0
+        try:
+            while True:
+                changes, next_token, new_start = await self._list_changes(service, token)
+                for change in changes:
+                    file = change.get("file") or {}
+                    if change.get("removed") or file.get("trashed"):
+                        applied += by_id.pop(change["fileId"], None) is not None
+                    elif file.get("mimeType") == FOLDER_MIME:
+                        file.pop("mimeType", None)
+                        file.pop("trashed", None)
+                        by_id[file["id"]] = file   # create, rename or move
+                        applied += 1
+                if next_token:
+                    token = next_token
+                    continue
+                token = new_start
+                break
+        except HttpError as error:
+            if getattr(error.resp, "status", None) in (400, 404, 410):
+                LOGGER.warning(f"⚠️ Changes token rejected ({error.resp.status}) — full rescan needed")
+                return None
+            raise
+        LOGGER.info(f"🔁 Incremental folder sync: {applied} folder change(s) applied")
+        return list(by_id.values()), token
+
+    async def refresh_folders(self, db):
+        """
+        Bring the folder cache up to date: replay the Changes feed since the
+        stored startPageToken, or do a full scan when there is no usable token.
+        """
+        doc = await db.get_folder_cache_doc()
+        result = None
+        if doc and doc.get("changes_token"):
+            try:
+                result = await self._apply_folder_changes(db, doc.get("folders", []), doc["changes_token"])
+            except HttpError as error:
+                LOGGER.error(f"Incremental folder sync failed: {error}")
+                return doc.get("folders", [])
+        if result is None:
+            LOGGER.info("🔄 Fetching ALL folders from Drive API (full scan)...")
+            result = await self._full_folder_scan(db)
+
+        folders, token = result
+        # Older cache docs carried owners/permissions per folder — keep only what the UI uses
+        folders = [{"id": f["id"], "name": f.get("name", "")} for f in folders]
+        if folders:
+            DriveService._mem_folders = folders
+            DriveService._mem_cache_at = time.time()
+            await db.set_cached_folders(folders, changes_token=token)
+            LOGGER.info(f"💾 Cached {len(folders)} folders (RAM + MongoDB)")
+        return folders
+
     async def get_folders_cached(self, db, force_refresh=False):
         import time as _time
 
@@ -188,15 +639,8 @@ class DriveService:
                 DriveService._mem_cache_at = _time.time()
                 return cached
 
-        # Layer 3: Drive API (slowest — only on cache miss/expiry)
-        LOGGER.info("🔄 Fetching ALL folders from Drive API (cache miss)...")
-        folders = await self.list_folders(db)
-        if folders:
-            DriveService._mem_folders = folders
-            DriveService._mem_cache_at = _time.time()
-            await db.set_cached_folders(folders)
-            LOGGER.info(f"💾 Cached {len(folders)} folders (RAM + MongoDB)")
-        return folders
+        # Layer 3: Drive API — incremental via the Changes feed, full scan only without a valid token
+        return await self.refresh_folders(db)
 
     def _grant_access_sync(self, service, folder_id, email, role):
         user_permission = {
@@ -210,6 +654,8 @@ class DriveService:
                 fields="id", sendNotificationEmail=True,
             ).execute()
         except HttpError as error:
+            if self._is_retryable(error):
+                raise  # _throttled_call backs off and retries
             LOGGER.error(f"grant_access error: {error}")
             return None
 
@@ -217,59 +663,512 @@ class DriveService:
         service = await self._get_service(db)
         if not service:
             return None
-        return await self._throttled_call(self._grant_access_sync, service, folder_id, email, role)
+        try:
+            if self._transport is None:
+                result = await self._throttled_call(self._grant_access_sync, service, folder_id, email, role)
+            else:
+                result = await self._async_call(
+                    service, self._transport.create_permission, folder_id,
+                    {"type": "user", "role": "writer" if role == "editor" else "reader", "emailAddress": email},
+                    fields="id", sendNotificationEmail=True,
+                )
+        except (HttpError, HttpLib2Error, OSError) as error:
+            LOGGER.error(f"grant_access error: {error}")
+            return None
+        if result:
+            permission_index.set(folder_id, email, result.get("id"), "writer" if role == "editor" else "reader")
+        return result
+
+    _PERMISSION_FIELDS = "permissions(id, role, type, emailAddress, displayName)"
 
     def _get_permissions_sync(self, service, folder_id):
-        try:
-            result = service.permissions().list(
-                fileId=folder_id,
-                fields="permissions(id, role, type, emailAddress, displayName)"
-            ).execute()
-            return result.get("permissions", [])
-        except HttpError as error:
-            LOGGER.error(f"get_permissions error: {error}")
-            return []
+        result = service.permissions().list(fileId=folder_id, fields=self._PERMISSION_FIELDS).execute()
+        return result.get("permissions", [])
+
+    async def _fetch_permissions(self, service, folder_id):
+        """permissions.list into the permission index. Raises once retries are exhausted."""
+        if self._transport is None:
+            perms = await self._throttled_call(self._get_permissions_sync, service, folder_id)
+        else:
+            perms = (await self._async_call(
+                service, self._transport.list_permissions, folder_id, fields=self._PERMISSION_FIELDS
+            )).get("permissions", [])
+        permission_index.load(folder_id, perms)
+        return perms
 
     async def get_permissions(self, folder_id, db):
+        """Live permission list for a folder (also refreshes the permission index)."""
         service = await self._get_service(db)
         if not service:
             return []
-        return await self._throttled_call(self._get_permissions_sync, service, folder_id)
+        try:
+            return await self._fetch_permissions(service, folder_id)
+        except (HttpError, HttpLib2Error, OSError) as error:
+            LOGGER.error(f"get_permissions error: {error}")
+            return []
+
+    async def get_access_map(self, folder_id, db):
+        """{email: (permission_id, role)} for a folder — served from the permission index when fresh."""
+        cached = permission_index.get(folder_id)
+        if cached is not None:
+            return cached
+        await self.get_permissions(folder_id, db)
+        return permission_index.get(folder_id) or {}
+
+    async def has_access(self, folder_id, email, db):
+        return email.lower() in await self.get_access_map(folder_id, db)
+
+    async def _find_permission(self, folder_id, email, db, fresh=False):
+        if fresh:
+            permission_index.invalidate(folder_id)
+        return (await self.get_access_map(folder_id, db)).get(email.lower())
 
     def _remove_access_sync(self, service, folder_id, permission_id):
+        """True on success, None if the permission id no longer exists, False on error."""
         try:
             service.permissions().delete(fileId=folder_id, permissionId=permission_id).execute()
             return True
         except HttpError as error:
+            if self._http_status(error) == 404:
+                return None
+            if self._is_retryable(error):
+                raise
+            LOGGER.error(f"remove_access error: {error}")
+            return False
+
+    async def _remove_permission(self, service, folder_id, permission_id):
+        """Same contract as _remove_access_sync, on either transport."""
+        try:
+            if self._transport is None:
+                return await self._throttled_call(self._remove_access_sync, service, folder_id, permission_id)
+            await self._async_call(service, self._transport.delete_permission, folder_id, permission_id)
+            return True
+        except (HttpError, HttpLib2Error, OSError) as error:
+            if self._http_status(error) == 404:
+                return None
             LOGGER.error(f"remove_access error: {error}")
             return False
 
-    async def remove_access(self, folder_id, email, db):
-        perms = await self.get_permissions(folder_id, db)
-        target = next((p for p in perms if p.get("emailAddress") == email), None)
-        if target:
-            service = await self._get_service(db)
-            return await self._throttled_call(self._remove_access_sync, service, folder_id, target["id"])
+    async def remove_access(self, folder_id, email, db, permission_id=None):
+        """
+        Remove a user's access to a folder.
+        With a stored permission_id this is a single delete; the email
+        lookup is only needed when that id comes back 404.
+        """
+        service = await self._get_service(db)
+        if not service:
+            return False
+        if permission_id:
+            result = await self._remove_permission(service, folder_id, permission_id)
+            if result is not None:
+                if result:
+                    permission_index.discard(folder_id, email)
+                return result
+            LOGGER.info(f"Stored permission id for {folder_id} is gone — looking up by email")
+
+        for fresh in (False, True):
+            target = await self._find_permission(folder_id, email, db, fresh=fresh)
+            if not target:
+                return True
+            result = await self._remove_permission(service, folder_id, target[0])
+            if result:
+                permission_index.discard(folder_id, email)
+                return True
+            if result is False:
+                return False
+            # cached id was stale (404) — retry once against a fresh listing
         return True
 
     async def change_role(self, folder_id, email, new_role, db):
-        perms = await self.get_permissions(folder_id, db)
-        target = next((p for p in perms if p.get("emailAddress") == email), None)
-        if target:
-            service = await self._get_service(db)
-            new_role_api = "writer" if new_role == "editor" else "reader"
+        service = await self._get_service(db)
+        new_role_api = "writer" if new_role == "editor" else "reader"
+        for fresh in (False, True):
+            target = await self._find_permission(folder_id, email, db, fresh=fresh)
+            if not target:
+                return False
             try:
-                await self._throttled_call(
-                    lambda: service.permissions().update(
-                        fileId=folder_id, permissionId=target["id"],
-                        body={"role": new_role_api}
-                    ).execute()
-                )
+                if self._transport is not None:
+                    await self._async_call(
+                        service, self._transport.update_permission, folder_id, target[0], {"role": new_role_api}
+                    )
+                else:
+                    await self._throttled_call(
+                        lambda: service.permissions().update(
+                            fileId=folder_id, permissionId=target[0],
+                            body={"role": new_role_api}
+                        ).execute()
+                    )
+                permission_index.set(folder_id, email, target[0], new_role_api)
                 return True
             except Exception as e:
                 LOGGER.error(f"change_role error: {e}")
-                return False
         return False
+
+    async def backfill_grant_permission_ids(self, db):
+        """
+        One-off migration: look up and store the Drive permission id on
+        active grants created before ids were recorded. Folders are read
+        through the permission index, concurrently under the Drive rate limiter.
+        Returns the number of ids stored, or None if no Drive credentials
+        were available or any folder's permissions could not be listed
+        (those grants were not checked, so the pass should run again).
+        """
+        service = await self._get_service(db)
+        if not service:
+            LOGGER.info("🧩 Permission id backfill postponed: no Drive credentials")
+            return None
+
+        async def access_map(folder_id):
+            cached = permission_index.get(folder_id)
+            if cached is not None:
+                return cached
+            try:
+                await self._fetch_permissions(service, folder_id)
+            except HttpError as error:
+                if self._http_status(error) != 404:
+                    raise
+                return {}  # folder is gone — its grants really are missing
+            return permission_index.get(folder_id) or {}
+
+        after_id, filled, missing, unchecked = None, 0, 0, 0
+        failed_folders = set()
+        while True:
+            grants = await db.get_grants_missing_permission_id(after_id=after_id)
+            if not grants:
+                break
+            after_id = grants[-1]["_id"]
+            folder_ids = list({g["folder_id"] for g in grants})
+            maps = await asyncio.gather(*(access_map(fid) for fid in folder_ids), return_exceptions=True)
+            access = {}
+            for fid, m in zip(folder_ids, maps):
+                if isinstance(m, Exception):
+                    LOGGER.warning(f"🧩 Permission id backfill could not list {fid}: {m}")
+                    failed_folders.add(fid)
+                else:
+                    access[fid] = m
+            updates = {}
+            for g in grants:
+                if g["folder_id"] not in access:
+                    unchecked += 1
+                    continue
+                found = access[g["folder_id"]].get(g["email"].lower())
+                if found:
+                    updates[g["_id"]] = found[0]
+                else:
+                    missing += 1
+            filled += await db.set_grant_permission_ids(updates)
+        if filled or missing:
+            LOGGER.info(f"🧩 Permission id backfill: {filled} stored, {missing} not found on Drive")
+        if failed_folders:
+            LOGGER.warning(
+                f"🧩 Permission id backfill incomplete: {len(failed_folders)} folder(s) could not be listed, "
+                f"{unchecked} grant(s) left for the next run"
+            )
+            return None
+        return filled
+
+    # ── Batched permission operations ───────────────────
+
+    @staticmethod
+    def _rate_limit_exceeded(error) -> bool:
+        """403 whose body names rateLimitExceeded / userRateLimitExceeded."""
+        if getattr(error.resp, "status", 0) != 403:
+            return False
+        content = error.content.decode("utf-8", "ignore") if isinstance(error.content, bytes) else str(error.content)
+        return "ratelimitexceeded" in content.lower()
+
+    @classmethod
+    def _is_retryable(cls, error) -> bool:
+        if not isinstance(error, HttpError):
+            return True  # transport-level failure of the whole batch
+        return getattr(error.resp, "status", 0) in RETRYABLE_STATUSES or cls._rate_limit_exceeded(error)
+
+    @classmethod
+    def _is_transient(cls, error) -> bool:
+        """Worth retrying a single call: throttling, 5xx, or a dropped connection."""
+        if isinstance(error, HttpError):
+            return cls._is_retryable(error)
+        return isinstance(error, (HttpLib2Error, OSError))
+
+    @classmethod
+    def _is_throttle(cls, error) -> bool:
+        """Google telling us to slow down (as opposed to a 5xx)."""
+        if not isinstance(error, HttpError):
+            return False
+        return getattr(error.resp, "status", 0) == 429 or cls._rate_limit_exceeded(error)
+
+    @staticmethod
+    def _retry_after(error):
+        """Seconds from a Retry-After header (delta or HTTP date), or None."""
+        resp = getattr(error, "resp", None)
+        value = resp.get("retry-after") if hasattr(resp, "get") else None
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff_after(self, error, attempt) -> float:
+        """Feed a failure to the limiters and return how long to wait before retrying."""
+        retry_after = self._retry_after(error)
+        if self._is_throttle(error):
+            drive_concurrency.on_throttle()
+        if retry_after:
+            drive_rate_limiter.pause(retry_after)
+        return backoff_delay(attempt, retry_after)
+
+    @staticmethod
+    def _http_status(error):
+        return getattr(getattr(error, "resp", None), "status", None)
+
+    def _run_batch_round_sync(self, service, calls: dict) -> dict:
+        """
+        One pass of {key: request_factory} through the Drive batch endpoint,
+        BATCH_MAX_SIZE sub-requests per HTTP request.
+        Returns {key: (response, error)}.
+        """
+        results = {}
+        keys = list(calls)
+        for start in range(0, len(keys), BATCH_MAX_SIZE):
+            chunk = keys[start:start + BATCH_MAX_SIZE]
+
+            def _callback(request_id, response, exception, _chunk=chunk):
+                results[_chunk[int(request_id)]] = (response, exception)
+
+            batch = service.new_batch_http_request(callback=_callback)
+            for i, key in enumerate(chunk):
+                batch.add(calls[key](), request_id=str(i))
+            try:
+                batch.execute()
+            except Exception as e:
+                LOGGER.error(f"Batch request failed: {e}")
+                for key in chunk:
+                    results[key] = (None, e)
+        return results
+
+    async def _run_batch(self, service, calls: dict) -> dict:
+        """
+        Execute {key: request_factory} through the batch endpoint, retrying
+        only the sub-requests that failed with a retryable error. Each round
+        takes its own concurrency slot and quota tokens, so the backoff
+        between rounds holds neither.
+        Returns {key: (response, error)}.
+        """
+        results = {}
+        pending = dict(calls)
+        delay = 0.0
+
+        for attempt in range(BATCH_MAX_RETRIES + 1):
+            if not pending:
+                break
+            if attempt:
+                LOGGER.warning(
+                    f"🔁 Retrying {len(pending)} failed batch sub-request(s) "
+                    f"(round {attempt}) in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+            results.update(await self._throttled_call(
+                self._run_batch_round_sync, service, pending, cost=len(pending), retry=False
+            ))
+            pending = {
+                key: calls[key] for key in pending
+                if results[key][1] is not None and self._is_retryable(results[key][1])
+            }
+            if pending:
+                # One backoff for the whole round, driven by its worst error
+                delay = max(self._backoff_after(results[key][1], attempt) for key in pending)
+
+        return results
+
+    async def _resolve_permission_ids(self, service, items):
+        """Fill in missing permission ids with one permissions.list per distinct folder."""
+        folder_ids = sorted({it["folder_id"] for it in items if not it.get("permission_id")})
+        if not folder_ids:
+            return {}
+        listed = await self._run_batch(service, {
+            fid: (lambda fid=fid: service.permissions().list(
+                fileId=fid, fields="permissions(id, role, type, emailAddress)"
+            )) for fid in folder_ids
+        })
+        lookup = {}
+        for fid, (response, error) in listed.items():
+            if error is not None:
+                lookup[fid] = error
+                continue
+            lookup[fid] = {
+                p["emailAddress"].lower(): p["id"]
+                for p in response.get("permissions", []) if p.get("emailAddress")
+            }
+        return lookup
+
+    async def _batch_permission_chunk(self, service, items, make_request, missing_ok):
+        """
+        Shared body of batch_remove / batch_update_role.
+        Items that arrive with a permission_id are sent as-is; if that id
+        comes back 404 they are resolved by email and sent once more.
+        """
+        out = [{**it, "ok": False, "error": None} for it in items]
+        todo = list(range(len(out)))
+
+        for attempt in range(2):
+            lookup = await self._resolve_permission_ids(service, [out[i] for i in todo])
+            calls = {}
+            for i in todo:
+                it = out[i]
+                if not it.get("permission_id"):
+                    found = lookup.get(it["folder_id"])
+                    if isinstance(found, Exception):
+                        it["error"] = str(found)
+                        continue
+                    perm_id = found.get(it["email"].lower())
+                    if not perm_id:
+                        it["ok"] = missing_ok
+                        it["error"] = None if missing_ok else "permission not found"
+                        continue
+                    it["permission_id"] = perm_id
+                    it["_resolved"] = True
+                calls[i] = (lambda it=it: make_request(it))
+
+            stale = []
+            for i, (_, error) in (await self._run_batch(service, calls)).items():
+                if error is None:
+                    out[i]["ok"] = True
+                elif self._http_status(error) == 404 and not out[i].get("_resolved") and attempt == 0:
+                    out[i]["permission_id"] = None   # stored id is gone — look it up by email
+                    stale.append(i)
+                elif missing_ok and self._http_status(error) == 404:
+                    out[i]["ok"] = True
+                else:
+                    out[i]["error"] = str(error)
+            if not stale:
+                break
+            todo = stale
+
+        for it in out:
+            it.pop("_resolved", None)
+        return out
+
+    async def _batch_permission_op(self, service, items, make_request, missing_ok):
+        """Run _batch_permission_chunk over BATCH_MAX_SIZE chunks concurrently under the rate limiter."""
+        parts = await asyncio.gather(*(
+            self._batch_permission_chunk(service, items[i:i + BATCH_MAX_SIZE], make_request, missing_ok)
+            for i in range(0, len(items), BATCH_MAX_SIZE)
+        ))
+        return [res for part in parts for res in part]
+
+    async def batch_grant(self, items, role, db, send_notification=True, on_progress=None):
+        """
+        Grant `role` on many (folder_id, email) pairs in as few HTTP round trips as possible.
+        Chunks of BATCH_MAX_SIZE run concurrently under the API rate limiter.
+        items: list of {"folder_id": ..., "email": ...}
+        on_progress: optional callable(n) invoked as each chunk completes.
+        Returns one result per item, in input order:
+        {**item, "ok": bool, "permission_id": str | None, "error": str | None}
+        """
+        if not items:
+            return []
+        service = await self._get_service(db)
+        if not service:
+            return [{**it, "ok": False, "permission_id": None, "error": NO_CREDENTIALS_ERROR} for it in items]
+        api_role = "writer" if role == "editor" else "reader"
+
+        async def _chunk(chunk):
+            calls = {
+                i: (lambda it=it: service.permissions().create(
+                    fileId=it["folder_id"],
+                    body={"type": "user", "role": api_role, "emailAddress": it["email"]},
+                    fields="id", sendNotificationEmail=send_notification,
+                )) for i, it in enumerate(chunk)
+            }
+            results = await self._run_batch(service, calls)
+            out = []
+            for i, it in enumerate(chunk):
+                response, error = results[i]
+                out.append({
+                    **it, "ok": error is None,
+                    "permission_id": response.get("id") if response else None,
+                    "error": str(error) if error is not None else None,
+                })
+            if on_progress:
+                on_progress(len(chunk))
+            return out
+
+        parts = await asyncio.gather(*(
+            _chunk(items[i:i + BATCH_MAX_SIZE]) for i in range(0, len(items), BATCH_MAX_SIZE)
+        ))
+        results = [res for part in parts for res in part]
+        for res in results:
+            if res["ok"]:
+                permission_index.set(res["folder_id"], res["email"], res["permission_id"], api_role)
+        return results
+
+    @staticmethod
+    def _fill_permission_ids(items):
+        """Take permission ids from the permission index where we have a fresh folder map."""
+        filled = []
+        for it in items:
+            if not it.get("permission_id"):
+                found = (permission_index.get(it["folder_id"]) or {}).get(it["email"].lower())
+                if found:
+                    it = {**it, "permission_id": found[0]}
+            filled.append(it)
+        return filled
+
+    async def batch_remove(self, items, db):
+        """
+        Remove access for many (folder_id, email) pairs.
+        items: list of {"folder_id": ..., "email": ..., "permission_id": optional}
+        Items without a permission_id are resolved with one list call per folder.
+        A user who no longer has access counts as removed (same as remove_access).
+        Returns {**item, "ok": bool, "error": str | None} per item, in input order.
+        """
+        if not items:
+            return []
+        service = await self._get_service(db)
+        if not service:
+            return [{**it, "ok": False, "error": NO_CREDENTIALS_ERROR} for it in items]
+        results = await self._batch_permission_op(
+            service, self._fill_permission_ids(items),
+            lambda it: service.permissions().delete(fileId=it["folder_id"], permissionId=it["permission_id"]),
+            True,
+        )
+        for res in results:
+            if res["ok"]:
+                permission_index.discard(res["folder_id"], res["email"])
+        return results
+
+    async def batch_update_role(self, items, new_role, db):
+        """
+        Change the role of many (folder_id, email) pairs to `new_role`.
+        items: list of {"folder_id": ..., "email": ..., "permission_id": optional}
+        Returns {**item, "ok": bool, "error": str | None} per item, in input order.
+        """
+        if not items:
+            return []
+        service = await self._get_service(db)
+        if not service:
+            return [{**it, "ok": False, "error": NO_CREDENTIALS_ERROR} for it in items]
+        api_role = "writer" if new_role == "editor" else "reader"
+        results = await self._batch_permission_op(
+            service, self._fill_permission_ids(items),
+            lambda it: service.permissions().update(
+                fileId=it["folder_id"], permissionId=it["permission_id"], body={"role": api_role}
+            ),
+            False,
+        )
+        for res in results:
+            if res["ok"]:
+                permission_index.set(res["folder_id"], res["email"], res["permission_id"], api_role)
+            elif res.get("permission_id"):
+                permission_index.invalidate(res["folder_id"])
+        return results
+
     # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # ADD THESE TWO METHODS inside your DriveService class
 # in services/drive.py
@@ -291,16 +1190,10 @@ class DriveService:
             f"and trashed=false"
         )
 
-        def _search():
-            results = service.files().list(
-                q=q,
-                pageSize=max_results,
-                fields="files(id, name)",
-                orderBy="name"
-            ).execute()
-            return results.get("files", [])
-
-        return await self._throttled_call(_search)
+        results = await self._files_list(
+            service, q=q, pageSize=max_results, fields="files(id, name)", orderBy="name"
+        )
+        return results.get("files", [])
 
     async def get_subfolders(self, parent_folder_id: str, db=None) -> list:
         """
@@ -317,16 +1210,10 @@ class DriveService:
             f"and trashed=false"
         )
 
-        def _fetch():
-            results = service.files().list(
-                q=q,
-                pageSize=100,
-                fields="files(id, name)",
-                orderBy="name"
-            ).execute()
-            return results.get("files", [])
-
-        return await self._throttled_call(_fetch)
+        results = await self._files_list(
+            service, q=q, pageSize=100, fields="files(id, name)", orderBy="name"
+        )
+        return results.get("files", [])
         
 
 
@@ -0,0 +1,130 @@
+"""
+Native asyncio transport for the Drive v3 REST API.
+
+Selected with DRIVE_TRANSPORT=aiohttp. Instead of running a blocking
+googleapiclient request on a thread per call (with a fresh httplib2
+connection per thread), requests go out on one pooled aiohttp session
+with keep-alive. Only the single-request operations the bot uses are
+covered: files.list, permissions.list/create/update/delete, changes.list
+and changes.getStartPageToken; batch endpoints stay on googleapiclient.
+
+Errors are raised as googleapiclient HttpError (status, headers and body
+intact) so DriveService's retry and 404 handling work unchanged, and
+connection failures as TransportError, an OSError.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from urllib.parse import quote
+
+import aiohttp
+from httplib2 import Response
+from googleapiclient.errors import HttpError
+
+LOGGER = logging.getLogger(__name__)
+
+DRIVE_API_URL = os.getenv("DRIVE_API_URL", "https://www.googleapis.com/drive/v3")
+HTTP_TIMEOUT = 60           # seconds per request, connect included
+KEEPALIVE_TIMEOUT = 60      # idle pooled connections are closed after this
+
+
+class TransportError(OSError):
+    """Connection-level failure (reset, DNS, timeout) talking to Drive."""
+
+
+def _params(params):
+    # aiohttp only takes str/int/float query values
+    return {
+        k: ("true" if v else "false") if isinstance(v, bool) else v
+        for k, v in params.items() if v is not None
+    }
+
+
+class AsyncDriveTransport:
+    def __init__(self, base_url=DRIVE_API_URL, max_connections=32):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self._session = None
+        self._stats = {"requests": 0, "errors": 0, "transport_errors": 0, "auth_retries": 0}
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections, keepalive_timeout=KEEPALIVE_TIMEOUT, ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+                headers={"Accept": "application/json"},
+            )
+        return self._session
+
+    async def request(self, method, path, get_token, params=None, body=None):
+        """
+        One Drive API call. `get_token(force=False)` returns a bearer token;
+        on a 401 it is called once more with force=True and the call repeated.
+        """
+        url = f"{self.base_url}/{path}"
+        for attempt in range(2):
+            token = await get_token(force=attempt > 0)
+            self._stats["requests"] += 1
+            try:
+                async with self._get_session().request(
+                    method, url, params=_params(params or {}), json=body,
+                    headers={"Authorization": f"Bearer {token}"},
+                ) as resp:
+                    content = await resp.read()
+                    if resp.status == 401 and attempt == 0:
+                        self._stats["auth_retries"] += 1
+                        continue
+                    if resp.status >= 400:
+                        self._stats["errors"] += 1
+                        headers = {k.lower(): v for k, v in resp.headers.items()}
+                        raise HttpError(Response({**headers, "status": resp.status}), content, uri=str(resp.url))
+                    return json.loads(content) if content else {}
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._stats["transport_errors"] += 1
+                raise TransportError(f"{method} {path}: {e!r}") from e
+
+    # ── Drive v3 operations ───────────────────────────
+
+    async def list_files(self, get_token, **params):
+        return await self.request("GET", "files", get_token, params)
+
+    async def list_permissions(self, get_token, file_id, **params):
+        return await self.request("GET", f"files/{quote(file_id, safe='')}/permissions", get_token, params)
+
+    async def create_permission(self, get_token, file_id, body, **params):
+        return await self.request("POST", f"files/{quote(file_id, safe='')}/permissions", get_token, params, body)
+
+    async def update_permission(self, get_token, file_id, permission_id, body, **params):
+        return await self.request(
+            "PATCH", f"files/{quote(file_id, safe='')}/permissions/{quote(permission_id, safe='')}",
+            get_token, params, body
+        )
+
+    async def delete_permission(self, get_token, file_id, permission_id):
+        return await self.request(
+            "DELETE", f"files/{quote(file_id, safe='')}/permissions/{quote(permission_id, safe='')}", get_token
+        )
+
+    async def get_start_page_token(self, get_token):
+        return (await self.request("GET", "changes/startPageToken", get_token))["startPageToken"]
+
+    async def list_changes(self, get_token, page_token, **params):
+        return await self.request("GET", "changes", get_token, {"pageToken": page_token, **params})
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_stats(self) -> dict:
+        connector = self._session.connector if self._session and not self._session.closed else None
+        return {
+            **self._stats,
+            "base_url": self.base_url,
+            "max_connections": self.max_connections,
+            "open": connector is not None,
+        }
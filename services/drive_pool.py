@@ -0,0 +1,85 @@
+"""
+Dedicated thread pool for blocking Drive / OAuth calls.
+
+googleapiclient and oauth2client are synchronous, so every Drive request
+has to run in a thread. Giving them their own named pool keeps them from
+competing with other run_in_executor users, sizes the thread count to
+the Drive concurrency limit, and lets /metrics report how deep the queue
+is and how busy the threads are.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+LOGGER = logging.getLogger(__name__)
+
+
+class DrivePool:
+    def __init__(self, workers, name="drive-io"):
+        self.workers = workers
+        self.name = name
+        self._executor = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._busy = 0
+        self._stats = {"submitted": 0, "completed": 0, "failed": 0, "peak_busy": 0, "peak_queued": 0}
+        self._wait_total = 0.0
+        self._busy_seconds = 0.0
+        self._started_at = time.monotonic()
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=self.name)
+            LOGGER.info(f"🧵 Drive thread pool started ({self.workers} threads)")
+        return self._executor
+
+    def _call(self, func, submitted_at):
+        started = time.monotonic()
+        with self._lock:
+            self._queued -= 1
+            self._busy += 1
+            self._wait_total += started - submitted_at
+            self._stats["peak_busy"] = max(self._stats["peak_busy"], self._busy)
+        ok = False
+        try:
+            result = func()
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._busy -= 1
+                self._busy_seconds += time.monotonic() - started
+                self._stats["completed" if ok else "failed"] += 1
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the pool and await its result."""
+        with self._lock:
+            self._queued += 1
+            self._stats["submitted"] += 1
+            self._stats["peak_queued"] = max(self._stats["peak_queued"], self._queued)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(), self._call, lambda: func(*args, **kwargs), time.monotonic()
+        )
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            started = self._stats["completed"] + self._stats["failed"] + self._busy
+            uptime = max(time.monotonic() - self._started_at, 1e-9)
+            return {
+                **self._stats,
+                "workers": self.workers,
+                "busy": self._busy,
+                "queued": self._queued,
+                "utilisation": round(self._busy / self.workers, 3),
+                "avg_utilisation": round(self._busy_seconds / (uptime * self.workers), 3),
+                "avg_queue_wait_ms": round(self._wait_total / started * 1000, 1) if started else 0.0,
+            }
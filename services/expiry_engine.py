@@ -0,0 +1,103 @@
+"""
+Auto-expiry engine.
+
+Drains the whole backlog of expired grants per sweep: each batch is revoked
+through DriveService.batch_remove (chunks run concurrently under the API
+rate limiter), settled with one bulk_write, logged with one insert_many, and
+the sweep ends with a single summary broadcast instead of one per grant —
+still the "revoke" event, so the channel's revoke-log toggle governs it.
+"""
+
+import logging
+import time
+
+from services.database import db
+from services.drive import drive_service, NO_CREDENTIALS_ERROR
+from services.broadcast import broadcast
+
+LOGGER = logging.getLogger(__name__)
+
+EXPIRY_BATCH_SIZE = 500        # grants pulled per round
+MAX_FAILED_IN_ALERT = 10       # failed emails listed in the summary alert
+MAX_REVOKED_IN_SUMMARY = 10    # revoked emails listed in the summary broadcast
+
+
+async def run_expiry_sweep(app):
+    """
+    Revoke every grant whose expires_at has passed.
+    Returns {"revoked": n, "failed": n, "rounds": n}.
+    """
+    revoked, revoked_sample, failed_grants, rounds = 0, [], [], 0
+    started = time.time()
+
+    while True:
+        batch = await db.get_expired_grants(limit=EXPIRY_BATCH_SIZE)
+        if not batch:
+            break
+        rounds += 1
+
+        results = await drive_service.batch_remove([
+            {"folder_id": g["folder_id"], "email": g["email"],
+             "permission_id": g.get("permission_id"), "grant": g}
+            for g in batch
+        ], db)
+
+        if results and all(r["error"] == NO_CREDENTIALS_ERROR for r in results):
+            # Nothing can be revoked right now — leave the grants active for the next sweep
+            LOGGER.warning("⚠️ Expiry sweep skipped: no Drive credentials available")
+            break
+
+        expired_ids, failed_ids, log_entries = [], [], []
+        for res in results:
+            g = res["grant"]
+            if res["ok"]:
+                expired_ids.append(g["_id"])
+                log_entries.append({
+                    "admin_id": 0, "admin_name": "Auto-Expire", "action": "auto_revoke",
+                    "details": {"email": g["email"], "folder_name": g["folder_name"], "folder_id": g["folder_id"]}
+                })
+            else:
+                failed_ids.append(g["_id"])
+                failed_grants.append(g)
+                LOGGER.error(f"❌ Auto-revoke failed for {g['folder_name']}: {res['error']}")
+
+        await db.mark_grants_expired_bulk(expired_ids, failed_ids)
+        await db.log_actions(log_entries)
+        revoked += len(expired_ids)
+        revoked_sample.extend(e["details"] for e in log_entries[:MAX_REVOKED_IN_SUMMARY - len(revoked_sample)])
+
+        if len(batch) < EXPIRY_BATCH_SIZE:
+            break
+
+    if revoked or failed_grants:
+        LOGGER.info(
+            f"⏰ Expiry sweep: {revoked} revoked, {len(failed_grants)} failed "
+            f"in {rounds} round(s), {time.time() - started:.1f}s"
+        )
+        await _broadcast_summary(app, revoked, revoked_sample, failed_grants)
+
+    return {"revoked": revoked, "failed": len(failed_grants), "rounds": rounds}
+
+
+async def _broadcast_summary(app, revoked, revoked_sample, failed_grants):
+    try:
+        if revoked:
+            await broadcast(app, "revoke", {
+                "count": revoked,
+                "grants": revoked_sample,
+                "admin_name": "Auto-Expire"
+            })
+        if failed_grants:
+            lines = "\n".join(
+                f"• `{g['email']}` → `{g['folder_name']}`" for g in failed_grants[:MAX_FAILED_IN_ALERT]
+            )
+            more = len(failed_grants) - MAX_FAILED_IN_ALERT
+            if more > 0:
+                lines += f"\n… +{more} more"
+            await broadcast(app, "alert", {
+                "severity": "error",
+                "message": f"Failed to auto-revoke {len(failed_grants)} grant(s). "
+                           f"Status set to 'revocation_failed'. Check manually.\n{lines}"
+            })
+    except Exception as e:
+        LOGGER.error(f"Expiry summary broadcast failed: {e}")
@@ -0,0 +1,109 @@
+"""
+Precise wake-up scheduler for grant expiry.
+
+Keeps a min-heap of upcoming expires_at deadlines so the expiry task can
+sleep exactly until the next one is due instead of polling Mongo every
+few minutes. Database.add_timed_grant / extend_grant / revoke_grant keep
+it current; a periodic reconciliation pass reloads the near-term window
+from the (status, expires_at) index to catch out-of-band changes. That
+reload also picks up overdue grants that are still active (a sweep that
+was skipped for missing credentials); grants a sweep marked
+revocation_failed are left for an admin and are not retried.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+
+LOGGER = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL = 900              # seconds between full reloads from Mongo
+RECONCILE_HORIZON = 2 * RECONCILE_INTERVAL  # deadlines loaded ahead on each reload
+
+
+class ExpiryScheduler:
+    def __init__(self):
+        self._heap = []          # (expires_at, grant_id) — may hold stale entries
+        self._deadlines = {}     # grant_id -> current expires_at (source of truth)
+        self._wake = None
+        self._next_reconcile = 0.0
+
+    def _wakeup(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    def schedule(self, grant_id, expires_at):
+        grant_id = str(grant_id)
+        self._deadlines[grant_id] = expires_at
+        heapq.heappush(self._heap, (expires_at, grant_id))
+        if self._heap[0][1] == grant_id:
+            self._wakeup()   # new earliest deadline — re-arm the sleep
+
+    def cancel(self, grant_id):
+        # Lazy deletion: the heap entry is skipped once it surfaces
+        self._deadlines.pop(str(grant_id), None)
+
+    def _peek(self):
+        """Earliest live deadline, discarding stale heap entries."""
+        while self._heap:
+            expires_at, grant_id = self._heap[0]
+            if self._deadlines.get(grant_id) == expires_at:
+                return expires_at
+            heapq.heappop(self._heap)
+        return None
+
+    def _pop_due(self, now):
+        while self._heap and self._heap[0][0] <= now:
+            _, grant_id = heapq.heappop(self._heap)
+            if self._deadlines.get(grant_id, now + 1) <= now:
+                del self._deadlines[grant_id]
+
+    async def reconcile(self, db):
+        upcoming = await db.get_upcoming_expiries(time.time() + RECONCILE_HORIZON)
+        self._deadlines = {str(g["_id"]): g["expires_at"] for g in upcoming}
+        self._heap = [(ts, gid) for gid, ts in self._deadlines.items()]
+        heapq.heapify(self._heap)
+        self._next_reconcile = time.time() + RECONCILE_INTERVAL
+        LOGGER.debug(f"⏰ Expiry scheduler reconciled: {len(self._heap)} deadline(s) in window")
+
+    def get_stats(self) -> dict:
+        next_due = self._peek()
+        return {
+            "scheduled": len(self._deadlines),
+            "next_due_in": round(next_due - time.time(), 1) if next_due else None,
+        }
+
+    async def run(self, db, sweep):
+        """
+        Sleep until the next deadline (or reconciliation), then call `sweep()`.
+        The sweep itself reads due grants from Mongo, so the heap only has to
+        be right about *when* to wake, never about *what* to revoke.
+        """
+        self._wake = asyncio.Event()
+        while True:
+            try:
+                if time.time() >= self._next_reconcile:
+                    await self.reconcile(db)
+
+                now = time.time()
+                next_due = self._peek()
+                if next_due is not None and next_due <= now:
+                    self._pop_due(now)
+                    await sweep()
+                    continue
+
+                wake_at = min(next_due or self._next_reconcile, self._next_reconcile)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=max(0.0, wake_at - now))
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER.error(f"Expiry scheduler error: {e}")
+                await asyncio.sleep(5)
+
+
+expiry_scheduler = ExpiryScheduler()
@@ -0,0 +1,86 @@
+"""
+Shared in-process folder index.
+
+Conversation state only stores a snapshot version id plus the user's
+selection; the (large) folder list itself lives here, keyed by version.
+Snapshots are content-addressed, so every admin browsing the same Drive
+listing shares one copy.
+"""
+
+import hashlib
+import logging
+from collections import OrderedDict
+
+from services.drive import drive_service
+from utils.pagination import sort_folders
+
+LOGGER = logging.getLogger(__name__)
+
+MAX_SNAPSHOTS = 8  # old versions kept around for sessions still browsing them
+
+
+class FolderIndex:
+    def __init__(self):
+        self._snapshots: "OrderedDict[str, dict]" = OrderedDict()
+
+    @staticmethod
+    def _version_of(folders) -> str:
+        h = hashlib.sha1()
+        for f in folders:
+            h.update(f["id"].encode())
+            h.update(b"\0")
+            h.update(f.get("name", "").encode())
+            h.update(b"\0")
+        return h.hexdigest()[:16]
+
+    def publish(self, folders) -> str:
+        """Sort and store a folder listing. Returns its snapshot version."""
+        folders = sort_folders(folders)
+        version = self._version_of(folders)
+        if version in self._snapshots:
+            self._snapshots.move_to_end(version)
+            return version
+        self._snapshots[version] = {
+            "folders": folders,
+            "by_id": {f["id"]: f for f in folders},
+        }
+        while len(self._snapshots) > MAX_SNAPSHOTS:
+            self._snapshots.popitem(last=False)
+        LOGGER.debug(f"📇 Folder snapshot {version} published ({len(folders)} folders)")
+        return version
+
+    def get(self, version):
+        """Sorted folder list for a snapshot, or None if it is unknown/evicted."""
+        snap = self._snapshots.get(version)
+        return snap["folders"] if snap else None
+
+    def lookup(self, version, folder_id):
+        """Single folder dict from a snapshot, or None."""
+        snap = self._snapshots.get(version)
+        return snap["by_id"].get(folder_id) if snap else None
+
+    def folder_name(self, version, folder_id, default="Unknown"):
+        folder = self.lookup(version, folder_id)
+        return folder["name"] if folder else default
+
+    async def load(self, db, force_refresh=False):
+        """Fetch folders (RAM → Mongo → Drive) and publish them. Returns (version, folders)."""
+        folders = await drive_service.get_folders_cached(db, force_refresh=force_refresh)
+        if not folders:
+            return None, []
+        version = self.publish(folders)
+        return version, self.get(version)
+
+    async def resolve(self, version, db):
+        """
+        Folder list for a version stored in state. If that snapshot is gone
+        (bot restart / evicted) the current listing is published instead.
+        Returns (version, folders).
+        """
+        folders = self.get(version) if version else None
+        if folders is not None:
+            return version, folders
+        return await self.load(db)
+
+
+folder_index = FolderIndex()
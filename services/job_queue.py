@@ -0,0 +1,213 @@
+"""
+Durable job queue for long-running Drive operations.
+
+Telegram handlers enqueue a typed job into the `jobs` collection and
+return immediately; a small worker pool started in bot.py's main() claims
+jobs with a lease, keeps the lease alive with a heartbeat while the job
+runs, and edits the job's progress message as it goes. A job whose worker
+dies (restart, crash) is re-claimed once its lease lapses. Failures are
+retried with exponential backoff, and an idempotency key makes a
+double-tapped confirm button enqueue the work only once. The key is only
+held while the job is queued or running — it is cleared when the job
+settles, so the same button can start a fresh job afterwards.
+
+Handlers register per job type:
+
+    @job_queue.handler("bulk_revoke")
+    async def run_bulk_revoke(app, job, message):
+        ...  # message: JobMessage for the progress message, or None
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+import uuid
+
+from services.database import db
+
+LOGGER = logging.getLogger(__name__)
+
+JOB_WORKERS = 2               # jobs processed concurrently
+JOB_LEASE_SECONDS = 120       # visibility timeout — a lapsed lease makes the job claimable again
+JOB_HEARTBEAT_INTERVAL = 30   # seconds between lease renewals while a job runs
+JOB_POLL_INTERVAL = 5         # idle workers re-check Mongo this often (retries, other processes)
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_BACKOFF = 15        # seconds before the first retry, doubled per attempt
+
+
+class JobMessage:
+    """
+    Progress message of a job. Quacks like a CallbackQuery for
+    edit_message_text, so safe_edit() and ProgressTicker work unchanged.
+    """
+
+    def __init__(self, app, chat_id, message_id):
+        self._app = app
+        self.chat_id = chat_id
+        self.message_id = message_id
+
+    async def edit_message_text(self, text, **kwargs):
+        return await self._app.edit_message_text(self.chat_id, self.message_id, text, **kwargs)
+
+
+class JobQueue:
+    def __init__(self):
+        self._handlers = {}
+        self._wake = None
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._stats = {"enqueued": 0, "deduplicated": 0, "completed": 0,
+                       "retried": 0, "failed": 0, "lease_lost": 0, "running": 0}
+
+    def handler(self, job_type):
+        """Decorator registering the coroutine that runs jobs of `job_type`."""
+        def register(func):
+            self._handlers[job_type] = func
+            return func
+        return register
+
+    async def enqueue(self, job_type, payload, chat_id=None, message_id=None,
+                      idempotency_key=None, max_attempts=JOB_MAX_ATTEMPTS):
+        """
+        Queue a job. Returns (job, created) — created is False when a job
+        with the same idempotency_key is still queued or running.
+        """
+        now = time.time()
+        job, created = await db.enqueue_job({
+            "type": job_type,
+            "payload": payload,
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "idempotency_key": idempotency_key,
+            "status": "queued",
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "run_after": now,
+            "lease_owner": None,
+            "lease_until": None,
+            "created_at": now,
+            "updated_at": now,
+        })
+        if created:
+            self._stats["enqueued"] += 1
+            LOGGER.info(f"📬 Job {job['_id']} queued ({job_type})")
+            if self._wake is not None:
+                self._wake.set()
+        else:
+            self._stats["deduplicated"] += 1
+        return job, created
+
+    def get_stats(self) -> dict:
+        return {**self._stats, "workers": JOB_WORKERS, "handlers": sorted(self._handlers)}
+
+    # ── Worker side ───────────────────────────────
+
+    async def _heartbeat(self, job, task):
+        """Renew the lease; cancel the job if another worker has taken it over."""
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_INTERVAL)
+            held = await db.update_leased_job(job["_id"], self.worker_id, {
+                "lease_until": time.time() + JOB_LEASE_SECONDS,
+                "heartbeat_at": time.time(),
+            })
+            if not held:
+                LOGGER.warning(f"⚠️ Lost lease on job {job['_id']} — abandoning it")
+                self._stats["lease_lost"] += 1
+                task.cancel()
+                return
+
+    async def _settle_failure(self, job, message, error):
+        if job["attempts"] < job["max_attempts"]:
+            delay = JOB_RETRY_BACKOFF * 2 ** (job["attempts"] - 1)
+            await db.update_leased_job(job["_id"], self.worker_id, {
+                "status": "queued", "run_after": time.time() + delay,
+                "lease_owner": None, "lease_until": None, "error": error,
+            })
+            self._stats["retried"] += 1
+            LOGGER.warning(f"🔁 Job {job['_id']} ({job['type']}) failed, retry in {delay}s: {error}")
+            text = f"⚠️ **Job hit an error — retrying in {delay}s** (attempt {job['attempts']}/{job['max_attempts']})"
+        else:
+            await db.update_leased_job(job["_id"], self.worker_id, {
+                "status": "failed", "finished_at": time.time(),
+                "lease_owner": None, "lease_until": None, "error": error,
+                "idempotency_key": None,
+            })
+            self._stats["failed"] += 1
+            LOGGER.error(f"❌ Job {job['_id']} ({job['type']}) failed permanently: {error}")
+            text = f"❌ **Job failed after {job['attempts']} attempt(s).**\n\n`{error[:200]}`"
+        if message:
+            with contextlib.suppress(Exception):
+                await message.edit_message_text(text)
+
+    async def _run_one(self, app, job):
+        message = JobMessage(app, job["chat_id"], job["message_id"]) if job.get("message_id") else None
+        handler = self._handlers.get(job["type"])
+        if handler is None:
+            job["attempts"] = job["max_attempts"]  # no point retrying
+            await self._settle_failure(job, message, f"unknown job type {job['type']!r}")
+            return
+        if job["attempts"] > job["max_attempts"]:
+            # Lease lapsed on the final attempt (worker died mid-run)
+            job["attempts"] = job["max_attempts"]
+            await self._settle_failure(job, message, job.get("error") or "worker lost during final attempt")
+            return
+
+        self._stats["running"] += 1
+        task = asyncio.ensure_future(handler(app, job, message))
+        beat = asyncio.ensure_future(self._heartbeat(job, task))
+        try:
+            result = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                # Shutdown: stop the handler and hand the job straight back to the queue
+                task.cancel()
+                with contextlib.suppress(BaseException):
+                    await task
+                await asyncio.shield(db.update_leased_job(
+                    job["_id"], self.worker_id,
+                    {"status": "queued", "run_after": time.time(), "lease_owner": None, "lease_until": None},
+                    inc={"attempts": -1}
+                ))
+                raise
+            # Heartbeat cancelled it — the lease belongs to someone else now
+        except Exception as e:
+            LOGGER.error(f"Job {job['_id']} ({job['type']}) error: {e}", exc_info=True)
+            await self._settle_failure(job, message, str(e))
+        else:
+            await db.update_leased_job(job["_id"], self.worker_id, {
+                "status": "done", "finished_at": time.time(),
+                "lease_owner": None, "lease_until": None, "idempotency_key": None,
+                "result": result if isinstance(result, dict) else None,
+            })
+            self._stats["completed"] += 1
+            LOGGER.info(f"✅ Job {job['_id']} ({job['type']}) done")
+        finally:
+            beat.cancel()
+            self._stats["running"] -= 1
+
+    async def _worker(self, app, n):
+        while True:
+            try:
+                job = await db.claim_job(self.worker_id, JOB_LEASE_SECONDS)
+                if job is None:
+                    self._wake.clear()
+                    with contextlib.suppress(asyncio.TimeoutError):
+                        await asyncio.wait_for(self._wake.wait(), timeout=JOB_POLL_INTERVAL)
+                    continue
+                await self._run_one(app, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                LOGGER.error(f"Job worker {n} error: {e}")
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    async def run(self, app, workers=JOB_WORKERS):
+        """Worker pool — runs until cancelled."""
+        self._wake = asyncio.Event()
+        LOGGER.info(f"🧰 Job queue started: {workers} worker(s), id {self.worker_id}")
+        await asyncio.gather(*(self._worker(app, n) for n in range(workers)))
+
+
+job_queue = JobQueue()
@@ -0,0 +1,148 @@
+"""
+Rate limiting for Drive API calls.
+
+TokenBucket paces requests to the per-user query quota, and a Retry-After
+from Google pauses every caller at once.
+
+AdaptiveConcurrency is an AIMD controller: the number of Drive calls in
+flight grows by one per window of clean calls and halves whenever Google
+reports throttling, so bulk operations settle just under the quota
+instead of running into a wall of 429s.
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+BACKOFF_BASE = 1.0    # seconds before the first retry
+BACKOFF_CAP = 64.0    # Google's recommended ceiling for exponential backoff
+DECREASE_COOLDOWN = 2.0  # one throttling burst only halves the limit once
+
+
+def backoff_delay(attempt, retry_after=None, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Full-jitter exponential backoff; never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """rate: tokens added per second; capacity: burst size."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {"reserved": 0, "waited": 0, "wait_seconds": 0.0, "pauses": 0}
+
+    def reserve(self, n=1) -> float:
+        """
+        Take `n` tokens now and return how long the caller must wait before
+        using them. The balance may go negative, which queues later callers
+        behind this one in arrival order.
+        """
+        n = min(n, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= n
+            delay = max(-self._tokens / self.rate if self._tokens < 0 else 0.0, self._paused_until - now)
+            self._stats["reserved"] += n
+            if delay > 0:
+                self._stats["waited"] += 1
+                self._stats["wait_seconds"] += delay
+            return delay
+
+    async def acquire(self, n=1):
+        delay = self.reserve(n)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds):
+        """Hold every caller back for `seconds` (server asked us to back off)."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            if until > self._paused_until:
+                self._paused_until = until
+                self._stats["pauses"] += 1
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            return {
+                **self._stats,
+                "wait_seconds": round(self._stats["wait_seconds"], 1),
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "tokens": round(tokens, 1),
+                "paused_for": round(max(0.0, self._paused_until - now), 1),
+            }
+
+
+class AdaptiveConcurrency:
+    def __init__(self, initial, minimum, maximum):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self._in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._cond = None
+        self._lock = threading.Lock()
+        self._stats = {"increases": 0, "decreases": 0, "throttled": 0, "peak_in_flight": 0}
+
+    def _condition(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self):
+        cond = self._condition()
+        async with cond:
+            await cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+            self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._in_flight)
+
+    async def release(self):
+        cond = self._condition()
+        async with cond:
+            self._in_flight -= 1
+            cond.notify_all()
+
+    def on_success(self):
+        """Additive increase: +1 after a full window of clean calls."""
+        with self._lock:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._stats["increases"] += 1
+
+    def on_throttle(self):
+        """Multiplicative decrease: halve the limit, at most once per cooldown."""
+        with self._lock:
+            self._stats["throttled"] += 1
+            self._successes = 0
+            now = time.monotonic()
+            if now - self._last_decrease < DECREASE_COOLDOWN:
+                return
+            self._last_decrease = now
+            new_limit = max(self.minimum, self.limit // 2)
+            if new_limit < self.limit:
+                self.limit = new_limit
+                self._stats["decreases"] += 1
+
+    def get_stats(self) -> dict:
+        return {
+            **self._stats,
+            "limit": self.limit,
+            "min": self.minimum,
+            "max": self.maximum,
+            "in_flight": self._in_flight,
+        }
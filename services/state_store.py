@@ -0,0 +1,110 @@
+"""
+In-process cache for conversation state.
+
+Every update is checked by several check_state() filters and then read
+again (and usually rewritten) by the handler itself. StateStore keeps the
+most recent users' state in an LRU dict with a short TTL and writes
+through to Mongo, so a button tap costs at most one read round trip.
+Concurrent reads for the same user share a single in-flight query.
+"""
+
+import asyncio
+import copy
+import logging
+import time
+from collections import OrderedDict
+
+LOGGER = logging.getLogger(__name__)
+
+STATE_CACHE_SIZE = 1000  # users kept in memory
+STATE_CACHE_TTL = 300    # seconds before an entry is re-read from Mongo
+
+
+class StateStore:
+    def __init__(self, load, save, remove, max_entries=STATE_CACHE_SIZE, ttl=STATE_CACHE_TTL):
+        """
+        load(user_id)               -> (state, data)   raw Mongo read
+        save(user_id, state, data)                     raw Mongo write
+        remove(user_id)                                raw Mongo delete
+        """
+        self._load = load
+        self._save = save
+        self._remove = remove
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()  # user_id -> (state, data, cached_at)
+        self._inflight: dict = {}
+        self._writes: dict = {}   # user_id -> write counter, guards against stale in-flight reads
+        self._stats = {"hits": 0, "misses": 0, "coalesced": 0, "writes": 0, "evictions": 0}
+
+    def _put(self, user_id, state, data):
+        self._entries[user_id] = (state, data, time.time())
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._forget_writes(evicted)
+            self._stats["evictions"] += 1
+
+    def _forget_writes(self, user_id):
+        # The write counter only matters while a read for this user is in flight
+        if user_id not in self._inflight:
+            self._writes.pop(user_id, None)
+
+    async def get(self, user_id):
+        user_id = int(user_id)
+        entry = self._entries.get(user_id)
+        if entry and time.time() - entry[2] < self.ttl:
+            self._stats["hits"] += 1
+            self._entries.move_to_end(user_id)
+            # handlers mutate `data` freely — never hand out the cached dict
+            return entry[0], copy.deepcopy(entry[1])
+
+        if entry:
+            del self._entries[user_id]   # expired
+            self._forget_writes(user_id)
+
+        pending = self._inflight.get(user_id)
+        if pending:
+            self._stats["coalesced"] += 1
+            state, data = await asyncio.shield(pending)
+            return state, copy.deepcopy(data)
+
+        self._stats["misses"] += 1
+        generation = self._writes.get(user_id, 0)
+        fut = asyncio.ensure_future(self._load(user_id))
+        self._inflight[user_id] = fut
+        try:
+            state, data = await fut
+            # "no state" is cached too — it is the common case for plain messages
+            if self._writes.get(user_id, 0) == generation:
+                self._put(user_id, state, data)
+            return state, copy.deepcopy(data)
+        finally:
+            self._inflight.pop(user_id, None)
+
+    async def set(self, user_id, state, data):
+        user_id = int(user_id)
+        await self._save(user_id, state, data)
+        self._stats["writes"] += 1
+        self._writes[user_id] = self._writes.get(user_id, 0) + 1
+        self._put(user_id, state, copy.deepcopy(data))
+
+    async def delete(self, user_id):
+        user_id = int(user_id)
+        await self._remove(user_id)
+        self._stats["writes"] += 1
+        self._writes[user_id] = self._writes.get(user_id, 0) + 1
+        self._put(user_id, None, {})
+
+    def clear(self):
+        self._entries.clear()
+        self._writes = {uid: n for uid, n in self._writes.items() if uid in self._inflight}
+
+    def get_stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["misses"] + self._stats["coalesced"]
+        served = self._stats["hits"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "cached": len(self._entries),
+            "hit_rate": round(served / lookups, 3) if lookups else 0.0,
+        }
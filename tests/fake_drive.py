@@ -0,0 +1,162 @@
+"""
+Local fake of the Drive v3 REST subset the aiohttp transport uses.
+
+Point the bot at it with DRIVE_TRANSPORT=aiohttp and
+DRIVE_API_URL=http://127.0.0.1:<port>/drive/v3. It also serves an OAuth
+token endpoint at /token, so credentials whose token_uri points there can
+be refreshed for real. State is plain attributes tests can set and inspect:
+
+    drive = FakeDrive()
+    drive.folders = [{"id": "f1", "name": "Folder 1"}]
+    drive.throttle = 2          # next two requests get 429 + Retry-After
+    drive.tokens.clear()        # every issued token is now rejected (401)
+"""
+
+import itertools
+
+from aiohttp import web
+
+API_PREFIX = "/drive/v3"
+
+
+def _error(status, reason, headers=None):
+    body = {"error": {"code": status, "message": reason, "errors": [{"reason": reason}]}}
+    return web.json_response(body, status=status, headers=headers)
+
+
+class FakeDrive:
+    def __init__(self, page_size=2):
+        self.page_size = page_size
+        self.folders = []            # [{"id", "name"}], served by files.list
+        self.permissions = {}        # folder_id -> [{"id", "role", "type", "emailAddress"}]
+        self.changes = []            # served by changes.list
+        self.deleted = set()         # folder ids whose permission listing 404s
+        self.forbidden = set()       # ... and 403s
+        self.start_page_token = "1"
+        self.tokens = {"token-0"}    # bearer tokens currently accepted
+        self.issued = []             # tokens handed out by /token
+        self.throttle = 0            # answer this many API requests with 429
+        self.retry_after = 1
+        self.requests = []           # (method, path) of every API request
+        self._ids = itertools.count(1)
+        self._runner = None
+
+    def app(self):
+        app = web.Application(middlewares=[self._guard])
+        app.add_routes([
+            web.post("/token", self._token),
+            web.get(f"{API_PREFIX}/files", self._list_files),
+            web.get(f"{API_PREFIX}/files/{{fid}}/permissions", self._list_permissions),
+            web.post(f"{API_PREFIX}/files/{{fid}}/permissions", self._create_permission),
+            web.patch(f"{API_PREFIX}/files/{{fid}}/permissions/{{pid}}", self._update_permission),
+            web.delete(f"{API_PREFIX}/files/{{fid}}/permissions/{{pid}}", self._delete_permission),
+            web.get(f"{API_PREFIX}/changes/startPageToken", self._start_page_token),
+            web.get(f"{API_PREFIX}/changes", self._list_changes),
+        ])
+        return app
+
+    async def start(self, host, port):
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def requests_to(self, method, path):
+        return sum(1 for r in self.requests if r == (method, path))
+
+    # ── Middleware: auth and throttling ───────────────
+
+    @web.middleware
+    async def _guard(self, request, handler):
+        if not request.path.startswith(API_PREFIX):
+            return await handler(request)
+        self.requests.append((request.method, request.path[len(API_PREFIX) + 1:]))
+        auth = request.headers.get("Authorization", "")
+        if auth.removeprefix("Bearer ") not in self.tokens:
+            return _error(401, "authError")
+        if self.throttle > 0:
+            self.throttle -= 1
+            return _error(429, "rateLimitExceeded", {"Retry-After": str(self.retry_after)})
+        return await handler(request)
+
+    # ── OAuth ─────────────────────────────────────────
+
+    async def _token(self, request):
+        form = await request.post()
+        if form.get("grant_type") != "refresh_token":
+            return web.json_response({"error": "unsupported_grant_type"}, status=400)
+        token = f"token-{len(self.issued) + 1}"
+        self.issued.append(token)
+        self.tokens.add(token)
+        return web.json_response({"access_token": token, "expires_in": 3600, "token_type": "Bearer"})
+
+    # ── Files ─────────────────────────────────────────
+
+    async def _list_files(self, request):
+        start = int(request.query.get("pageToken") or 0)
+        body = {"files": self.folders[start:start + self.page_size]}
+        if start + self.page_size < len(self.folders):
+            body["nextPageToken"] = str(start + self.page_size)
+        return web.json_response(body)
+
+    # ── Permissions ───────────────────────────────────
+
+    def _find(self, request):
+        for perm in self.permissions.get(request.match_info["fid"], []):
+            if perm["id"] == request.match_info["pid"]:
+                return perm
+        return None
+
+    async def _list_permissions(self, request):
+        if request.match_info["fid"] in self.deleted:
+            return _error(404, "notFound")
+        if request.match_info["fid"] in self.forbidden:
+            return _error(403, "insufficientFilePermissions")
+        return web.json_response({"permissions": self.permissions.get(request.match_info["fid"], [])})
+
+    async def _create_permission(self, request):
+        body = await request.json()
+        perm = {
+            "id": f"perm-{next(self._ids)}", "type": body["type"], "role": body["role"],
+            "emailAddress": body["emailAddress"],
+            "notified": request.query.get("sendNotificationEmail") == "true",
+        }
+        self.permissions.setdefault(request.match_info["fid"], []).append(perm)
+        return web.json_response({"id": perm["id"]})
+
+    async def _update_permission(self, request):
+        perm = self._find(request)
+        if perm is None:
+            return _error(404, "notFound")
+        perm["role"] = (await request.json())["role"]
+        return web.json_response(perm)
+
+    async def _delete_permission(self, request):
+        perm = self._find(request)
+        if perm is None:
+            return _error(404, "notFound")
+        self.permissions[request.match_info["fid"]].remove(perm)
+        return web.Response(status=204)
+
+    # ── Changes ───────────────────────────────────────
+
+    async def _start_page_token(self, request):
+        return web.json_response({"startPageToken": self.start_page_token})
+
+    async def _list_changes(self, request):
+        if request.query.get("pageToken") != self.start_page_token:
+            return _error(400, "invalidPageToken")
+        return web.json_response({
+            "changes": self.changes,
+            "newStartPageToken": str(int(self.start_page_token) + 1),
+        })
+
+
+if __name__ == "__main__":
+    # Standalone: python -m tests.fake_drive [port]
+    import sys
+    web.run_app(FakeDrive().app(), host="127.0.0.1", port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
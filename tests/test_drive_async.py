@@ -0,0 +1,240 @@
+"""
+The aiohttp Drive transport against the local fake in tests/fake_drive.py.
+
+AsyncDriveTransportTest drives the transport directly; DriveServiceAsyncTest
+goes through DriveService so retries, Retry-After backoff, OAuth refresh and
+the stale permission id fallback run exactly as they do in the bot.
+"""
+
+import datetime
+import os
+import socket
+import time
+import unittest
+
+try:
+    import aiohttp  # noqa: F401 — optional dependency of the aiohttp transport
+except ImportError:
+    raise unittest.SkipTest("aiohttp is not installed")
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+HOST, PORT = "127.0.0.1", _free_port()
+BASE_URL = f"http://{HOST}:{PORT}"
+
+# Both are read at import time by services.drive / services.drive_async
+os.environ["DRIVE_TRANSPORT"] = "aiohttp"
+os.environ["DRIVE_API_URL"] = f"{BASE_URL}/drive/v3"
+
+from googleapiclient.errors import HttpError  # noqa: E402
+from oauth2client.client import OAuth2Credentials  # noqa: E402
+
+from services import drive  # noqa: E402
+from services.drive_async import AsyncDriveTransport  # noqa: E402
+from tests.fake_drive import FakeDrive  # noqa: E402
+
+ADMIN_ID = 1
+
+
+def tearDownModule():
+    drive.drive_pool.shutdown()
+
+
+class FakeDB:
+    """The Database methods the Drive credential code and the permission id backfill use."""
+
+    def __init__(self, creds_json):
+        self.creds_json = creds_json
+        self.grants = []
+
+    async def get_gdrive_creds(self, user_id):
+        return self.creds_json
+
+    async def save_gdrive_creds(self, user_id, creds_json):
+        self.creds_json = creds_json
+
+    async def get_grants_missing_permission_id(self, after_id=None):
+        return [g for g in self.grants if not g.get("permission_id") and (after_id is None or g["_id"] > after_id)]
+
+    async def set_grant_permission_ids(self, updates):
+        for g in self.grants:
+            if g["_id"] in updates:
+                g["permission_id"] = updates[g["_id"]]
+        return len(updates)
+
+
+class FakeDriveTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.fake = FakeDrive()
+        await self.fake.start(HOST, PORT)
+        self.addAsyncCleanup(self.fake.stop)
+
+
+class AsyncDriveTransportTest(FakeDriveTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.transport = AsyncDriveTransport()
+        self.addAsyncCleanup(self.transport.close)
+
+    async def get_token(self, force=False):
+        return "token-0"
+
+    async def test_uses_drive_api_url(self):
+        self.assertEqual(self.transport.base_url, f"{BASE_URL}/drive/v3")
+
+    async def test_files_list_paging(self):
+        self.fake.folders = [{"id": f"f{i}", "name": f"Folder {i}"} for i in range(5)]
+        first = await self.transport.list_files(self.get_token, pageSize=2)
+        self.assertEqual([f["id"] for f in first["files"]], ["f0", "f1"])
+        second = await self.transport.list_files(self.get_token, pageToken=first["nextPageToken"])
+        self.assertEqual([f["id"] for f in second["files"]], ["f2", "f3"])
+        last = await self.transport.list_files(self.get_token, pageToken=second["nextPageToken"])
+        self.assertEqual([f["id"] for f in last["files"]], ["f4"])
+        self.assertNotIn("nextPageToken", last)
+
+    async def test_permission_create_update_delete(self):
+        created = await self.transport.create_permission(
+            self.get_token, "f1", {"type": "user", "role": "reader", "emailAddress": "a@x.com"},
+            fields="id", sendNotificationEmail=True,
+        )
+        perm = self.fake.permissions["f1"][0]
+        self.assertEqual(created, {"id": perm["id"]})
+        self.assertTrue(perm["notified"])
+
+        await self.transport.update_permission(self.get_token, "f1", perm["id"], {"role": "writer"})
+        listed = await self.transport.list_permissions(self.get_token, "f1")
+        self.assertEqual(listed["permissions"][0]["role"], "writer")
+
+        self.assertEqual(await self.transport.delete_permission(self.get_token, "f1", perm["id"]), {})
+        self.assertEqual(self.fake.permissions["f1"], [])
+
+    async def test_delete_stale_id_raises_404(self):
+        with self.assertRaises(HttpError) as ctx:
+            await self.transport.delete_permission(self.get_token, "f1", "gone")
+        self.assertEqual(ctx.exception.resp.status, 404)
+
+    async def test_429_keeps_retry_after(self):
+        self.fake.throttle, self.fake.retry_after = 1, 7
+        with self.assertRaises(HttpError) as ctx:
+            await self.transport.list_permissions(self.get_token, "f1")
+        self.assertEqual(ctx.exception.resp.status, 429)
+        self.assertEqual(drive.DriveService._retry_after(ctx.exception), 7)
+
+    async def test_401_retries_once_with_forced_token(self):
+        self.fake.tokens = {"token-1"}
+        calls = []
+
+        async def get_token(force=False):
+            calls.append(force)
+            return "token-1" if force else "token-0"
+
+        await self.transport.list_files(get_token)
+        self.assertEqual(calls, [False, True])
+        self.assertEqual(self.transport.get_stats()["auth_retries"], 1)
+
+    async def test_changes(self):
+        self.fake.start_page_token = "41"
+        self.fake.changes = [{"fileId": "f9", "removed": True}]
+        token = await self.transport.get_start_page_token(self.get_token)
+        self.assertEqual(token, "41")
+        result = await self.transport.list_changes(self.get_token, token, includeRemoved=True)
+        self.assertEqual(result["changes"], [{"fileId": "f9", "removed": True}])
+        self.assertEqual(result["newStartPageToken"], "42")
+
+    async def test_connection_failure_is_transport_error(self):
+        await self.fake.stop()
+        from services.drive_async import TransportError
+        with self.assertRaises(TransportError):
+            await self.transport.list_files(self.get_token)
+
+
+class DriveServiceAsyncTest(FakeDriveTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        creds = OAuth2Credentials(
+            "token-0", "client-id", "client-secret", "refresh-token",
+            datetime.datetime.utcnow() + datetime.timedelta(hours=1), f"{BASE_URL}/token", "tests",
+        )
+        self.db = FakeDB(creds.to_json())
+        drive.invalidate_user_service(ADMIN_ID)
+        drive.permission_index.invalidate()
+        self.service = drive.DriveService()
+        self.service.set_admin_user(ADMIN_ID)
+        self.addAsyncCleanup(self.service.close)
+        self.addCleanup(drive.invalidate_user_service, ADMIN_ID)
+
+    async def test_iter_folder_pages(self):
+        self.fake.folders = [{"id": f"f{i}", "name": f"Folder {i}"} for i in range(5)]
+        pages = [page async for page in self.service.iter_folder_pages(self.db)]
+        self.assertEqual(
+            [(token, [f["id"] for f in folders], next_token) for token, folders, next_token in pages],
+            [(None, ["f0", "f1"], "2"), ("2", ["f2", "f3"], "4"), ("4", ["f4"], None)],
+        )
+
+    async def test_429_backs_off_for_retry_after(self):
+        self.fake.permissions["f1"] = [{"id": "p1", "role": "reader", "type": "user", "emailAddress": "a@x.com"}]
+        self.fake.throttle, self.fake.retry_after = 1, 1
+        started = time.monotonic()
+        perms = await self.service.get_permissions("f1", self.db)
+        self.assertGreaterEqual(time.monotonic() - started, 1.0)
+        self.assertEqual([p["id"] for p in perms], ["p1"])
+        self.assertEqual(self.fake.requests_to("GET", "files/f1/permissions"), 2)
+
+    async def test_401_forces_token_refresh(self):
+        self.fake.tokens.clear()  # token-0 revoked server-side before it expires locally
+        result = await self.service.grant_access("f1", "b@x.com", "viewer", self.db)
+        self.assertEqual(self.fake.issued, ["token-1"])
+        self.assertEqual(result, {"id": self.fake.permissions["f1"][0]["id"]})
+        self.assertEqual(OAuth2Credentials.from_json(self.db.creds_json).access_token, "token-1")
+
+    async def test_grant_change_role_remove(self):
+        granted = await self.service.grant_access("f1", "b@x.com", "viewer", self.db)
+        self.assertEqual(self.fake.permissions["f1"][0]["role"], "reader")
+        self.assertTrue(await self.service.change_role("f1", "b@x.com", "editor", self.db))
+        self.assertEqual(self.fake.permissions["f1"][0]["role"], "writer")
+        self.assertTrue(await self.service.remove_access("f1", "b@x.com", self.db, permission_id=granted["id"]))
+        self.assertEqual(self.fake.permissions["f1"], [])
+
+    async def test_remove_with_stale_permission_id(self):
+        self.fake.permissions["f1"] = [{"id": "p1", "role": "reader", "type": "user", "emailAddress": "a@x.com"}]
+        self.assertTrue(await self.service.remove_access("f1", "a@x.com", self.db, permission_id="stale"))
+        self.assertEqual(self.fake.permissions["f1"], [])
+        self.assertEqual(self.fake.requests_to("DELETE", "files/f1/permissions/stale"), 1)
+        self.assertEqual(self.fake.requests_to("DELETE", "files/f1/permissions/p1"), 1)
+
+    async def test_backfill_not_done_while_a_folder_listing_fails(self):
+        self.fake.permissions["f1"] = [{"id": "p1", "role": "reader", "type": "user", "emailAddress": "a@x.com"}]
+        self.fake.forbidden.add("f2")
+        self.fake.deleted.add("f3")
+        self.db.grants = [
+            {"_id": 1, "folder_id": "f1", "email": "a@x.com"},
+            {"_id": 2, "folder_id": "f2", "email": "b@x.com"},
+            {"_id": 3, "folder_id": "f3", "email": "c@x.com"},
+        ]
+        self.assertIsNone(await self.service.backfill_grant_permission_ids(self.db))
+        self.assertEqual(self.db.grants[0]["permission_id"], "p1")
+
+        # A deleted folder counts as missing; once f2 lists again the pass completes
+        self.fake.forbidden.clear()
+        self.assertEqual(await self.service.backfill_grant_permission_ids(self.db), 0)
+
+    async def test_list_changes(self):
+        self.fake.start_page_token = "7"
+        self.fake.changes = [{"fileId": "f9", "removed": False, "file": {
+            "id": "f9", "name": "New", "mimeType": drive.FOLDER_MIME, "trashed": False,
+        }}]
+        service = await self.service._get_service(self.db)
+        token = await self.service._get_start_page_token(service)
+        changes, next_token, new_start = await self.service._list_changes(service, token)
+        self.assertEqual([c["fileId"] for c in changes], ["f9"])
+        self.assertIsNone(next_token)
+        self.assertEqual(new_start, "8")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -121,6 +121,19 @@ def get_page_items(items, page, per_page):
     return items[start:start + per_page]
 
 
+def page_cursor(cursors, page):
+    """`after` cursor for a 1-based page from a keyset cursor trail (page 1 → None)."""
+    return cursors[page - 1] if 0 < page <= len(cursors) else None
+
+
+def record_next_cursor(cursors, page, next_cursor):
+    """Remember where page+1 starts; the trail keeps one entry per reachable page."""
+    del cursors[page:]
+    if next_cursor is not None:
+        cursors.append(next_cursor)
+    return cursors
+
+
 def create_checkbox_keyboard(
     folders,
     selected_ids,
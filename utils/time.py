@@ -1,4 +1,6 @@
 import time
+import asyncio
+import contextlib
 from datetime import datetime, timezone, timedelta
 
 
@@ -16,6 +18,52 @@ async def safe_edit(target, text, reply_markup=None, **kwargs):
         if "MESSAGE_NOT_MODIFIED" not in str(e):
             raise
 
+
+PROGRESS_INTERVAL = 3  # seconds between progress message edits
+
+
+class ProgressTicker:
+    """
+    Edit a progress message on a fixed cadence while a long job runs,
+    instead of once per item (keeps us clear of Telegram flood limits).
+
+        async with ProgressTicker(callback_query, "Granting", total) as progress:
+            ...
+            progress.advance()
+    """
+
+    def __init__(self, target, label, total, interval=PROGRESS_INTERVAL):
+        self.target = target
+        self.label = label
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self._task = None
+
+    def advance(self, n=1):
+        self.done += n
+
+    async def _run(self):
+        last = None
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.done == last:
+                continue
+            last = self.done
+            try:
+                await safe_edit(self.target, f"⏳ **{self.label}...** {self.done}/{self.total}")
+            except Exception:
+                pass  # progress is best-effort
+
+    async def __aenter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc):
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
 IST = timezone(timedelta(hours=5, minutes=30))
 
 def get_current_time_str():